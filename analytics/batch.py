@@ -0,0 +1,190 @@
+import os
+import json
+import argparse
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from analytics.calculator import calculator_report
+from analytics.portfolio import portfolio_summary
+from analytics.risk import risk_report
+from analytics.stock_details import return_statistics
+from utils.backtest import FREQUENCIES
+from utils.price_matrix import PriceMatrix
+from utils.price_store import get_prices
+
+# Benchmark compared against in every report
+BENCHMARK = '^GSPC'
+WORKERS = os.cpu_count() or 1
+OUTPUT_FORMATS = ('parquet', 'csv')
+
+# Prices of every ticker in the batch, memory-mapped once per worker process
+_shared = None
+
+
+# Portfolios from a CSV with one row per holding: portfolio, ticker and optionally amount, start,
+# end and goal (start/end/goal are read from the portfolio's first row). Missing dates fall back to
+# start/end; amounts of a ticker listed more than once are added up. Returns
+# [{'name', 'holdings': {ticker: amount}, 'start', 'end', 'goal'}, ...].
+def read_portfolios(path, start=None, end=None):
+    rows = pd.read_csv(path, dtype={'portfolio': str, 'ticker': str})
+    portfolios = []
+    for name, group in rows.groupby('portfolio', sort=False):
+        first = group.iloc[0]
+        amounts = group['amount'].fillna(0).astype(float) if 'amount' in group else pd.Series(0.0, index=group.index)
+        holdings = amounts.groupby(group['ticker'].str.strip().to_numpy(), sort=False).sum()
+        portfolio_start = first.get('start') if pd.notna(first.get('start')) else start
+        portfolio_end = first.get('end') if pd.notna(first.get('end')) else end
+        if portfolio_start is None or portfolio_end is None:
+            raise ValueError(f"Portfolio {name} has no start or end date")
+        portfolios.append({
+            'name': name,
+            'holdings': holdings.to_dict(),
+            'start': pd.Timestamp(portfolio_start),
+            'end': pd.Timestamp(portfolio_end),
+            'goal': float(first['goal']) if pd.notna(first.get('goal')) else None,
+        })
+    return portfolios
+
+
+# Load the prices of every ticker of the batch (and the benchmark) once, over the widest date range,
+# and write them as .npy files that worker processes memory-map instead of each reading the store
+def build_price_cache(portfolios, directory):
+    tickers = sorted({ticker for p in portfolios for ticker in p['holdings']} | {BENCHMARK})
+    start = min(p['start'] for p in portfolios)
+    end = max(p['end'] for p in portfolios)
+    prices = get_prices(tickers, start, end).sort_index()
+    np.save(os.path.join(directory, 'dates.npy'), prices.index.to_numpy(dtype='datetime64[ns]'))
+    np.save(os.path.join(directory, 'values.npy'), prices.to_numpy(dtype=np.float64))
+    with open(os.path.join(directory, 'tickers.json'), 'w') as f:
+        json.dump(list(prices.columns), f)
+    return directory
+
+
+def _init_worker(directory):
+    global _shared
+    with open(os.path.join(directory, 'tickers.json')) as f:
+        tickers = json.load(f)
+    _shared = {
+        'dates': pd.DatetimeIndex(np.load(os.path.join(directory, 'dates.npy'))),
+        'values': np.load(os.path.join(directory, 'values.npy'), mmap_mode='r'),
+        'columns': {ticker: i for i, ticker in enumerate(tickers)},
+    }
+
+
+# Price matrix of some tickers over [start, end) from the shared cache, keeping the days on which
+# at least one of them has a price (as the price store does)
+def shared_price_matrix(tickers, start, end):
+    dates = _shared['dates']
+    rows = slice(dates.searchsorted(pd.Timestamp(start)), dates.searchsorted(pd.Timestamp(end)))
+    columns = [_shared['columns'][ticker] for ticker in tickers]
+    values = np.asarray(_shared['values'][rows][:, columns])
+    keep = ~np.isnan(values).all(axis=1)
+    return PriceMatrix(dates[rows][keep], tickers, values[keep])
+
+
+# Every report table for one portfolio, each with a leading 'portfolio' column
+def analyze_portfolio(portfolio, options):
+    name, holdings = portfolio['name'], portfolio['holdings']
+    tickers = [ticker for ticker in holdings if ticker in _shared['columns']]
+    if not tickers:
+        raise ValueError("None of the tickers have prices")
+    matrix = shared_price_matrix(tickers, portfolio['start'], portfolio['end'])
+    if matrix.empty or len(matrix.dates) < 2:
+        raise ValueError("Not enough prices in the date range")
+    benchmark = shared_price_matrix([BENCHMARK], portfolio['start'], portfolio['end']).returns[BENCHMARK].dropna()
+
+    risk = risk_report(matrix, benchmark if not benchmark.empty else None, estimator=options['estimator'],
+                       var_level=options['var_level'], frequency=options['frequency'], lookback=options['lookback'],
+                       cost_bps=options['cost_bps'])
+    statistics = pd.DataFrame({ticker: return_statistics(matrix.returns[ticker].dropna(), matrix.interval)
+                               for ticker in matrix.tickers}).T
+    tickers_table = portfolio_summary(matrix).join(statistics).join(risk['tickers'])
+    tickers_table.insert(0, 'amount', pd.Series(holdings).reindex(tickers_table.index))
+
+    summary = {'start': portfolio['start'], 'end': portfolio['end'], 'tickers': len(tickers),
+               'missing_tickers': ' '.join(t for t in holdings if t not in tickers),
+               'portfolio_risk': risk['portfolio_risk'], 'benchmark_risk': risk['benchmark_risk']}
+    summary.update(calculator_report(matrix, holdings, portfolio['goal'], years=options['years'],
+                                     n_paths=options['n_paths']))
+    if risk['backtest'] is not None:
+        for row, values in risk['backtest'].iterrows():
+            summary.update({f"backtest_{row.lower()}_{column}": value for column, value in values.items()})
+
+    tables = {
+        'summary': pd.DataFrame([summary]),
+        'tickers': tickers_table.rename_axis('ticker').reset_index(),
+        'var': risk['var'].rename_axis('ticker').reset_index(),
+    }
+    for table in tables.values():
+        table.insert(0, 'portfolio', name)
+    return tables
+
+
+def _analyze(portfolio, options):
+    try:
+        return analyze_portfolio(portfolio, options), None
+    except Exception as e:
+        return None, {'portfolio': portfolio['name'], 'error': f"{type(e).__name__}: {e}"}
+
+
+# Analyze every portfolio over a process pool sharing one price cache, and write one file per table
+# (summary, tickers, var and errors) to output_dir. Returns {table: frame}.
+def run_batch(portfolios, output_dir, output_format='parquet', workers=WORKERS, estimator='ledoit_wolf',
+              var_level=0.95, frequency='monthly', lookback=252, cost_bps=10, years=5, n_paths=10000):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    options = {'estimator': estimator, 'var_level': var_level, 'frequency': frequency, 'lookback': lookback,
+               'cost_bps': cost_bps, 'years': years, 'n_paths': n_paths}
+    directory = tempfile.mkdtemp(prefix='analytics-prices-')
+    try:
+        build_price_cache(portfolios, directory)
+        if workers > 1 and len(portfolios) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(directory,)) as pool:
+                results = list(pool.map(_analyze, portfolios, [options] * len(portfolios),
+                                        chunksize=max(1, len(portfolios) // (4 * workers))))
+        else:
+            _init_worker(directory)
+            results = [_analyze(portfolio, options) for portfolio in portfolios]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    tables = {}
+    for name in ('summary', 'tickers', 'var'):
+        frames = [result[name] for result, _ in results if result is not None]
+        tables[name] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    tables['errors'] = pd.DataFrame([error for _, error in results if error is not None],
+                                    columns=['portfolio', 'error'])
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, table in tables.items():
+        path = os.path.join(output_dir, f"{name}.{output_format}")
+        if output_format == 'parquet':
+            table.to_parquet(path, index=False)
+        else:
+            table.to_csv(path, index=False)
+    return tables
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m analytics.batch',
+                                     description="Batch reports for a CSV of portfolios")
+    parser.add_argument('portfolios', help="CSV with portfolio, ticker and optionally amount, start, end, goal")
+    parser.add_argument('output_dir')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='parquet')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--start', type=pd.Timestamp, help="YYYY-MM-DD, default five years before --end")
+    parser.add_argument('--end', type=pd.Timestamp, help="YYYY-MM-DD, default today")
+    parser.add_argument('--frequency', choices=list(FREQUENCIES), default='monthly')
+    parser.add_argument('--lookback', type=int, default=252)
+    parser.add_argument('--cost-bps', type=float, default=10)
+    args = parser.parse_args()
+    end = args.end or pd.Timestamp.today().normalize()
+    start = args.start or end - pd.DateOffset(years=5)
+    tables = run_batch(read_portfolios(args.portfolios, start, end), args.output_dir, output_format=args.format,
+                       workers=args.workers, frequency=args.frequency, lookback=args.lookback,
+                       cost_bps=args.cost_bps)
+    print(f"{len(tables['summary'])} portfolios analyzed, {len(tables['errors'])} failed; results in {args.output_dir}")
+    for row in tables['errors'].itertuples(index=False):
+        print(f"{row.portfolio}: {row.error}")
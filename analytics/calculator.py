@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from utils.bars import TRADING_DAYS
+from utils.monte_carlo import simulate_goal
+
+
+# Value of the holdings over the range: amount * (1 + return since start); missing prices count as zero
+def investment_value(matrix, amounts):
+    weights = np.array([amounts.get(ticker, 0) for ticker in matrix.tickers], dtype=float)
+    growth = np.nan_to_num(1 + matrix.cumulative.to_numpy())
+    return pd.DataFrame({'Date': matrix.dates, 'amount': growth @ weights})
+
+
+# First date the value reaches the goal, or None
+def goal_reached_date(values, goal):
+    reached = values[values.amount >= goal]
+    return None if reached.empty else reached.Date.iloc[0]
+
+
+# simulate_goal() from the last date of the range, with the band steps and the median hit step
+# converted to calendar dates ('band_dates', 'median_hit_date')
+def goal_projection(matrix, amounts, goal, years=5, n_paths=10000, method='bootstrap', rebalance=True, seed=0,
+                    periods_per_year=TRADING_DAYS):
+    projection = simulate_goal(matrix.returns, amounts, goal, years=years, n_paths=n_paths, method=method,
+                               rebalance=rebalance, periods_per_year=periods_per_year, seed=seed)
+    start = matrix.dates[-1]
+    days_per_step = 365.25 / periods_per_year
+    projection['band_dates'] = start + pd.to_timedelta(projection['bands'].index * days_per_step, unit='D')
+    step = projection['median_hit_step']
+    projection['median_hit_date'] = None if step is None else start + pd.to_timedelta(step * days_per_step, unit='D')
+    return projection
+
+
+# One row of Calculator figures for a report: invested and current value, goal date on the history,
+# and the projected probability, median goal date and final value percentiles
+def calculator_report(matrix, amounts, goal=None, **projection_options):
+    values = investment_value(matrix, amounts)
+    report = {
+        'invested': float(sum(amounts.values())),
+        'current_value': float(values.amount.iloc[-1]) if len(values) else np.nan,
+        'goal': goal,
+        'goal_reached_date': goal_reached_date(values, goal) if goal else None,
+    }
+    if goal and report['invested'] > 0:
+        projection = goal_projection(matrix, amounts, goal, **projection_options)
+        final = projection['bands'].iloc[-1]
+        report.update({'probability': projection['probability'], 'median_hit_date': projection['median_hit_date']},
+                      **{f"final_{column}": final[column] for column in final.index})
+    return report
@@ -0,0 +1,17 @@
+import pandas as pd
+from utils.downsample import downsample_wide
+
+
+# Per-ticker figures of the Portfolio page: 50-day average, 1-year low/high and the return since the
+# first price of the range (last available price)
+def portfolio_summary(matrix):
+    summary = matrix.summary.copy()
+    summary['total_return'] = matrix.cumulative.ffill().iloc[-1] if not matrix.empty else pd.Series(dtype=float)
+    return summary
+
+
+# Long format (Date, ticker, price_pct) for the All Stocks chart, with at most max_points per ticker if given
+def performance_chart_data(matrix, max_points=None):
+    if max_points is None:
+        return matrix.to_long()
+    return downsample_wide(matrix.cumulative, max_points, var_name='ticker', value_name='price_pct')
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from utils.backtest import backtest
+from utils.bars import periods_per_year
+from utils.covariance import sync_engine
+from utils.optimizer import min_variance_weights
+from utils.rolling import value_at_risk, conditional_value_at_risk
+
+# Covariance estimators of the CovarianceEngine
+COVARIANCE_ESTIMATORS = ('ledoit_wolf', 'sample')
+
+
+# Returns per bar with tickers as columns, keeping tickers with at least two returns. Missing days are
+# kept and handled pairwise by the covariance engine instead of dropping the whole row.
+def risk_returns(matrix):
+    returns = matrix.returns.dropna(how='all')
+    return returns.loc[:, returns.count() >= 2]
+
+
+# Every estimator's covariance of the returns, and the engine so callers can pass it back next time
+# (only days added since then are folded in)
+def covariances(returns, engine=None):
+    engine = sync_engine(engine, returns)
+    return {name: engine.covariance(name) for name in COVARIANCE_ESTIMATORS}, engine
+
+
+# Long-only minimum variance weights, warm-started from previous weights (a Series) if given
+def optimize_weights(cov_matrix, previous=None):
+    w0 = None if previous is None else previous.reindex(cov_matrix.columns).fillna(0).to_numpy()
+    return pd.Series(min_variance_weights(cov_matrix.to_numpy(), w0=w0), index=cov_matrix.columns)
+
+
+# Annualized risk (in %) of every ticker, of the portfolio at the given weights and of the benchmark,
+# and the portfolio's returns per bar (missing returns count as flat bars)
+def risk_metrics(returns, sample_cov, weights, benchmark_returns=None, interval='1d'):
+    w = weights.reindex(sample_cov.columns).to_numpy()
+    annual = np.sqrt(periods_per_year(interval))
+    metrics = {
+        'ticker_risks': pd.Series(np.sqrt(np.diag(sample_cov)) * annual * 100, index=sample_cov.index).round(2),
+        'portfolio_risk': round(np.sqrt(w @ sample_cov.to_numpy() @ w) * annual * 100, 2),
+        'portfolio_returns': returns.fillna(0) @ weights.reindex(returns.columns).fillna(0),
+    }
+    if benchmark_returns is not None:
+        metrics['benchmark_risk'] = round(benchmark_returns.std() * annual * 100, 2)
+    return metrics
+
+
+# Historical and parametric VaR / CVaR per bar of every column (loss as a fraction)
+def var_table(returns, level=0.95):
+    return pd.DataFrame({
+        'Historical VaR': value_at_risk(returns, level, 'historical'),
+        'Historical CVaR': conditional_value_at_risk(returns, level, 'historical'),
+        'Parametric VaR': value_at_risk(returns, level, 'parametric'),
+        'Parametric CVaR': conditional_value_at_risk(returns, level, 'parametric'),
+    })
+
+
+# Allocation (in %) in proportion to the latest available prices
+def composition(matrix):
+    latest_prices = matrix.prices.iloc[-1].dropna()
+    return pd.DataFrame({
+        'Ticker': latest_prices.index,
+        'Allocation (%)': ((latest_prices / latest_prices.sum()) * 100).round(2)
+    })
+
+
+# Risk figures of one portfolio for a report: per-ticker risk and optimal weight, VaR / CVaR of the
+# tickers and the optimal portfolio, and the walk-forward backtest summary (None if the range is too
+# short). backtest_options are passed to utils.backtest.backtest().
+def risk_report(matrix, benchmark_returns=None, estimator='ledoit_wolf', var_level=0.95, **backtest_options):
+    returns = risk_returns(matrix)
+    if returns.empty:
+        raise ValueError("No return data for the selected tickers and date range")
+    covariance, _ = covariances(returns)
+    weights = optimize_weights(covariance[estimator])
+    metrics = risk_metrics(returns, covariance['sample'], weights, benchmark_returns, matrix.interval)
+    with_portfolio = returns.assign(**{'Optimal Portfolio': metrics['portfolio_returns']})
+    try:
+        backtest_summary = backtest(returns, benchmark_returns, periods_per_year=matrix.periods_per_year,
+                                    **backtest_options)['summary']
+    except ValueError:
+        backtest_summary = None
+    return {
+        'tickers': pd.DataFrame({'risk_pct': metrics['ticker_risks'], 'optimal_weight': weights}),
+        'portfolio_risk': metrics['portfolio_risk'],
+        'benchmark_risk': metrics.get('benchmark_risk'),
+        'var': var_table(with_portfolio, var_level),
+        'backtest': backtest_summary,
+    }
@@ -0,0 +1,21 @@
+import numpy as np
+from utils.bars import periods_per_year
+
+
+# Bars with the '% Change' of the close from the previous bar, without the first (empty) row
+def price_movements(bars):
+    movements = bars.copy()
+    movements['% Change'] = movements['Close'].pct_change()
+    return movements.dropna()
+
+
+# Annual return and standard deviation (in %) of changes per bar at the given interval, and their ratio
+def return_statistics(changes, interval='1d'):
+    periods = periods_per_year(interval)
+    annual_return = changes.mean() * periods * 100
+    stdev = np.std(changes) * np.sqrt(periods) * 100
+    return {
+        'annual_return': annual_return,
+        'stdev': stdev,
+        'risk_adjusted': annual_return / stdev if stdev != 0 else 0,
+    }
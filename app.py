@@ -2,25 +2,60 @@ import sys
 import os
 sys.path.append(os.path.abspath('.'))
 
+import importlib
+import threading
 import streamlit as st
-from streamlit_option_menu import option_menu
-import pandas as pd
 import datetime as dt
 
-# Import modules
+# Import modules. Only the login/signup path is imported up front: the pages, their dependencies
+# (pandas, plotly, scipy, ...) and the ticker universe are loaded after login, by the page that
+# needs them.
 from auth.login import is_user_authenticated, show_login_page, show_signup_page
-from utils.data_loader import load_data
-from app_pages.portfolio import show_portfolio_page
-from app_pages.stock_details import show_stock_details_page
-from app_pages.calculator import show_calculator_page
-from app_pages.risk_analysis import show_risk_analysis_page
+from utils.profiling import span, show_profiling_panel, PANEL_ENABLED
+
+# Menu label -> (page module, page function, whether it takes the ticker list)
+PAGES = {
+    "Portfolio": ('app_pages.portfolio', 'show_portfolio_page', True),
+    "Stock Details": ('app_pages.stock_details', 'show_stock_details_page', False),
+    "Calculator": ('app_pages.calculator', 'show_calculator_page', True),
+    "Risk Analysis": ('app_pages.risk_analysis', 'show_risk_analysis_page', True),
+    "News Impact": ('app_pages.news_impact', 'show_news_impact_page', False),
+}
+# Import the other pages on a background thread after the first login, so switching pages does not
+# wait on their imports (set APP_WARMUP=0 to turn off)
+WARMUP = os.environ.get('APP_WARMUP', '1') != '0'
 
 
 # App config
 st.set_page_config(layout="wide", initial_sidebar_state="expanded")
 
-# Load ticker data
-ticker_list = load_data()
+
+def _import_pages():
+    for module, _, _ in PAGES.values():
+        try:
+            importlib.import_module(module)
+        except Exception:
+            # The page reports the error itself when it is opened
+            pass
+
+
+# Started once per process; the import lock makes a page opened meanwhile wait for its own import only
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    thread = threading.Thread(target=_import_pages, name='page-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def show_page(selected, ticker_list):
+    module, function, takes_tickers = PAGES[selected]
+    with span('import'):
+        show = getattr(importlib.import_module(module), function)
+    if takes_tickers:
+        show(ticker_list)
+    else:
+        show()
+
 
 def main():
     if 'show_login' not in st.session_state:
@@ -32,20 +67,37 @@ def main():
         else:
             show_signup_page()
     else:
+        import pandas as pd
+        from streamlit_option_menu import option_menu
+        from utils.data_loader import load_data
+        from utils.price_matrix import PriceMatrix
+        from utils.session_portfolio import hydrate_session
+
+        if WARMUP:
+            start_warmup()
+
+        # Load ticker data
+        with span('load_data'):
+            ticker_list = load_data()
+
         st.title('Portfolio Analysis')
         # --- Navigation Menu ---
-        menu_options = ["Portfolio", "Stock Details", "Calculator", "Risk Analysis"]
+        menu_options = ["Portfolio", "Stock Details", "Calculator", "Risk Analysis", "News Impact"]
         selected = option_menu(
             menu_title="Navigate",
             options=menu_options,
-            icons=["house", "info-circle", "calculator", "fa-solid fa-chart-line"],
+            icons=["house", "info-circle", "calculator", "fa-solid fa-chart-line", "newspaper"],
             orientation="horizontal",
             key="main_menu"
         )
 
         # Add a logout button
         if st.button("Logout", key="logout_button"):
-            st.session_state.authenticated = False
+            # Drop everything the previous user left in the session (portfolio, page selections,
+            # cached results, widget values) so the next login starts from their own
+            for key in list(st.session_state.keys()):
+                if key != 'show_login':
+                    del st.session_state[key]
             st.session_state.show_login = True  # Reset show_login state, go to login
             st.rerun()
 
@@ -57,21 +109,23 @@ def main():
         if 'sel_dt2' not in st.session_state:
             st.session_state.sel_dt2 = dt.date.today()
         if 'yfdata' not in st.session_state:
-            st.session_state.yfdata = pd.DataFrame()
+            st.session_state.yfdata = PriceMatrix.from_frame(pd.DataFrame())
         if 'selected_menu' not in st.session_state:
             st.session_state.selected_menu = "Portfolio"
         if 'ticker_details' not in st.session_state:
             st.session_state.ticker_details = ""
+        # Saved tickers, dates and amounts; prices load lazily when a page needs them
+        if st.session_state.get('username'):
+            with span('hydrate_session'):
+                hydrate_session(st.session_state.username, ticker_list)
 
-        # Show selected page
-        if selected == "Portfolio":
-            show_portfolio_page(ticker_list)
-        elif selected == "Calculator":
-            show_calculator_page(ticker_list)
-        elif selected == "Stock Details":
-            show_stock_details_page()
-        elif selected == "Risk Analysis":
-            show_risk_analysis_page(ticker_list)
+        # Show selected page, timed stage by stage
+        with span(selected):
+            show_page(selected, ticker_list)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # One span per rerun, logged as JSON with PROFILE_LOG and shown in the sidebar with PROFILE_PANEL
+    with span('rerun') as rerun:
+        main()
+    if PANEL_ENABLED and is_user_authenticated():
+        show_profiling_panel(rerun.record)
@@ -1,55 +1,122 @@
 import streamlit as st
-import plotly.express as px
 import plotly.graph_objects as go
 import datetime as dt
-import yfinance as yf
+from analytics.calculator import investment_value, goal_reached_date, goal_projection
+from utils.compute_cache import cache_key, cached
+from utils.charts import area_chart
+from utils.ticker_info import get_logo_urls
+from utils.session_portfolio import session_prices, save_session
+from utils.profiling import stage
+
+# Return models offered for the forward projection
+SIMULATION_METHODS = {
+    'Bootstrap': 'bootstrap',
+    'Normal': 'normal',
+}
+
+# Bump when the projection changes, so cached projections of the old code are not reused
+PROJECTION_VERSION = 2
 
 def show_calculator_page(ticker_list):
+    stage('prices')
     sel_tickers = st.session_state.selected_tickers
-    sel_tickers_list = ticker_list[ticker_list.symbol_name.isin(sel_tickers)].symbol
-    yfdata = st.session_state.yfdata
+    sel_tickers_list = ticker_list.symbols(sel_tickers)
+    # Prices are built on first use, e.g. when the Calculator is opened straight after login
+    yfdata = session_prices(sel_tickers_list, st.session_state.sel_dtl, st.session_state.sel_dt2) if sel_tickers_list \
+        else st.session_state.yfdata
+    saved_amounts = st.session_state.setdefault('amounts', {})
     
+    stage('inputs')
     container = st.container()
     with container:
         cols_tab2 = st.columns((0.2, 0.8))
         total_inv = 0
         amounts = {}
+        logos = get_logo_urls(sel_tickers_list)
         for i, ticker in enumerate(sel_tickers_list):
             cols = cols_tab2[1].columns((0.1, 0.3))
-            try:
-                cols[0].image('https://logo.clearbit.com/' + yf.Ticker(ticker).info['website'].replace('https://.', ''), width=65)
-            except:
+            if logos[ticker]:
+                cols[0].image(logos[ticker], width=65)
+            else:
                 cols[0].subheader(ticker)
 
+            # Seed the input from the saved amount; the widget's own state is dropped while the page is not shown
+            if ticker not in st.session_state:
+                st.session_state[ticker] = int(saved_amounts.get(ticker, 0))
             amount = cols[1].number_input('', key=ticker, step=50)
             total_inv += amount
             amounts[ticker] = amount
+        saved_amounts.update(amounts)
 
         cols_tab2[1].subheader('Total Investment:' + str(total_inv))
         cols_goal = cols_tab2[1].columns((0.06, 0.20, 0.7))
         cols_goal[0].text('')
         cols_goal[0].subheader('Goal: ')
+        if 'goal' not in st.session_state:
+            st.session_state.goal = int(st.session_state.get('goal_amount') or 0)
         goal = cols_goal[1].number_input('', key='goal', step=50)
+        st.session_state.goal_amount = goal
+        if cols_goal[2].button("Save Portfolio", key="save_calculator_button") and st.session_state.get('username'):
+            save_session(st.session_state.username, ticker_list)
+            cols_goal[2].success("Portfolio saved")
 
         # Create a new dataframe for the calculator
         if not yfdata.empty:
-            calculator_df = yfdata.copy()
-            calculator_df['amount'] = calculator_df['ticker'].map(amounts) * (1 + calculator_df['price_pct'])
-
-            dfsum = calculator_df.groupby('Date').amount.sum().reset_index()
-            fig = px.area(dfsum, x='Date', y='amount')
+            stage('value chart')
+            # Value of each holding is amount * (1 + return since start); missing prices count as zero
+            dfsum = investment_value(yfdata, amounts)
+            fig = area_chart(dfsum, x='Date', y='amount')
             fig.add_hline(y=goal, line_color='rgb(57,255,20)', line_dash='dash', line_width=3)
             
-            if dfsum[dfsum.amount >= goal].shape[0] == 0:
+            goal_date = goal_reached_date(dfsum, goal)
+            if goal_date is None:
                 cols_tab2[1].warning("You won't reach your goal")
             else:
-                fig.add_vline(x=dfsum[dfsum.amount >= goal].Date.iloc[0], line_color='rgb(57,255,20)', line_dash='dash', line_width=3)
-                fig.add_trace(go.Scatter(x=[dfsum[dfsum.amount >= goal].Date.iloc[0] + dt.timedelta(days=7)], y=[goal * 1.1],
-                                        text=[dfsum[dfsum.amount >= goal].Date.dt.date.iloc[0]],
+                fig.add_vline(x=goal_date, line_color='rgb(57,255,20)', line_dash='dash', line_width=3)
+                fig.add_trace(go.Scatter(x=[goal_date + dt.timedelta(days=7)], y=[goal * 1.1],
+                                        text=[goal_date.date()],
                                         mode='text',
                                         name='Goal',
                                         textfont=dict(color='rgb(57,255,20)', size=20)))
             fig.update_layout(xaxis_title=None, yaxis_title=None)
             cols_tab2[1].plotly_chart(fig, use_container_width=True)
+
+            # ---------------- Forward Projection ----------------
+            stage('projection')
+            cols_tab2[1].subheader('Projection')
+            cols_mc = cols_tab2[1].columns(4)
+            years = cols_mc[0].slider('Years', min_value=1, max_value=30, value=5, key='mc_years')
+            method = cols_mc[1].radio('Returns', list(SIMULATION_METHODS), key='mc_method')
+            n_paths = cols_mc[2].select_slider('Paths', options=[1000, 10000, 50000], value=10000, key='mc_paths')
+            rebalance = cols_mc[3].checkbox('Rebalance to initial weights', value=True, key='mc_rebalance')
+            if total_inv > 0 and goal > 0:
+                # The seed is fixed, so the projection is shared by every session with the same inputs
+                key = cache_key('goal_projection', PROJECTION_VERSION, yfdata.tickers, st.session_state.sel_dtl,
+                                st.session_state.sel_dt2, yfdata.fingerprint, sorted(amounts.items()), goal, years,
+                                SIMULATION_METHODS[method], n_paths, rebalance)
+                try:
+                    projection = cached(key, lambda: goal_projection(yfdata, amounts, goal, years=years,
+                                                                     n_paths=n_paths, method=SIMULATION_METHODS[method],
+                                                                     rebalance=rebalance, seed=0))
+                except ValueError as e:
+                    cols_tab2[1].warning(str(e))
+                else:
+                    bands = projection['bands']
+                    band_dates = projection['band_dates']
+                    cols_metric = cols_tab2[1].columns(2)
+                    cols_metric[0].metric('Probability of reaching goal', f"{projection['probability']:.1%}")
+                    if projection['median_hit_date'] is not None:
+                        cols_metric[1].metric('Median date goal is reached', str(projection['median_hit_date'].date()))
+                    fig_mc = go.Figure()
+                    fig_mc.add_trace(go.Scatter(x=band_dates, y=bands['p95'], line=dict(width=0), showlegend=False))
+                    fig_mc.add_trace(go.Scatter(x=band_dates, y=bands['p5'], fill='tonexty', line=dict(width=0), name='5-95%'))
+                    fig_mc.add_trace(go.Scatter(x=band_dates, y=bands['p75'], line=dict(width=0), showlegend=False))
+                    fig_mc.add_trace(go.Scatter(x=band_dates, y=bands['p25'], fill='tonexty', line=dict(width=0), name='25-75%'))
+                    fig_mc.add_trace(go.Scatter(x=band_dates, y=bands['p50'], name='Median'))
+                    fig_mc.add_hline(y=goal, line_color='rgb(57,255,20)', line_dash='dash', line_width=3)
+                    fig_mc.update_layout(xaxis_title=None, yaxis_title=None)
+                    cols_tab2[1].plotly_chart(fig_mc, use_container_width=True)
+            else:
+                cols_tab2[1].info('Enter investment amounts and a goal to project forward.')
         else:
             cols_tab2[1].warning("Select stocks in the Portfolio section to use the Calculator.")
\ No newline at end of file
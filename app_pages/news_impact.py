@@ -0,0 +1,72 @@
+import streamlit as st
+import plotly.express as px
+from utils.news import get_news_pipeline
+from utils.event_study import HORIZONS, SENTIMENT_COLUMNS, CHUNK_ROWS, event_study, fill_check_days
+from utils.profiling import stage
+
+# Forward-return horizons offered, in trading days
+HORIZON_OPTIONS = [1, 2, 5, 10, 21, 63]
+
+def show_news_impact_page():
+    st.header("News Impact")
+    st.write("How news sentiment relates to the stock's returns on the following trading days.")
+
+    stage('inputs')
+    store = get_news_pipeline().store
+    tickers = store.tickers()
+    if not tickers:
+        st.warning("No news collected yet. Open the News tab of a stock in Stock Details to start collecting.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    default = [t for t in st.session_state.get('news_impact_tickers', tickers) if t in tickers]
+    sel_tickers = col1.multiselect("Tickers", options=tickers, default=default)
+    st.session_state.news_impact_tickers = sel_tickers
+    horizons = col2.multiselect("Horizons (trading days)", options=HORIZON_OPTIONS, default=list(HORIZONS))
+    bucket_column = col3.selectbox("Sentiment measure", options=SENTIMENT_COLUMNS)
+    if not sel_tickers or not horizons:
+        st.warning("Please select at least one ticker and one horizon.")
+        return
+    horizons = sorted(horizons)
+
+    # Check-day prices first, so the summary is complete; the study is redone only when its inputs change
+    stage('event study')
+    try:
+        fill_check_days(store)
+        modified = store.summary_mtime()
+        study_key = (tuple(sel_tickers), tuple(horizons), bucket_column, modified)
+        if st.session_state.get('news_impact_key') != study_key:
+            st.session_state.news_impact = event_study(store.iter_summary(CHUNK_ROWS), horizons=horizons,
+                                                       bucket_column=bucket_column, tickers=sel_tickers)
+            st.session_state.news_impact_key = study_key
+        study = st.session_state.news_impact
+    except Exception as e:
+        st.error(f"Error running the event study: {e}")
+        return
+
+    if study['events'] == 0:
+        st.warning("No news days with prices for the selected tickers.")
+        return
+    st.metric("News days", f"{study['events']:,}")
+
+    stage('charts')
+    return_labels = {f"return_{h}d": f"{h}d" for h in horizons}
+    correlations = study['correlations'].rename(columns=return_labels)
+    fig_corr = px.imshow(correlations, text_auto='.2f', zmin=-1, zmax=1, color_continuous_scale='RdBu',
+                         title="Sentiment / forward return correlation")
+    st.plotly_chart(fig_corr, use_container_width=True)
+
+    bucket_returns = (study['bucket_returns'].rename(columns=return_labels) * 100).reset_index(names='sentiment')
+    bucket_long = bucket_returns.melt(id_vars='sentiment', var_name='horizon', value_name='mean_return_pct')
+    fig_buckets = px.bar(bucket_long, x='horizon', y='mean_return_pct', color='sentiment', barmode='group',
+                         title=f"Mean forward return (%) by {bucket_column}")
+    st.plotly_chart(fig_buckets, use_container_width=True)
+
+    sample = study['sample']
+    horizon = st.selectbox("Scatter horizon", options=horizons, format_func=lambda h: f"{h} trading days")
+    fig_scatter = px.scatter(sample, x=bucket_column, y=f"return_{horizon}d", color='stock', opacity=0.6,
+                             hover_data=['check_day'], title=f"{bucket_column} vs {horizon}-day return")
+    st.plotly_chart(fig_scatter, use_container_width=True)
+
+    st.subheader("Observations per pair")
+    st.dataframe(study['counts'].rename(columns=return_labels))
@@ -1,36 +1,45 @@
 import streamlit as st
-import yfinance as yf
-import plotly.express as px
 import pandas as pd
 import datetime as dt
+from utils.data_loader import ticker_options
+from utils.price_matrix import PriceMatrix, PRICE_MATRIX_VERSION
+from utils.compute_cache import cache_key, cached
+from analytics.portfolio import portfolio_summary, performance_chart_data
+from utils.charts import line_chart, small_line_chart, SMALL_CHART_POINTS
+from utils.downsample import MAX_POINTS
+from utils.session_portfolio import session_prices, save_session
+from utils.ticker_info import get_logo_urls
+from utils.profiling import stage
 
 def show_portfolio_page(ticker_list):
+    stage('sidebar')
     with st.sidebar:
-        sel_tickers = st.multiselect('Portfolio Builder', placeholder="Search tickers", 
-                                     options=ticker_list.symbol_name, 
+        query = st.text_input('Portfolio Builder', placeholder="Search tickers", key="portfolio_search")
+        sel_tickers = st.multiselect('Portfolio Builder', placeholder="Select tickers", label_visibility="collapsed",
+                                     options=ticker_options(ticker_list, query, st.session_state.selected_tickers),
                                      default=st.session_state.selected_tickers)
-        sel_tickers_list = ticker_list[ticker_list.symbol_name.isin(sel_tickers)].symbol
+        sel_tickers_list = ticker_list.symbols(sel_tickers)
 
+        # Logos for every selected ticker, fetched concurrently and cached
+        logos = get_logo_urls(sel_tickers_list)
         cols = st.columns(4)
         for i, ticker in enumerate(sel_tickers_list):
-            try:
-                cols[i % 4].image('https://logo.clearbit.com/' + yf.Ticker(ticker).info['website'].replace('https://.', ''), width=65)
-            except:
+            if logos[ticker]:
+                cols[i % 4].image(logos[ticker], width=65)
+            else:
                 cols[i % 4].subheader(ticker)
 
         cols = st.columns(2)
         sel_dtl = cols[0].date_input('Start Date', value=st.session_state.sel_dtl, format='YYYY-MM-DD')
         sel_dt2 = cols[1].date_input('End Date', value=st.session_state.sel_dt2, format='YYYY-MM-DD')
 
+        stage('prices')
         if len(sel_tickers) != 0:
-            yfdata = yf.download(list(sel_tickers_list), start=sel_dtl, end=sel_dt2)['Close'].reset_index().melt(
-                id_vars=['Date'], var_name='ticker', value_name='price')
-            yfdata['price_start'] = yfdata.groupby('ticker').price.transform('first')
-            yfdata['price pct daily'] = yfdata.groupby('ticker').price.pct_change()
-            yfdata['price_pct'] = (yfdata.price - yfdata.price_start) / yfdata.price_start
-            st.session_state.yfdata = yfdata
+            # Reload only when the selection changes or an update is requested
+            yfdata = session_prices(sel_tickers_list, sel_dtl, sel_dt2,
+                                    refresh=st.session_state.get('update_data_button', False))
         else:
-            yfdata = pd.DataFrame()
+            yfdata = PriceMatrix.from_frame(pd.DataFrame())
 
         st.sidebar.button("Update Data", key="update_data_button")
 
@@ -39,13 +48,22 @@ def show_portfolio_page(ticker_list):
         st.session_state.sel_dtl = sel_dtl
         st.session_state.sel_dt2 = sel_dt2
 
+        if st.sidebar.button("Save Portfolio", key="save_portfolio_button") and st.session_state.get('username'):
+            save_session(st.session_state.username, ticker_list)
+            st.sidebar.success("Portfolio saved")
+
     # Main content area
     if len(sel_tickers) == 0:
         st.info('Select ticker to view points')
     else:
+        stage('performance chart')
         st.subheader('All Stocks')
         if not yfdata.empty:
-            fig = px.line(yfdata, x='Date', y='price_pct', color='ticker', markers=True)
+            # Long format for the chart, downsampled to the chart width and shared by every session with the same prices
+            long_data = cached(cache_key('price_long', PRICE_MATRIX_VERSION, yfdata.tickers, sel_dtl, sel_dt2,
+                                         yfdata.fingerprint, MAX_POINTS),
+                               lambda: performance_chart_data(yfdata, MAX_POINTS))
+            fig = line_chart(long_data, x='Date', y='price_pct', color='ticker', markers=True)
             fig.add_hline(y=0, line_dash='dash', line_color='white')
             fig.update_layout(xaxis_title=None, yaxis_title=None)
             fig.update_yaxes(tickformat=',.0%')
@@ -53,18 +71,25 @@ def show_portfolio_page(ticker_list):
         else:
             st.warning("No tickers selected or no data available.")
 
+        stage('ticker charts')
         st.subheader('Individual Stocks')
+        metrics = portfolio_summary(yfdata)
+        # The small per-ticker charts need fewer points
+        small_data = cached(cache_key('price_long', PRICE_MATRIX_VERSION, yfdata.tickers, sel_dtl, sel_dt2,
+                                      yfdata.fingerprint, SMALL_CHART_POINTS),
+                            lambda: performance_chart_data(yfdata, SMALL_CHART_POINTS))
+        small_data = dict(tuple(small_data.groupby('ticker')))
         cols = st.columns(3)
         for i, ticker in enumerate(sel_tickers_list):
-            try:
-                cols[i % 3].image('https://logo.clearbit.com/' + yf.Ticker(ticker).info['website'].replace('https://.', ''), width=65)
-            except:
+            if logos[ticker]:
+                cols[i % 3].image(logos[ticker], width=65)
+            else:
                 cols[i % 3].subheader(ticker)
 
             cols2 = cols[i % 3].columns(3)
-            cols2[0].metric(label='50-Day Average', value=round(yfdata[yfdata.ticker == ticker].price.tail(50).mean(), 2))
-            cols2[1].metric(label='1 year Low', value=round(yfdata[yfdata.ticker == ticker].price.tail(365).mean(), 2))
-            cols2[2].metric(label='1 year High', value=round(yfdata[yfdata.ticker == ticker].price.tail(365).max(), 2))
+            cols2[0].metric(label='50-Day Average', value=metrics.at[ticker, 'avg_50d'])
+            cols2[1].metric(label='1 year Low', value=metrics.at[ticker, 'low_1y'])
+            cols2[2].metric(label='1 year High', value=metrics.at[ticker, 'high_1y'])
 
             # Pass current dates
             if cols[i % 3].button(f"Details for {ticker}", key=f"details_{ticker}_{i}"):
@@ -78,6 +103,6 @@ def show_portfolio_page(ticker_list):
                 st.session_state.ticker_details = ticker
                 st.rerun()
 
-            fig = px.line(yfdata[yfdata.ticker == ticker], x='Date', y='price_pct', markers=True)
-            fig.update_layout(xaxis_title=None, yaxis_title=None)
+            fig = small_line_chart(small_data.get(ticker, pd.DataFrame(columns=['Date', 'price_pct'])), x='Date',
+                                   y='price_pct', markers=True)
             cols[i % 3].plotly_chart(fig, use_container_width=True)
\ No newline at end of file
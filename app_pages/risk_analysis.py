@@ -1,82 +1,126 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
+from itertools import combinations
 import numpy as np
 import plotly.express as px
-import scipy.optimize as sco
+import plotly.graph_objects as go
+from utils.price_store import get_prices
+from utils.price_matrix import cached_price_matrix
+from utils.data_loader import ticker_options
+from utils.compute_cache import cache_key, cached
+from utils.charts import line_chart
+from utils.frontier import cached_efficient_frontier, frontier_key
+from utils.backtest import backtest, FREQUENCIES
+from utils.rolling import rolling_volatility, rolling_beta, rolling_correlation
+from analytics.risk import risk_returns, covariances, optimize_weights, risk_metrics, var_table, composition
+from utils.profiling import stage
+
+# Covariance estimators offered for the optimization
+COVARIANCE_ESTIMATORS = {
+    "Ledoit-Wolf shrinkage": 'ledoit_wolf',
+    "Sample (pairwise)": 'sample',
+}
+
+# Target-return portfolios solved for the efficient frontier
+FRONTIER_POINTS = 100
+
+# Window lengths offered for the rolling risk charts
+ROLLING_WINDOWS = [21, 63, 126, 252]
+
+# Covariance windows (trading days) offered for the rebalancing backtest
+BACKTEST_LOOKBACKS = [63, 126, 252]
+
+# Bump when the returns, covariance or weights computed below change, so cached results are not reused
+RISK_MODEL_VERSION = 1
 
 def show_risk_analysis_page(ticker_list):
+    stage('inputs')
     st.header("Risk Analysis")
 
     # Ticker Selection Bar: Use ticker names as in Portfolio, then convert to symbols
+    # Keep picks across searches, since new search results rebuild the multiselect
+    current_names = st.session_state.get('risk_ticker_names', st.session_state.selected_tickers)
+    query = st.text_input("Search tickers for risk analysis", key="risk_search")
     risk_ticker_names = st.multiselect(
         "Select tickers for risk analysis",
-        options=ticker_list['symbol_name'].tolist(),
-        default=st.session_state.selected_tickers,
+        options=ticker_options(ticker_list, query, current_names),
+        default=current_names,
         help="You can add more tickers here for risk analysis."
     )
+    st.session_state.risk_ticker_names = risk_ticker_names
     if not risk_ticker_names:
         st.warning("Please select at least one ticker for risk analysis.")
         return
     
     # Convert selected ticker names into their symbols
-    risk_tickers = ticker_list[ticker_list['symbol_name'].isin(risk_ticker_names)]['symbol'].tolist()
+    risk_tickers = ticker_list.symbols(risk_ticker_names)
 
     # Retrieve date range from session state
     start_date = st.session_state.sel_dtl
     end_date = st.session_state.sel_dt2
 
-    # Download risk tickers data
+    stage('prices')
+    # Load risk tickers data, shared with the Portfolio page and other sessions for the same selection
     try:
-        risk_data = yf.download(risk_tickers, start=start_date, end=end_date)['Close']
-        # Convert to long format for easier manipulation
-        risk_data = risk_data.reset_index().melt(id_vars='Date', var_name='ticker', value_name='price')
-        # Sort data and calculate daily returns
-        risk_data.sort_values(['ticker', 'Date'], inplace=True)
-        risk_data['price pct daily'] = risk_data.groupby('ticker')['price'].pct_change()
+        risk_data = cached_price_matrix(risk_tickers, start_date, end_date)
     except Exception as e:
         st.error(f"Error downloading data for risk tickers: {e}")
         return
 
     # Download benchmark data (S&P 500)
     try:
-        benchmark_data = yf.download('^GSPC', start=start_date, end=end_date)['Close'].reset_index()
-        benchmark_data.columns = ['Date', 'Close']
-        benchmark_returns = benchmark_data.set_index('Date')['Close'].pct_change().dropna()
+        benchmark_data = get_prices(['^GSPC'], start_date, end_date)['^GSPC']
+        benchmark_returns = benchmark_data.pct_change().dropna()
     except Exception as e:
         st.error(f"Error downloading S&P 500 data: {e}")
         return
 
-    # Pivot risk data to have tickers as columns and Date as index
-    risk_pivot = risk_data.pivot_table(index='Date', columns='ticker', values='price pct daily').dropna()
+    stage('risk model')
+    # Returns and covariances are shared by every session looking at the same prices. On a miss,
+    # only days added since this session's last rerun are folded into its covariance engine; the
+    # engine is passed in and handed back, and session state is only updated once cached() returns.
+    engine = st.session_state.get('cov_engine')
+    updated = {}
+
+    def risk_model():
+        returns = risk_returns(risk_data)
+        if returns.empty:
+            return {'returns': returns, 'covariance': {}}
+        covariance, updated['engine'] = covariances(returns, engine)
+        return {'returns': returns, 'covariance': covariance}
+
+    model_key = (risk_tickers, start_date, end_date, risk_data.fingerprint)
+    model = cached(cache_key('risk_model', RISK_MODEL_VERSION, *model_key), risk_model)
+    if 'engine' in updated:
+        st.session_state.cov_engine = updated['engine']
+    # Daily returns with tickers as columns and Date as index
+    risk_pivot = model['returns']
     if risk_pivot.empty:
         st.warning("No data available for the selected tickers and date range.")
         return
+    sample_cov = model['covariance']['sample']
 
     # ------------------- Minimum Variance Portfolio Optimization -------------------
-    def min_variance_weights(cov_matrix):
-        n = cov_matrix.shape[0]
-        def objective(w, cov_matrix):
-            return w.T @ cov_matrix @ w
-        constraints = ({'type': 'eq', 'fun': lambda w: np.sum(w) - 1})
-        bounds = tuple((0, 1) for _ in range(n))
-        initial_guess = np.repeat(1/n, n)
-        result = sco.minimize(objective, initial_guess, args=(cov_matrix,), method='SLSQP', bounds=bounds, constraints=constraints)
-        return result.x
-
-    # Calculate the covariance matrix and optimal weights
-    cov_matrix = risk_pivot.cov()
-    optimal_weights = min_variance_weights(cov_matrix)
-    optimal_weights_series = pd.Series(optimal_weights, index=cov_matrix.columns)
+    stage('optimization')
+    # Optimal weights for the chosen covariance, warm-starting from the previous solution on a miss
+    estimator = st.radio("Covariance estimator", list(COVARIANCE_ESTIMATORS), horizontal=True)
+    cov_matrix = model['covariance'][COVARIANCE_ESTIMATORS[estimator]]
+
+    previous_weights = st.session_state.get('optimal_weights')
+    optimal_weights_series = cached(cache_key('min_variance', RISK_MODEL_VERSION, *model_key,
+                                              COVARIANCE_ESTIMATORS[estimator]),
+                                    lambda: optimize_weights(cov_matrix, previous_weights))
+    optimal_weights = optimal_weights_series.to_numpy()
+    st.session_state.optimal_weights = optimal_weights_series
 
     # ------------------- Risk Metrics -------------------
-    # 1. Individual ticker risk (annualized standard deviation in %)
-    ticker_risks = (risk_pivot.std() * np.sqrt(252) * 100).round(2)
-    # 2. Cumulative portfolio risk computed from the weighted portfolio returns using optimal weights
-    weighted_returns = risk_pivot.multiply(optimal_weights_series, axis=1).sum(axis=1)
-    cumulative_risk = (weighted_returns.std() * np.sqrt(252) * 100).round(2)
-    # 3. Benchmark risk (annualized, in %)
-    benchmark_risk = (benchmark_returns.std() * np.sqrt(252) * 100).round(2)
+    stage('risk metrics')
+    # Annualized risk (in %) of each ticker, of the optimal weights and of the benchmark (S&P 500);
+    # missing returns count as flat days in the portfolio's daily returns
+    metrics = risk_metrics(risk_pivot, sample_cov, optimal_weights_series, benchmark_returns, risk_data.interval)
+    ticker_risks = metrics['ticker_risks']
+    weighted_returns = metrics['portfolio_returns']
+    cumulative_risk = metrics['portfolio_risk']
+    benchmark_risk = metrics['benchmark_risk']
 
     st.subheader("Risk Metrics")
     st.write("Individual Ticker Risks (Annualized Standard Deviation in %):")
@@ -85,36 +129,99 @@ def show_risk_analysis_page(ticker_list):
     st.write("Benchmark (S&P 500) Risk (Annualized %):", benchmark_risk)
 
     # ---------------- Performance Comparison ----------------
+    stage('backtest')
+    # Walk-forward backtest: weights are re-solved at every rebalance from past returns only,
+    # held with drift until the next one, and charged transaction costs
     st.subheader("Performance Comparison")
-    # Cumulative returns for the optimal portfolio
-    weighted_portfolio_returns = (weighted_returns + 1).cumprod() - 1
-    portfolio_cumulative = pd.DataFrame({
-        'Date': weighted_portfolio_returns.index, 
-        'Optimal Portfolio': weighted_portfolio_returns.values
-    })
-
-    # Cumulative returns for benchmark
-    benchmark_cumulative = (benchmark_returns + 1).cumprod() - 1
-    benchmark_cumulative = benchmark_cumulative.reset_index()
-    benchmark_cumulative.columns = ['Date', 'Benchmark']
-
-    # Merge and plot
-    combined_returns = pd.merge(portfolio_cumulative, benchmark_cumulative, on='Date', how='outer')
-    combined_returns = combined_returns.melt(id_vars='Date', var_name='Asset', value_name='Cumulative Return')
-    fig = px.line(combined_returns, x='Date', y='Cumulative Return', color='Asset',
-                  title='Cumulative Performance: Optimal Portfolio vs. Benchmark')
-    st.plotly_chart(fig, use_container_width=True)
+    cols = st.columns(3)
+    frequency = cols[0].selectbox("Rebalance", list(FREQUENCIES), index=list(FREQUENCIES).index('monthly'),
+                                  format_func=str.capitalize)
+    lookback = cols[1].select_slider("Covariance window (trading days)", options=BACKTEST_LOOKBACKS, value=252)
+    cost_bps = cols[2].number_input("Transaction cost (bps)", min_value=0.0, value=10.0, step=5.0)
+    perf_cols = st.columns(2)
+    try:
+        result = cached(cache_key('backtest', RISK_MODEL_VERSION, *model_key, frequency, lookback, cost_bps),
+                        lambda: backtest(risk_pivot, benchmark_returns, lookback=lookback, frequency=frequency,
+                                         cost_bps=cost_bps, periods_per_year=risk_data.periods_per_year))
+    except ValueError as e:
+        perf_cols[0].info(f"{e}. Choose an earlier start date or a shorter covariance window.")
+    else:
+        performance = (result['value'] - 1).rename(columns={'Portfolio': 'Optimal Portfolio'})
+        performance = performance.reset_index().melt(id_vars='Date', var_name='Asset', value_name='Cumulative Return')
+        fig = line_chart(performance, x='Date', y='Cumulative Return', color='Asset',
+                      title=f'Backtest: {frequency.capitalize()} Rebalanced Minimum Variance vs. Benchmark')
+        fig.update_yaxes(tickformat=',.0%')
+        perf_cols[0].plotly_chart(fig, use_container_width=True)
+        summary = result['summary'].rename(index={'Portfolio': 'Optimal Portfolio'})
+        summary.columns = ['Annual Return (%)', 'Volatility (%)', 'Sharpe Ratio', 'Max Drawdown (%)']
+        summary[['Annual Return (%)', 'Volatility (%)', 'Max Drawdown (%)']] *= 100
+        perf_cols[0].write(summary.round(2))
+        turnover = np.nan_to_num(result['turnover'].iloc[1:].mean())
+        perf_cols[0].caption(f"{len(result['turnover'])} rebalances, average turnover {turnover:.1%}, "
+                             f"total costs {result['costs'].sum():.2%}")
+
+    stage('efficient frontier')
+    # Efficient frontier from the same mean returns and covariance, cached per tickers and date range
+    mean_returns = risk_pivot.mean()
+    periods = risk_data.periods_per_year
+    if len(mean_returns) >= 2:
+        frontier = cached_efficient_frontier(
+            frontier_key(cov_matrix.columns, start_date, end_date, COVARIANCE_ESTIMATORS[estimator],
+                         risk_data.fingerprint),
+            mean_returns, cov_matrix.to_numpy(), n_points=FRONTIER_POINTS)
+        fig_frontier = px.line(x=frontier['volatility'] * np.sqrt(periods), y=frontier['return'] * periods,
+                               title='Efficient Frontier (Annualized)')
+        fig_frontier.add_trace(go.Scatter(x=np.sqrt(np.diag(cov_matrix)) * np.sqrt(periods), y=mean_returns * periods,
+                                          mode='markers+text', text=list(mean_returns.index),
+                                          textposition='top center', name='Tickers'))
+        fig_frontier.add_trace(go.Scatter(x=[np.sqrt(optimal_weights @ cov_matrix.to_numpy() @ optimal_weights) * np.sqrt(periods)],
+                                          y=[mean_returns @ optimal_weights_series * periods],
+                                          mode='markers', marker=dict(size=12, symbol='star'), name='Optimal Portfolio'))
+        fig_frontier.update_layout(xaxis_title='Volatility', yaxis_title='Return')
+        fig_frontier.update_xaxes(tickformat=',.0%')
+        fig_frontier.update_yaxes(tickformat=',.0%')
+        perf_cols[1].plotly_chart(fig_frontier, use_container_width=True)
+
+    # ---------------- Rolling Risk ----------------
+    stage('rolling risk')
+    st.subheader("Rolling Risk")
+    cols = st.columns(2)
+    window = cols[0].select_slider("Rolling window (trading days)", options=ROLLING_WINDOWS, value=63)
+    var_level = cols[1].radio("VaR confidence level", [0.95, 0.99], format_func=lambda x: f"{x:.0%}", horizontal=True)
+    returns_with_portfolio = risk_pivot.copy()
+    returns_with_portfolio['Optimal Portfolio'] = weighted_returns
+
+    volatility = rolling_volatility(returns_with_portfolio, window, periods)
+    volatility['Benchmark'] = rolling_volatility(benchmark_returns.to_frame('Benchmark'), window, periods)['Benchmark']
+    fig_vol = line_chart(volatility.reset_index().melt(id_vars='Date', var_name='Asset', value_name='Volatility'),
+                         x='Date', y='Volatility', color='Asset', title=f'Rolling {window}-Day Volatility (Annualized)')
+    fig_vol.update_yaxes(tickformat=',.0%')
+    st.plotly_chart(fig_vol, use_container_width=True)
+
+    beta = rolling_beta(returns_with_portfolio, benchmark_returns, window)
+    fig_beta = line_chart(beta.reset_index().melt(id_vars='Date', var_name='Asset', value_name='Beta'),
+                          x='Date', y='Beta', color='Asset', title=f'Rolling {window}-Day Beta vs. S&P 500')
+    fig_beta.add_hline(y=1, line_dash='dash', line_color='white')
+    st.plotly_chart(fig_beta, use_container_width=True)
+
+    if len(risk_pivot.columns) >= 2:
+        pairs = list(combinations(risk_pivot.columns, 2))
+        pair = st.selectbox("Correlation pair", pairs, format_func=lambda p: f"{p[0]} / {p[1]}")
+        correlation = rolling_correlation(risk_pivot, window, pairs=[pair])
+        fig_corr = line_chart(correlation.iloc[:, 0].rename('Correlation').reset_index(), x='Date', y='Correlation',
+                              title=f'Rolling {window}-Day Correlation: {pair[0]} / {pair[1]}')
+        fig_corr.update_layout(xaxis_title=None, yaxis_title=None, showlegend=False)
+        st.plotly_chart(fig_corr, use_container_width=True)
+
+    stage('value at risk')
+    st.write(f"Daily Value at Risk and Expected Shortfall ({var_level:.0%}, loss in %):")
+    st.write((var_table(returns_with_portfolio, var_level) * 100).round(2))
 
     # ---------------- Portfolio Composition Pie Chart ----------------
+    stage('composition')
     st.subheader("Portfolio Composition")
     # Use the latest available price to calculate composition weights
-    latest_date = risk_data['Date'].max()
-    latest_prices = risk_data[risk_data['Date'] == latest_date].groupby('ticker')['price'].last()
-    total_value = latest_prices.sum()
-    composition_df = pd.DataFrame({
-        'Ticker': latest_prices.index,
-        'Allocation (%)': ((latest_prices / total_value) * 100).round(2)
-    })
+    composition_df = composition(risk_data)
     fig_pie = px.pie(composition_df, values='Allocation (%)', names='Ticker',
                      title='Suggested Investment Allocation (Based on Latest Prices)',
                      hover_data={'Allocation (%)':':.2f'})
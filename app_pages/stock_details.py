@@ -1,9 +1,19 @@
 import streamlit as st
-import yfinance as yf
-import plotly.express as px
-import numpy as np
 from datetime import date, datetime
-from stocknews import StockNews
+from concurrent.futures import TimeoutError as FetchTimeout
+from utils.bars import INTERVALS, INTRADAY
+from utils.price_store import get_bars, earliest_start
+from utils.data_loader import load_data
+from utils.fundamentals import get_fundamentals
+from utils.news import get_news_pipeline
+from analytics.stock_details import price_movements, return_statistics
+from utils.charts import line_chart, paginated_table
+from utils.profiling import stage
+
+# Items shown in the News tab, and how long a first visit waits for the feed
+NEWS_ITEMS = 10
+NEWS_WAIT_SECONDS = 20
+INTERVAL_LABELS = {'1m': '1 minute', '5m': '5 minutes', '1h': '1 hour', '1d': 'Daily', '1wk': 'Weekly'}
 
 def show_stock_details_page():
     st.title('Stock Dashboard')
@@ -34,6 +44,8 @@ def show_stock_details_page():
             new_ticker = st.text_input('Enter Ticker', ticker, key="ticker_input")
             new_startdate = st.date_input('Start Date', value=startdate, key="start_date_input")
             new_enddate = st.date_input('End Date', value=enddate, key="end_date_input")
+            interval = st.selectbox('Interval', list(INTERVALS), index=list(INTERVALS).index('1d'),
+                                    format_func=INTERVAL_LABELS.get, key="interval_input")
             submitted = st.form_submit_button("Apply")
 
     # Use new parameters if form was submitted
@@ -55,22 +67,43 @@ def show_stock_details_page():
         st.error("End Date cannot be in the future.")
         st.stop()
 
+    # yfinance only keeps recent intraday bars: refuse ranges entirely before that and shorten the rest
+    earliest = earliest_start(interval)
+    if earliest is not None:
+        earliest = earliest.date()
+        if enddate <= earliest:
+            st.error(f"{interval} bars are only available from {earliest}. Please choose a later date range "
+                     "or a longer interval.")
+            st.stop()
+        if startdate < earliest:
+            st.info(f"{interval} bars are only available from {earliest}; showing {earliest} to {enddate}.")
+            startdate = earliest
+
+    # Company name from the ticker universe snapshot (no network lookup)
+    name = load_data().name(ticker)
+    if name:
+        st.subheader(name)
+
     # --- Download Data with Error Handling ---
+    stage('prices')
     try:
-        data = yf.download(ticker, start=startdate.strftime("%Y-%m-%d"),
-                           end=enddate.strftime("%Y-%m-%d"))
+        data = get_bars(ticker, startdate, enddate, interval)
     except Exception as e:
         st.error(f"Error downloading data for {ticker}: {e}")
         st.stop()
 
     if data.empty:
-        st.error("No data found. Please check the ticker symbol and date range.")
+        if interval in INTRADAY:
+            st.error("No data found. Intraday bars are only available for recent dates (1 minute bars for the "
+                     "last 30 days, 5 minute bars for the last 60 days).")
+        else:
+            st.error("No data found. Please check the ticker symbol and date range.")
         st.stop()
 
     # --- Plotting Stock Prices ---
+    stage('price chart')
     try:
-        fig = px.line(data, x=data.index, y=data['Close'].squeeze(),
-                     title=f"{ticker} Price Chart")
+        fig = line_chart(data.reset_index(), x='Date', y='Close', title=f"{ticker} Price Chart")
         st.plotly_chart(fig)
     except Exception as e:
         st.error(f"Error plotting data: {e}")
@@ -80,40 +113,42 @@ def show_stock_details_page():
 
     # ---------------- Pricing Data Tab ----------------
     with pricingdata:
+        stage('price movements')
         st.header('Price Movements')
-        data2 = data.copy()
-        data2['% Change'] = data2['Close'].pct_change()
-        data2.dropna(inplace=True)
-        st.write(data2)
-
-        annual_returns = data2['% Change'].mean() * 252 * 100
-        st.write('Annual Returns:', f"{annual_returns:.2f} %")
-
-        stdev = np.std(data2['% Change']) * np.sqrt(252)
-        st.write('Standard Deviation:', f"{stdev * 100:.2f} %")
+        data2 = price_movements(data)
+        paginated_table(data2, key='price_movements_page')
 
-        risk_adjusted = annual_returns / (stdev * 100) if stdev != 0 else 0
-        st.write('Risk Adjusted Returns:', f"{risk_adjusted:.2f} %")
+        statistics = return_statistics(data2['% Change'], interval)
+        st.write('Annual Returns:', f"{statistics['annual_return']:.2f} %")
+        st.write('Standard Deviation:', f"{statistics['stdev']:.2f} %")
+        st.write('Risk Adjusted Returns:', f"{statistics['risk_adjusted']:.2f} %")
 
     # ---------------- Fundamental Data Tab ----------------
     with fundamentaldata:
+        stage('fundamentals')
+        # Statements come from the on-disk cache; yfinance is only hit when a new fiscal period is due
+        try:
+            statements = get_fundamentals(ticker)
+        except Exception as e:
+            st.error(f"Error loading fundamental data: {e}")
+            statements = {}
+
         st.subheader('Balance Sheet')
-        ticker_obj = yf.Ticker(ticker)
-        bs = ticker_obj.balance_sheet
+        bs = statements.get('balance_sheet')
         if bs is not None and not bs.empty:
             st.write(bs)
         else:
             st.write("No balance sheet data available.")
 
         st.subheader('Income Statement')
-        inc_stmt = ticker_obj.financials
+        inc_stmt = statements.get('income_statement')
         if inc_stmt is not None and not inc_stmt.empty:
             st.write(inc_stmt)
         else:
             st.write("No income statement data available.")
 
         st.subheader('Cash Flow Statement')
-        cf = ticker_obj.cashflow
+        cf = statements.get('cash_flow')
         if cf is not None and not cf.empty:
             st.write(cf)
         else:
@@ -121,20 +156,31 @@ def show_stock_details_page():
 
     # ---------------- News Tab ----------------
     with news_tab:
+        stage('news')
         st.header(f'News for {ticker}')
         try:
-            sn = StockNews(ticker, save_news=False)
-            df_news = sn.read_rss()
-
-            if not df_news.empty:
-                for i, row in df_news.head(10).iterrows():
-                    st.subheader(f'News {i+1}')
-                    st.write("Published:", row['published'])
-                    st.write("Title:", row['title'])
-                    st.write("Summary:", row['summary'])
-                    st.write(f"Title Sentiment: {row['sentiment_title']}")
-                    st.write(f"News Sentiment: {row['sentiment_summary']}")
-            else:
-                st.write("No news available for this ticker.")
+            # Ingestion runs in the background; only a ticker with nothing stored yet waits for it
+            pipeline = get_news_pipeline()
+            pending = pipeline.request([ticker])
+            df_news = pipeline.store.query(ticker, limit=NEWS_ITEMS)
+            if df_news.empty and pending is not None:
+                with st.spinner("Fetching news..."):
+                    pending.result(timeout=NEWS_WAIT_SECONDS)
+                df_news = pipeline.store.query(ticker, limit=NEWS_ITEMS)
+        except FetchTimeout:
+            df_news = None
+            st.info("News for this ticker is still being fetched. Please refresh shortly.")
         except Exception as e:
-            st.error(f"Error fetching news: {e}")
\ No newline at end of file
+            df_news = None
+            st.error(f"Error fetching news: {e}")
+
+        if df_news is not None and not df_news.empty:
+            for i, row in enumerate(df_news.itertuples(index=False)):
+                st.subheader(f'News {i+1}')
+                st.write("Published:", row.published)
+                st.write("Title:", row.title)
+                st.write("Summary:", row.summary)
+                st.write(f"Title Sentiment: {row.sentiment_title}")
+                st.write(f"News Sentiment: {row.sentiment_summary}")
+        elif df_news is not None:
+            st.write("No news available for this ticker.")
\ No newline at end of file
@@ -1,46 +1,188 @@
+import os
+import json
+import queue
 import sqlite3
-import hashlib
+import threading
+from contextlib import contextmanager
+
+# Database location, overridable with the USERS_DB_PATH environment variable or configure()
+DB_PATH = os.environ.get('USERS_DB_PATH', 'users.db')
+POOL_SIZE = 8
+# Seconds a writer waits for the lock before sqlite3 raises "database is locked"
+BUSY_TIMEOUT = 10
+# Prepared statements kept per connection
+CACHED_STATEMENTS = 64
+
+CREATE_USERS = """
+    CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        name TEXT,
+        password TEXT
+    )
+"""
+# The primary key already indexes username; an earlier version added a second index that only
+# slowed down writes
+DROP_USERNAME_INDEX = "DROP INDEX IF EXISTS idx_users_username"
+SELECT_PASSWORD = "SELECT password FROM users WHERE username = ?"
+INSERT_USER = "INSERT INTO users (username, name, password) VALUES (?, ?, ?)"
+UPDATE_PASSWORD = "UPDATE users SET password = ? WHERE username = ?"
+# Saved portfolios: holdings and amounts are JSON ({"AAPL": 1000.0, ...} for amounts)
+CREATE_PORTFOLIOS = """
+    CREATE TABLE IF NOT EXISTS portfolios (
+        username TEXT NOT NULL,
+        name TEXT NOT NULL,
+        holdings TEXT NOT NULL,
+        start_date TEXT,
+        end_date TEXT,
+        amounts TEXT NOT NULL,
+        goal REAL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (username, name)
+    )
+"""
+UPSERT_PORTFOLIO = """
+    INSERT INTO portfolios (username, name, holdings, start_date, end_date, amounts, goal, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (username, name) DO UPDATE SET
+        holdings = excluded.holdings, start_date = excluded.start_date, end_date = excluded.end_date,
+        amounts = excluded.amounts, goal = excluded.goal, updated_at = excluded.updated_at
+"""
+SELECT_PORTFOLIO = ("SELECT holdings, start_date, end_date, amounts, goal FROM portfolios "
+                    "WHERE username = ? AND name = ?")
+SELECT_PORTFOLIO_NAMES = "SELECT name FROM portfolios WHERE username = ? ORDER BY name"
+
+
+# Per-process pool of SQLite connections in WAL mode, shared by every session's thread.
+# The schema is created the first time a connection is handed out.
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            if not self._schema_ready:
+                with self._lock:
+                    if not self._schema_ready:
+                        create_table(conn)
+                        self._schema_ready = True
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+# Point the app at another database file and/or pool size; closes the current pool
+def configure(path=None, pool_size=None):
+    global _pool, DB_PATH, POOL_SIZE
+    with _pool_lock:
+        if path is not None:
+            DB_PATH = path
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(DB_PATH, POOL_SIZE)
+
 
 # Database Setup
 def create_connection():
-    conn = sqlite3.connect("users.db")
-    return conn
-
-def create_table():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            name TEXT,
-            password TEXT
-        )
-    """)
+    return get_pool().connection()
+
+def create_table(conn):
+    conn.execute(CREATE_USERS)
+    conn.execute(DROP_USERNAME_INDEX)
+    conn.execute(CREATE_PORTFOLIOS)
     conn.commit()
-    conn.close()
 
-# Password Hashing
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+# Stored password hash for a username, or None if there is no such user
+def get_password_hash(username):
+    with create_connection() as conn:
+        row = conn.execute(SELECT_PASSWORD, (username,)).fetchone()
+    return row[0] if row is not None else None
 
-# User Authentication
-def verify_user(username, password):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, password))
-    user = cursor.fetchone()
-    conn.close()
-    return user is not None
+def set_password_hash(username, password):
+    with create_connection() as conn:
+        conn.execute(UPDATE_PASSWORD, (password, username))
 
 # User Creation
 def create_user(username, name, password):
-    conn = create_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO users (username, name, password) VALUES (?, ?, ?)", (username, name, password))
-        conn.commit()
-        conn.close()
+        with create_connection() as conn:
+            conn.execute(INSERT_USER, (username, name, password))
         return True
     except sqlite3.IntegrityError:
-        conn.close()
-        return False  # Username already exists
\ No newline at end of file
+        return False  # Username already exists
+
+# Saved Portfolios
+def save_portfolio(username, name, holdings, start_date, end_date, amounts, goal=None):
+    with create_connection() as conn:
+        conn.execute(UPSERT_PORTFOLIO, (username, name, json.dumps(list(holdings)),
+                                        str(start_date) if start_date else None, str(end_date) if end_date else None,
+                                        json.dumps({k: float(v) for k, v in amounts.items()}), goal))
+
+# {'holdings', 'start_date', 'end_date', 'amounts', 'goal'}, or None if nothing is saved under that name
+def load_portfolio(username, name):
+    with create_connection() as conn:
+        row = conn.execute(SELECT_PORTFOLIO, (username, name)).fetchone()
+    if row is None:
+        return None
+    holdings, start_date, end_date, amounts, goal = row
+    return {'holdings': json.loads(holdings), 'start_date': start_date, 'end_date': end_date,
+            'amounts': json.loads(amounts), 'goal': goal}
+
+def list_portfolios(username):
+    with create_connection() as conn:
+        return [row[0] for row in conn.execute(SELECT_PORTFOLIO_NAMES, (username,))]
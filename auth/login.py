@@ -1,9 +1,7 @@
 import streamlit as st
 import re
-from auth.db import hash_password, verify_user, create_user, create_table
-
-# Ensure the table exists
-create_table()
+from auth.db import create_user
+from auth.passwords import authenticate, get_password_service, OK, LOCKED, BUSY
 
 # Session Management
 def is_user_authenticated():
@@ -16,10 +14,15 @@ def show_login_page():
     username = st.text_input("Username", key="login_username")
     password = st.text_input("Password", type="password", key="login_password")
     if st.button("Login", key="login_button"):
-        hashed_password = hash_password(password)
-        if verify_user(username.lower(), hashed_password):
+        result = authenticate(username.lower(), password, st.context.ip_address)
+        if result == OK:
             st.session_state.authenticated = True
+            st.session_state.username = username.lower()
             st.rerun()
+        elif result == LOCKED:
+            st.error("Too many failed attempts. Please try again in a few minutes.")
+        elif result == BUSY:
+            st.error("The server is busy. Please try again.")
         else:
             st.error("Invalid username or password")
     if st.button("Go to Sign Up", key="go_to_signup"):
@@ -41,7 +44,10 @@ def show_signup_page():
             st.error("Password must contain a mix of alphabets, numbers, and special characters.")
             return
 
-        hashed_password = hash_password(password)
+        hashed_password = get_password_service().hash(password)
+        if hashed_password is None:
+            st.error("The server is busy. Please try again.")
+            return
         if create_user(username.lower(), name, hashed_password):
             st.success("User created successfully. Please log in.")
             st.session_state.show_login = True
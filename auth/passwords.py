@@ -0,0 +1,201 @@
+import os
+import hmac
+import time
+import base64
+import hashlib
+import threading
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from auth import db
+
+# scrypt cost parameters for new hashes; every hash stores its own, so raising them only
+# affects new passwords and logins of users whose hash is upgraded
+SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+# Hashing runs on this many threads (hashlib.scrypt releases the GIL); logins beyond
+# MAX_PENDING waiting hashes are turned away instead of queueing up
+HASH_WORKERS = os.cpu_count() or 1
+MAX_PENDING = 4 * HASH_WORKERS
+# Failed logins allowed per username within the window before it is locked until the window
+# passes, and per client (IP address) across usernames, so one client cannot spray many accounts
+MAX_FAILURES = 5
+MAX_CLIENT_FAILURES = 20
+FAILURE_WINDOW_SECONDS = 5 * 60
+
+# authenticate() results
+OK = 'ok'
+INVALID = 'invalid'
+LOCKED = 'locked'
+BUSY = 'busy'
+
+
+def _b64(data):
+    return base64.b64encode(data).decode()
+
+
+# Stored as scrypt$n$r$p$salt$key (salt and key base64 encoded)
+def hash_password(password, n=None, r=SCRYPT_R, p=SCRYPT_P):
+    n = n or SCRYPT_N
+    salt = os.urandom(SALT_BYTES)
+    key = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=KEY_BYTES)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(key)}"
+
+
+# Unsalted SHA-256 hex digest, the format of hashes created before scrypt
+def legacy_hash(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+# (matches, needs_rehash): needs_rehash is True for legacy hashes and hashes with old parameters
+def verify_password(password, stored):
+    if not stored:
+        return False, False
+    if not stored.startswith('scrypt$'):
+        return hmac.compare_digest(legacy_hash(password), stored), True
+    try:
+        _, n, r, p, salt, key = stored.split('$')
+        n, r, p = int(n), int(r), int(p)
+        salt, key = base64.b64decode(salt), base64.b64decode(key)
+    except ValueError:
+        return False, False
+    candidate = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=len(key))
+    return hmac.compare_digest(candidate, key), (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+# verify_password() at the cost of one scrypt hash whatever is stored: unknown users and legacy
+# SHA-256 rows are also checked against a dummy hash, so timing reveals neither
+def _verify(password, stored):
+    if not stored or not stored.startswith('scrypt$'):
+        verify_password(password, _dummy_hash())
+    return verify_password(password, stored)
+
+
+# Failed attempts per key (a username or a client) in a sliding window. An attempt is reserved in
+# the same locked step as the limit check, so concurrent guesses cannot all get past it; the
+# reservation stays as the failure, or is released when the attempt was not one. Expired keys are
+# purged once per window, so one-off keys do not pile up.
+class RateLimiter:
+    def __init__(self, max_failures=MAX_FAILURES, window=FAILURE_WINDOW_SECONDS):
+        self.max_failures = max_failures
+        self.window = window
+        self._failures = {}
+        self._lock = threading.Lock()
+        self._next_purge = 0
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return 0
+        while failures and now - failures[0] >= self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return 0
+        return len(failures)
+
+    def _purge(self, now):
+        if now < self._next_purge:
+            return
+        for key in list(self._failures):
+            self._recent(key, now)
+        self._next_purge = now + self.window
+
+    # None when the key is locked, else a token for release()
+    def reserve(self, key):
+        with self._lock:
+            now = time.monotonic()
+            self._purge(now)
+            if self._recent(key, now) >= self.max_failures:
+                return None
+            self._failures.setdefault(key, deque()).append(now)
+            return now
+
+    def release(self, key, token):
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is not None and token in failures:
+                failures.remove(token)
+                if not failures:
+                    del self._failures[key]
+
+    def succeeded(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+# Password hashing on a bounded worker pool, so a burst of logins neither runs every hash at
+# once nor holds up other sessions' reruns behind a single lock
+class PasswordService:
+    def __init__(self, workers=HASH_WORKERS, max_pending=MAX_PENDING, limiter=None, client_limiter=None):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.limiter = limiter or RateLimiter()
+        self.client_limiter = client_limiter or RateLimiter(MAX_CLIENT_FAILURES)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            return self._pool.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    # OK, INVALID, LOCKED or BUSY. Legacy and outdated hashes are replaced after a successful login.
+    # client identifies where the attempt comes from (the IP address), if known.
+    def authenticate(self, username, password, client=None):
+        token = self.limiter.reserve(username)
+        if token is None:
+            return LOCKED
+        client_token = None
+        if client is not None:
+            client_token = self.client_limiter.reserve(client)
+            if client_token is None:
+                self.limiter.release(username, token)
+                return LOCKED
+        stored = db.get_password_hash(username)
+        result = self._run(_verify, password, stored)
+        if result is None:
+            self.limiter.release(username, token)
+            if client_token is not None:
+                self.client_limiter.release(client, client_token)
+            return BUSY
+        matches, needs_rehash = result
+        if stored is None or not matches:
+            return INVALID
+        self.limiter.succeeded(username)
+        if client_token is not None:
+            self.client_limiter.release(client, client_token)
+        if needs_rehash:
+            upgraded = self._run(hash_password, password)
+            if upgraded is not None:
+                db.set_password_hash(username, upgraded)
+        return OK
+
+    # Hash for a new account, or None when the pool is saturated
+    def hash(self, password):
+        return self._run(hash_password, password)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    return hash_password('')
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_password_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PasswordService()
+        return _service
+
+
+def authenticate(username, password, client=None):
+    return get_password_service().authenticate(username, password, client)
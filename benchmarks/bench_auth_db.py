@@ -0,0 +1,81 @@
+# Concurrent logins against the users database: a few hundred threads looking up password hashes
+# while new users sign up, with the pooled WAL connections and with a new connection per call as
+# before. Password hashing itself is measured by bench_passwords.py.
+# Run from the repository root: python benchmarks/bench_auth_db.py [threads] [logins per thread]
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import db
+from auth.passwords import legacy_hash
+
+
+# The previous access pattern: one connection per call, default rollback journal
+def naive_verify(path, username, password):
+    conn = sqlite3.connect(path)
+    row = conn.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, password)).fetchone()
+    conn.close()
+    return row is not None
+
+
+def naive_create(path, username, name, password):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("INSERT INTO users (username, name, password) VALUES (?, ?, ?)", (username, name, password))
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        return False
+    finally:
+        conn.close()
+
+
+def run(label, verify, create, n_threads, logins):
+    errors = []
+
+    def session(i):
+        for j in range(logins):
+            try:
+                # One signup for every ten logins keeps writers in the mix
+                if j % 10 == 0:
+                    create(f"new{i}_{j}", "New", legacy_hash("x"))
+                if not verify(f"user{(i + j) % 100}", legacy_hash("secret1!")):
+                    errors.append("rejected")
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        list(pool.map(session, range(n_threads)))
+    elapsed = time.perf_counter() - start
+    total = n_threads * logins
+    print(f"  {label:<22} {total / elapsed:9.0f} logins/s  {elapsed:7.2f} s  errors {len(errors)}")
+
+
+def main(n_threads=300, logins=20):
+    directory = tempfile.mkdtemp()
+    print(f"{n_threads} threads x {logins} logins")
+
+    path = os.path.join(directory, 'pooled.db')
+    db.configure(path)
+    for i in range(100):
+        db.create_user(f"user{i}", "User", legacy_hash("secret1!"))
+    run("pooled, WAL", lambda u, p: db.get_password_hash(u) == p, db.create_user, n_threads, logins)
+
+    path = os.path.join(directory, 'naive.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (username TEXT PRIMARY KEY, name TEXT, password TEXT)")
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?)",
+                     [(f"user{i}", "User", legacy_hash("secret1!")) for i in range(100)])
+    conn.commit()
+    conn.close()
+    run("connection per call", lambda u, p: naive_verify(path, u, p),
+        lambda u, n, p: naive_create(path, u, n, p), n_threads, logins)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:3]])
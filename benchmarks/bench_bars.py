@@ -0,0 +1,66 @@
+# Hourly and 5 minute bars resampled from years of minute bars in the price store: month by month
+# from memory-mapped partitions, against loading every bar into one frame and using
+# DataFrame.resample(). Peak memory only grows, so the chunked read runs first.
+# Run from the repository root: python benchmarks/bench_bars.py [years]
+import os
+import sys
+import resource
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bars import SESSION_OPEN, SESSION_LENGTH
+from utils.price_store import PriceStore, PRICE_FIELDS
+
+AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+# Random-walk minute bars over the regular session of every business day in [start, end)
+class MinuteFetcher:
+    def fetch(self, tickers, start, end, interval='1d'):
+        days = pd.bdate_range(start.normalize(), end - pd.Timedelta(1)).as_unit('ns')
+        minutes = np.arange(SESSION_LENGTH // pd.Timedelta(minutes=1)) * pd.Timedelta(minutes=1).value
+        index = pd.DatetimeIndex((days.asi8[:, None] + SESSION_OPEN.value + minutes).ravel())
+        rng = np.random.default_rng(0)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, len(index))))
+        bars = pd.DataFrame({'Open': close, 'High': close * 1.0005, 'Low': close * 0.9995, 'Close': close,
+                             'Volume': rng.integers(100, 10000, len(index)).astype(float)}, index=index)
+        return {ticker: bars for ticker in tickers}
+
+
+def run(label, read):
+    start = time.perf_counter()
+    bars = read()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  {label:<28} {time.perf_counter() - start:7.2f} s  {len(bars):>9} bars  peak {peak:7.0f} MB")
+    return bars
+
+
+def main(years=10):
+    end = pd.Timestamp('2024-01-01')
+    start = end - pd.DateOffset(years=years)
+    with tempfile.TemporaryDirectory() as root:
+        store = PriceStore(root, MinuteFetcher())
+        began = time.perf_counter()
+        minutes = store.get_bars('SPY', start, end, '1m')
+        print(f"{len(minutes)} minute bars over {years} years, stored in {time.perf_counter() - began:.2f} s")
+        del minutes, store
+
+        results = {}
+        for interval in ('1h', '5m'):
+            store = PriceStore(root, MinuteFetcher())
+            results[interval] = run(f"{interval} price store (by month)", lambda: store.get_bars('SPY', start, end, interval))
+        for interval, rule in (('1h', '1h'), ('5m', '5min')):
+            def full_read():
+                frames = [pd.read_parquet(os.path.join(root, '1m', 'SPY', name))
+                          for name in sorted(os.listdir(os.path.join(root, '1m', 'SPY')))]
+                bars = pd.concat(frames)[PRICE_FIELDS]
+                return bars.resample(rule, offset='30min').agg(AGGREGATION).dropna(subset=['Close'])
+            whole = run(f"{interval} read all + resample()", full_read)
+            assert np.allclose(results[interval].to_numpy(), whole.to_numpy())
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,70 @@
+# Payload sent to the browser for the Portfolio page charts (the All Stocks chart with markers and
+# one small chart per ticker) and the Stock Details price table, with every point / row and
+# downsampled / paginated. Run from the repository root: python benchmarks/bench_charts.py [assets] [years]
+import io
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pyarrow as pa
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.portfolio import performance_chart_data
+from utils.charts import line_chart, small_line_chart, table_page, SMALL_CHART_POINTS
+from utils.downsample import MAX_POINTS
+from utils.price_matrix import PriceMatrix
+
+
+def arrow_bytes(frame):
+    table = pa.Table.from_pandas(frame)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return len(sink.getvalue())
+
+
+def charts(long_data, small_data, chart):
+    figures = [chart(long_data, markers=True)]
+    for ticker, data in small_data.groupby('ticker'):
+        figures.append(chart(data, markers=True, small=True))
+    return sum(len(figure.to_json()) for figure in figures)
+
+
+def run(label, payload):
+    start = time.perf_counter()
+    size = payload()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {size / 1e6:8.2f} MB  {elapsed:7.2f} s")
+    return size
+
+
+def main(n_assets=50, years=10):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2000-01-03', periods=252 * years, name='Date')
+    tickers = [f"T{i:03d}" for i in range(n_assets)]
+    prices = 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, (len(dates), n_assets)), axis=0)
+    matrix = PriceMatrix(dates, tickers, prices)
+    print(f"{n_assets} assets x {years} years")
+
+    print("Portfolio charts")
+    full = performance_chart_data(matrix)
+    before = run("every point", lambda: charts(full, full, lambda data, markers, small=False: px.line(
+        data, x='Date', y='price_pct', color=None if small else 'ticker', markers=markers)))
+    after = run("downsampled", lambda: charts(
+        performance_chart_data(matrix, MAX_POINTS), performance_chart_data(matrix, SMALL_CHART_POINTS),
+        lambda data, markers, small=False: small_line_chart(data, x='Date', y='price_pct', markers=markers) if small
+        else line_chart(data, x='Date', y='price_pct', color='ticker', markers=markers)))
+    print(f"  {before / after:.1f}x smaller")
+
+    print("Price table")
+    table = pd.DataFrame({'Open': prices[:, 0], 'High': prices[:, 0] * 1.01, 'Low': prices[:, 0] * 0.99,
+                          'Close': prices[:, 0], 'Volume': rng.integers(1e5, 1e7, len(dates))}, index=dates)
+    before = run("every row", lambda: arrow_bytes(table))
+    after = run("one page", lambda: arrow_bytes(table_page(table, 1)))
+    print(f"  {before / after:.1f}x smaller")
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:3]])
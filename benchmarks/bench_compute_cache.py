@@ -0,0 +1,54 @@
+# Many sessions asking for the same risk model at once (returns, covariances and minimum variance
+# weights for one selection), through the shared compute cache and computed separately per session.
+# Run from the repository root: python benchmarks/bench_compute_cache.py [sessions] [assets] [years]
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compute_cache import ComputeCache, cache_key
+from utils.covariance import sync_engine
+from utils.optimizer import min_variance_weights
+from utils.price_matrix import PriceMatrix
+
+
+def risk_model(matrix):
+    returns = matrix.returns.dropna(how='all')
+    engine = sync_engine(None, returns)
+    covariance = {name: engine.covariance(name) for name in ('sample', 'ledoit_wolf')}
+    weights = min_variance_weights(covariance['ledoit_wolf'].to_numpy())
+    return {'returns': returns, 'covariance': covariance, 'weights': weights}
+
+
+def run(label, model, n_sessions):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        list(pool.map(lambda _: model(), range(n_sessions)))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed:7.2f} s  {1000 * elapsed / n_sessions:8.1f} ms/session")
+
+
+def main(n_sessions=50, n_assets=100, years=10):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2000-01-03', periods=252 * years)
+    tickers = [f"T{i:03d}" for i in range(n_assets)]
+    prices = 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, (len(dates), n_assets)), axis=0)
+    print(f"{n_sessions} sessions, {n_assets} assets x {years} years")
+
+    # Each session builds its own matrix, as each used to load its own prices
+    run("per session", lambda: risk_model(PriceMatrix(dates, tickers, prices)), n_sessions)
+
+    cache = ComputeCache(disk_dir=None)
+    matrix = PriceMatrix(dates, tickers, prices)
+    key = cache_key('risk_model', 1, tickers, dates[0], dates[-1], matrix.fingerprint)
+    run("shared cache", lambda: cache.get_or_compute(key, lambda: risk_model(matrix)), n_sessions)
+    stats = cache.stats()
+    print(f"  computed {stats['misses']}, waited {stats['waits']}, hits {stats['hits']}, "
+          f"{stats['bytes'] / 1e6:.1f} MB cached")
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:4]])
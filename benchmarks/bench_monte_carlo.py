@@ -0,0 +1,32 @@
+# Monte Carlo goal projection: 10k paths x 5 years for 20 tickers.
+# Run from the repository root: python benchmarks/bench_monte_carlo.py [tickers] [years] [paths]
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from utils.monte_carlo import simulate_goal
+
+
+def main(n_tickers=20, years=5, n_paths=10000):
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range('2015-01-01', periods=2520, name='Date')
+    returns = pd.DataFrame(rng.normal(0.0004, 0.015, (len(dates), n_tickers)), index=dates,
+                           columns=[f"T{i}" for i in range(n_tickers)])
+    amounts = {ticker: 1000 for ticker in returns.columns}
+    goal = 1.5 * sum(amounts.values())
+
+    print(f"{n_tickers} tickers, {years} years, {n_paths} paths")
+    for method in ['bootstrap', 'normal']:
+        for rebalance in [True, False]:
+            start = time.perf_counter()
+            result = simulate_goal(returns, amounts, goal, years=years, n_paths=n_paths, method=method,
+                                   rebalance=rebalance, seed=0)
+            label = f"{method}, {'rebalanced' if rebalance else 'buy and hold'}"
+            print(f"  {label:<26} {time.perf_counter() - start:8.3f} s  P(goal) {result['probability']:.3f}")
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:4]])
@@ -0,0 +1,43 @@
+# Logins per second per core with scrypt hashing: a burst of concurrent logins through the bounded
+# hashing pool, for a few cost settings, next to the legacy unsalted SHA-256.
+# Run from the repository root: python benchmarks/bench_passwords.py [concurrent logins] [workers]
+import os
+import sys
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import db, passwords
+
+
+def main(n_logins=200, workers=None):
+    workers = workers or os.cpu_count() or 1
+    cores = min(workers, os.cpu_count() or 1)
+    db.configure(os.path.join(tempfile.mkdtemp(), 'users.db'))
+    print(f"{n_logins} concurrent logins, {workers} hashing workers, {cores} cores")
+
+    for n in [2 ** 12, 2 ** 14, 2 ** 15]:
+        passwords.SCRYPT_N = n
+        for i in range(20):
+            db.create_user(f"user{n}_{i}", "User", passwords.hash_password("secret1!", n=n))
+        # Pending logins allowed equal to the burst, so none are turned away as busy
+        service = passwords.PasswordService(workers=workers, max_pending=n_logins,
+                                            limiter=passwords.RateLimiter(max_failures=n_logins + 1))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_logins) as pool:
+            results = list(pool.map(lambda i: service.authenticate(f"user{n}_{i % 20}", "secret1!"), range(n_logins)))
+        elapsed = time.perf_counter() - start
+        ok = results.count(passwords.OK)
+        print(f"  scrypt n=2^{n.bit_length() - 1:<3} {ok / elapsed / cores:9.1f} logins/s/core"
+              f"  {1000 * elapsed * cores / n_logins:7.1f} ms/login  ok {ok}/{n_logins}")
+
+    start = time.perf_counter()
+    for _ in range(n_logins):
+        passwords.verify_password("secret1!", passwords.legacy_hash("secret1!"))
+    elapsed = time.perf_counter() - start
+    print(f"  legacy sha256     {n_logins / elapsed:9.1f} logins/s/core (unsalted, not safe)")
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,48 @@
+# Cold start of the app in a fresh interpreter: the login page as app.py now renders it, against
+# the same page with every page module imported up front (as app.py used to, not counting the
+# ticker universe load), and the imports the first rerun after login pays.
+# Run from the repository root: python benchmarks/bench_startup.py [runs]
+import os
+import sys
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'plotly.express', 'scipy', 'yfinance', 'streamlit_option_menu']
+PAGE_MODULES = ['app_pages.portfolio', 'app_pages.stock_details', 'app_pages.calculator',
+                'app_pages.risk_analysis', 'app_pages.news_impact']
+
+RUN_APP = "runpy.run_path('app.py', run_name='__main__')"
+SCENARIOS = {
+    'login page (lazy)': RUN_APP,
+    'login page (eager)': f"[importlib.import_module(m) for m in {PAGE_MODULES!r}]; {RUN_APP}",
+    'first page after login': "import utils.data_loader, app_pages.portfolio",
+}
+CHILD = """
+import sys, time
+start = time.perf_counter()
+import importlib, runpy
+{code}
+print(time.perf_counter() - start)
+print(' '.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run(label, code, runs):
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', CHILD.format(code=code, heavy=HEAVY_MODULES)], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        elapsed, modules = result.stdout.splitlines()[-2:]
+        times.append(float(elapsed))
+    print(f"  {label:<24} {statistics.median(times):6.2f} s  loaded: {modules or '-'}")
+
+
+def main(runs=5):
+    print(f"Median of {runs} fresh interpreters (time from the first import)")
+    for label, code in SCENARIOS.items():
+        run(label, code, runs)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
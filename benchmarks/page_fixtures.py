@@ -0,0 +1,64 @@
+# Offline price data for the page benchmarks (test_pages.py): daily closes of up to MAX_TICKERS
+# tickers and the benchmark. A recording from the price store is used when one exists; recording
+# is a manual step on a machine that can reach Yahoo Finance, after which fixtures/prices.parquet
+# is committed:
+#   python benchmarks/page_fixtures.py AAPL MSFT ... [--start 2015-01-01] [--end 2025-01-01]
+# Without a recording the suite runs on a seeded random walk of the same shape, so it never needs
+# the network.
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCHMARK = '^GSPC'
+MAX_TICKERS = 100
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'prices.parquet')
+
+
+def synthetic_prices(n_tickers=MAX_TICKERS, years=10, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2015-01-02', periods=252 * years, name='Date')
+    market = rng.normal(0.0003, 0.01, len(dates))
+    betas = rng.uniform(0.5, 1.5, n_tickers)
+    returns = market[:, None] * betas + rng.normal(0, 0.012, (len(dates), n_tickers))
+    prices = 100 * np.cumprod(1 + returns, axis=0)
+    # Later listings, as in a real universe
+    listed = rng.integers(0, len(dates) // 3, n_tickers) * (rng.random(n_tickers) < 0.2)
+    prices[np.arange(len(dates))[:, None] < listed] = np.nan
+    frame = pd.DataFrame(prices, index=dates, columns=[f"T{i:03d}" for i in range(n_tickers)])
+    frame[BENCHMARK] = 1000 * np.cumprod(1 + market)
+    return frame
+
+
+# 'recorded' or 'synthetic': which prices load_prices() returns
+def price_source():
+    return 'recorded' if os.path.isfile(FIXTURE_PATH) else 'synthetic'
+
+
+# Wide close prices (Date index, ticker columns, benchmark last)
+def load_prices():
+    if os.path.isfile(FIXTURE_PATH):
+        return pd.read_parquet(FIXTURE_PATH)
+    return synthetic_prices()
+
+
+def record_prices(tickers, start, end, path=FIXTURE_PATH):
+    from utils.price_store import get_prices
+    prices = get_prices(list(tickers)[:MAX_TICKERS] + [BENCHMARK], start, end)
+    prices = prices.dropna(axis=1, how='all')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    prices.to_parquet(path)
+    return prices
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    options = {'--start': '2015-01-01', '--end': '2025-01-01'}
+    for option in options:
+        if option in args:
+            index = args.index(option)
+            options[option] = args[index + 1]
+            args = args[:index] + args[index + 2:]
+    prices = record_prices(args, options['--start'], options['--end'])
+    print(f"{prices.shape[1]} tickers x {len(prices)} days written to {FIXTURE_PATH}")
@@ -0,0 +1,125 @@
+# Page computations timed with pytest-benchmark on offline fixture prices (page_fixtures.py) at
+# several portfolio sizes, without Streamlit or the compute cache, so a slower rerun shows up
+# before deploy. Run from the repository root:
+#   python -m pytest benchmarks/test_pages.py --benchmark-autosave
+#   python -m pytest benchmarks/test_pages.py --benchmark-compare --benchmark-compare-fail=mean:20%
+import os
+import sys
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.calculator import investment_value, goal_reached_date, goal_projection
+from analytics.portfolio import portfolio_summary, performance_chart_data
+from analytics.risk import risk_returns, covariances, optimize_weights, risk_metrics, var_table, composition
+from analytics.stock_details import price_movements, return_statistics
+from page_fixtures import BENCHMARK, load_prices, price_source
+from utils.backtest import backtest
+from utils.charts import line_chart, small_line_chart, SMALL_CHART_POINTS
+from utils.downsample import MAX_POINTS
+from utils.frontier import efficient_frontier
+from utils.price_matrix import PriceMatrix
+from utils.rolling import rolling_volatility, rolling_beta, rolling_correlation
+
+PORTFOLIO_SIZES = [5, 25, 100]
+
+
+# Saved with every result, so runs on recorded and on synthetic prices are not compared by mistake
+@pytest.fixture(autouse=True)
+def prices_source(benchmark):
+    benchmark.extra_info['prices'] = price_source()
+
+
+@pytest.fixture(scope='module')
+def prices():
+    return load_prices()
+
+
+@pytest.fixture(params=PORTFOLIO_SIZES, ids=lambda size: f"{size}_tickers")
+def portfolio(request, prices):
+    tickers = [ticker for ticker in prices.columns if ticker != BENCHMARK][:request.param]
+    if len(tickers) < request.param:
+        pytest.skip(f"The fixture has only {len(tickers)} tickers")
+    return prices[tickers]
+
+
+@pytest.fixture
+def benchmark_returns(prices):
+    return prices[BENCHMARK].pct_change().dropna()
+
+
+def test_price_matrix(benchmark, portfolio):
+    def build():
+        matrix = PriceMatrix.from_frame(portfolio)
+        return matrix.returns, matrix.cumulative
+    benchmark(build)
+
+
+def test_portfolio_page(benchmark, portfolio):
+    matrix = PriceMatrix.from_frame(portfolio)
+
+    def page():
+        summary = portfolio_summary(PriceMatrix.from_frame(portfolio))
+        figure = line_chart(performance_chart_data(matrix, MAX_POINTS), x='Date', y='price_pct', color='ticker',
+                            markers=True)
+        small = performance_chart_data(matrix, SMALL_CHART_POINTS)
+        payload = len(figure.to_json())
+        for ticker, data in small.groupby('ticker'):
+            payload += len(small_line_chart(data, x='Date', y='price_pct', markers=True).to_json())
+        return summary, payload
+    benchmark.pedantic(page, rounds=3, iterations=1)
+
+
+def test_calculator_page(benchmark, portfolio):
+    matrix = PriceMatrix.from_frame(portfolio)
+    amounts = {ticker: 1000.0 for ticker in matrix.tickers}
+    goal = 2000.0 * len(amounts)
+
+    def page():
+        values = investment_value(matrix, amounts)
+        return goal_reached_date(values, goal), goal_projection(matrix, amounts, goal, years=5, n_paths=10000)
+    benchmark.pedantic(page, rounds=3, iterations=1)
+
+
+def test_risk_model(benchmark, portfolio, benchmark_returns):
+    matrix = PriceMatrix.from_frame(portfolio)
+
+    def page():
+        returns = risk_returns(matrix)
+        covariance, _ = covariances(returns)
+        weights = optimize_weights(covariance['ledoit_wolf'])
+        metrics = risk_metrics(returns, covariance['sample'], weights, benchmark_returns, matrix.interval)
+        with_portfolio = returns.assign(**{'Optimal Portfolio': metrics['portfolio_returns']})
+        return var_table(with_portfolio), composition(matrix)
+    benchmark(page)
+
+
+def test_backtest(benchmark, portfolio, benchmark_returns):
+    returns = risk_returns(PriceMatrix.from_frame(portfolio))
+    benchmark.pedantic(lambda: backtest(returns, benchmark_returns, frequency='monthly'), rounds=3, iterations=1)
+
+
+def test_efficient_frontier(benchmark, portfolio):
+    returns = risk_returns(PriceMatrix.from_frame(portfolio))
+    covariance, _ = covariances(returns)
+    benchmark.pedantic(lambda: efficient_frontier(returns.mean(), covariance['ledoit_wolf'].to_numpy(),
+                                                  executor='thread'), rounds=3, iterations=1)
+
+
+def test_rolling_risk(benchmark, portfolio, benchmark_returns):
+    returns = risk_returns(PriceMatrix.from_frame(portfolio))
+
+    def page():
+        return (rolling_volatility(returns, 63), rolling_beta(returns, benchmark_returns, 63),
+                rolling_correlation(returns, 63, pairs=[tuple(returns.columns[:2])]))
+    benchmark(page)
+
+
+def test_stock_details_page(benchmark, prices):
+    bars = prices[[BENCHMARK]].rename(columns={BENCHMARK: 'Close'})
+
+    def page():
+        movements = price_movements(bars)
+        return return_statistics(movements['% Change'])
+    benchmark(page)
@@ -0,0 +1,48 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import batch
+from analytics.batch import read_portfolios, run_batch
+
+
+def test_read_portfolios_adds_up_repeated_tickers(tmp_path):
+    path = tmp_path / 'portfolios.csv'
+    path.write_text("portfolio,ticker,amount\ngrowth,AAPL,500\ngrowth,MSFT,250\ngrowth, AAPL,500\nincome,KO,\n")
+    portfolios = read_portfolios(path, '2023-01-01', '2024-01-01')
+    assert [p['name'] for p in portfolios] == ['growth', 'income']
+    assert portfolios[0]['holdings'] == {'AAPL': 1000.0, 'MSFT': 250.0}
+    assert portfolios[1]['holdings'] == {'KO': 0.0}
+
+
+# Random-walk closes for every ticker but NONE
+def fake_prices(tickers, start, end):
+    dates = pd.bdate_range(start, end - pd.Timedelta(days=1), name='Date')
+    rng = np.random.default_rng(0)
+    walk = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (len(dates), len(tickers))), axis=0))
+    prices = pd.DataFrame(walk, index=dates, columns=tickers)
+    prices[[t for t in tickers if t == 'NONE']] = np.nan
+    return prices
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_run_batch(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(batch, 'get_prices', fake_prices)
+    start, end = pd.Timestamp('2021-01-01'), pd.Timestamp('2024-01-01')
+    portfolios = [
+        {'name': 'growth', 'holdings': {'AAA': 1000.0, 'BBB': 500.0}, 'start': start, 'end': end, 'goal': 3000.0},
+        {'name': 'single', 'holdings': {'CCC': 100.0, 'NONE': 100.0}, 'start': start, 'end': end, 'goal': None},
+        {'name': 'empty', 'holdings': {'NONE': 100.0}, 'start': start, 'end': end, 'goal': None},
+    ]
+    tables = run_batch(portfolios, str(tmp_path), output_format='csv', workers=workers, n_paths=200)
+
+    assert list(tables['summary']['portfolio']) == ['growth', 'single']
+    assert list(tables['summary']['tickers']) == [2, 2]
+    assert tables['summary']['invested'].tolist() == [1500.0, 200.0]
+    assert set(tables['tickers']['ticker']) >= {'AAA', 'BBB', 'CCC'}
+    assert list(tables['errors']['portfolio']) == ['empty']
+    for name in ('summary', 'tickers', 'var', 'errors'):
+        assert os.path.isfile(tmp_path / f"{name}.csv")
@@ -0,0 +1,28 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.event_study import event_study
+
+
+# Daily bars for AAA only
+class FakeStore:
+    def get_bars(self, ticker, start, end):
+        if ticker != 'AAA':
+            return pd.DataFrame()
+        dates = pd.bdate_range(start, end - pd.Timedelta(days=1), name='Date')
+        close = np.linspace(100, 110, len(dates))
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0}, index=dates)
+
+
+def test_news_days_without_prices_are_not_events():
+    summary = pd.DataFrame({'stock': ['AAA', 'AAA', 'ZZZ'], 'check_day': ['2024-03-04', '2024-03-05', '2024-03-04'],
+                            'sentiment_summary_avg': 0.5, 'sentiment_summary_med': 0.5,
+                            'sentiment_title_avg': 0.5, 'sentiment_title_med': 0.5})
+    study = event_study([summary], horizons=(1, 5), store=FakeStore())
+    assert study['events'] == 2
+    assert len(study['sample']) == 2
+
+    assert event_study([summary[summary['stock'] == 'ZZZ']], horizons=(1,), store=FakeStore())['events'] == 0
@@ -0,0 +1,37 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import frontier
+
+
+def inputs():
+    mean_returns = pd.Series([0.0002, 0.0004, 0.0007], index=['AAA', 'BBB', 'CCC'])
+    cov = np.array([[1.0, 0.2, 0.1], [0.2, 2.0, 0.3], [0.1, 0.3, 4.0]]) * 1e-4
+    return mean_returns, cov
+
+
+def test_points_that_do_not_converge_are_dropped(monkeypatch):
+    mean_returns, cov = inputs()
+    solve = frontier.min_variance_for_target
+    calls = []
+
+    def flaky(cov_matrix, mu, target, w0):
+        calls.append(target)
+        return None if len(calls) % 3 == 0 else solve(cov_matrix, mu, target, w0)
+
+    monkeypatch.setattr(frontier, 'min_variance_for_target', flaky)
+    result = frontier.efficient_frontier(mean_returns, cov, n_points=9, executor='serial')
+    assert len(result) == 6
+    assert not result.isna().any().any()
+    assert np.allclose(result[['AAA', 'BBB', 'CCC']].sum(axis=1), 1)
+
+
+def test_process_pool_spawns_its_workers():
+    mean_returns, cov = inputs()
+    result = frontier.efficient_frontier(mean_returns, cov, n_points=6, workers=2, executor='process')
+    assert frontier._pool('process', 2)._mp_context.get_start_method() == 'spawn'
+    assert len(result) == 6
+    assert result['return'].is_monotonic_increasing
@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fundamentals import FundamentalsStore, STATEMENTS
+
+
+def statements(period):
+    frame = pd.DataFrame({pd.Timestamp(period): [1.0]}, index=['Total Assets'])
+    return {name: frame for name in STATEMENTS}
+
+
+# Serves each response in turn; an exception is raised instead of returned
+class ScriptedFetcher:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def __call__(self, ticker):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_empty_fetch_keeps_previous_statements(tmp_path):
+    empty = {name: pd.DataFrame() for name in STATEMENTS}
+    store = FundamentalsStore(str(tmp_path), ScriptedFetcher(statements('2023-12-31'), empty))
+    store.get('AAA')
+    assert store.refresh('AAA', force=True) == 'fetched'
+    for frame in store.get('AAA').values():
+        assert list(frame.columns) == [pd.Timestamp('2023-12-31')]
+
+
+def test_failed_fetch_keeps_previous_statements_and_restamps_them(tmp_path):
+    store = FundamentalsStore(str(tmp_path), ScriptedFetcher(statements('2023-12-31'), OSError('offline')))
+    store.get('AAA')
+    meta_path = os.path.join(str(tmp_path), 'AAA', 'meta.json')
+    with open(meta_path) as f:
+        before = json.load(f)
+
+    assert store.refresh('AAA', force=True) == 'failed'
+    with open(meta_path) as f:
+        after = json.load(f)
+    assert after['periods'] == before['periods']
+    assert after['fetched_at'] > before['fetched_at']
+    assert store.is_fresh(after)
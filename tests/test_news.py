@@ -0,0 +1,47 @@
+import os
+import sys
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.news import NewsStore, NEWS_COLUMNS, SUMMARY_COLUMNS, news_id
+
+
+def scored(ticker, *published):
+    return pd.DataFrame({
+        'id': [news_id(ticker, p) for p in published], 'stock': ticker, 'guid': list(published),
+        'title': 'title', 'summary': 'summary', 'published': pd.to_datetime(list(published)),
+        'sentiment_summary': 0.5, 'sentiment_title': -0.5,
+    })[NEWS_COLUMNS]
+
+
+def test_ingest_rewrites_only_the_touched_partitions(tmp_path):
+    store = NewsStore(str(tmp_path / 'news'), str(tmp_path / 'summary'), legacy_summary_path=None)
+    store.append(pd.concat([scored('AAA', '2024-01-02 10:00'), scored('BBB', '2024-01-02 11:00')]))
+    untouched = os.path.join(store.summary_path, 'stock=BBB.csv')
+    before = os.stat(untouched).st_mtime_ns
+
+    store.append(scored('AAA', '2024-01-03 10:00'))
+    assert os.stat(untouched).st_mtime_ns == before
+    summary = store.read_summary()
+    assert sorted(summary['id']) == ['AAA_2024-01-02', 'AAA_2024-01-03', 'BBB_2024-01-02']
+    assert list(summary.columns) == SUMMARY_COLUMNS
+
+
+def test_iter_summary_combines_partitions_into_bounded_chunks(tmp_path):
+    store = NewsStore(str(tmp_path / 'news'), str(tmp_path / 'summary'), legacy_summary_path=None)
+    days = [f"2024-01-{d:02d} 10:00" for d in range(1, 6)]
+    store.append(pd.concat([scored(ticker, *days) for ticker in ['AAA', 'BBB', 'CCC']]))
+    chunks = list(store.iter_summary(4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 4, 3]
+    assert pd.concat(chunks)['id'].is_unique
+
+
+def test_legacy_summary_is_split_into_partitions(tmp_path):
+    legacy = tmp_path / 'data.csv'
+    old = NewsStore(str(tmp_path / 'news'), str(tmp_path / 'old'), legacy_summary_path=None)
+    old.append(pd.concat([scored('AAA', '2024-01-02 10:00'), scored('BBB', '2024-01-02 11:00')]))
+    old.read_summary().to_csv(legacy, sep=';', index=False)
+
+    store = NewsStore(str(tmp_path / 'news'), str(tmp_path / 'summary'), legacy_summary_path=str(legacy))
+    assert sorted(os.listdir(store.summary_path)) == ['stock=AAA.csv', 'stock=BBB.csv']
+    assert sorted(store.read_summary()['id']) == ['AAA_2024-01-02', 'BBB_2024-01-02']
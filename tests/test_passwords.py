@@ -0,0 +1,62 @@
+import os
+import sys
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import passwords
+from auth.passwords import PasswordService, RateLimiter, legacy_hash, OK, INVALID, LOCKED
+
+
+def service(monkeypatch, hashes):
+    monkeypatch.setattr(passwords.db, 'get_password_hash', hashes.get)
+    monkeypatch.setattr(passwords.db, 'set_password_hash', hashes.__setitem__)
+    return PasswordService(workers=1, limiter=RateLimiter(max_failures=2))
+
+
+def test_failures_lock_the_username_for_every_client(monkeypatch):
+    logins = service(monkeypatch, {'alice': passwords.hash_password('secret1!')})
+    for client in ['10.0.0.1', '10.0.0.2']:
+        assert logins.authenticate('alice', 'wrong', client) == INVALID
+    assert logins.authenticate('alice', 'secret1!', '10.0.0.3') == LOCKED
+
+
+def test_failures_across_usernames_lock_the_client(monkeypatch):
+    logins = service(monkeypatch, {'alice': passwords.hash_password('secret1!')})
+    logins.client_limiter = RateLimiter(max_failures=2)
+    for username in ['bob', 'carol']:
+        assert logins.authenticate(username, 'wrong', '10.0.0.1') == INVALID
+    assert logins.authenticate('alice', 'secret1!', '10.0.0.1') == LOCKED
+    assert logins.authenticate('alice', 'secret1!', '10.0.0.2') == OK
+
+
+def test_concurrent_guesses_cannot_pass_the_limit(monkeypatch):
+    monkeypatch.setattr(passwords.db, 'get_password_hash', {'alice': passwords.hash_password('secret1!')}.get)
+    logins = PasswordService(workers=4, max_pending=8, limiter=RateLimiter(max_failures=2))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: logins.authenticate('alice', 'wrong'), range(8)))
+    assert results.count(INVALID) == 2 and results.count(LOCKED) == 6
+
+
+def test_expired_keys_are_purged(monkeypatch):
+    limiter = RateLimiter(max_failures=2, window=60)
+    now = [1000.0]
+    monkeypatch.setattr(passwords.time, 'monotonic', lambda: now[0])
+    for i in range(100):
+        limiter.reserve(f"client{i}")
+    now[0] += 61
+    limiter.reserve('client')
+    assert list(limiter._failures) == ['client']
+
+
+def test_legacy_hashes_cost_a_scrypt_hash_like_the_others(monkeypatch):
+    hashes = {'alice': passwords.hash_password('secret1!'), 'bob': legacy_hash('secret1!')}
+    logins = service(monkeypatch, hashes)
+    passwords._dummy_hash()
+    calls = []
+    scrypt = hashlib.scrypt
+    monkeypatch.setattr(passwords.hashlib, 'scrypt', lambda *args, **kwargs: calls.append(1) or scrypt(*args, **kwargs))
+    for username in ['alice', 'bob', 'nobody']:
+        calls.clear()
+        assert logins.authenticate(username, 'wrong') == INVALID
+        assert len(calls) == 1
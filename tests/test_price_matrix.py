@@ -0,0 +1,31 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compute_cache import ComputeCache, set_compute_cache, sizeof
+from utils.price_matrix import cached_price_matrix
+from utils.price_store import PriceStore, set_price_store
+
+
+class FakeFetcher:
+    def fetch(self, tickers, start, end, interval='1d'):
+        dates = pd.bdate_range(start, end - pd.Timedelta(days=1))
+        rng = np.random.default_rng(0)
+        return {ticker: pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))},
+                                     index=dates) for ticker in tickers}
+
+
+def test_cached_price_matrix_is_sized_with_its_series(tmp_path):
+    cache = ComputeCache()
+    set_compute_cache(cache)
+    set_price_store(PriceStore(str(tmp_path), FakeFetcher()))
+    try:
+        matrix = cached_price_matrix(['AAA', 'BBB'], '2023-01-01', '2024-01-01')
+        booked = cache.stats()['bytes']
+        matrix.prices, matrix.returns, matrix.cumulative, matrix.summary
+        assert sizeof(matrix) == booked
+    finally:
+        set_compute_cache(None)
+        set_price_store(None)
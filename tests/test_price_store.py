@@ -0,0 +1,126 @@
+import os
+import sys
+import threading
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.price_store import PriceStore, earliest_start, INTRADAY_HISTORY
+
+
+# Business-day bars for whatever range is asked for, recording every call. Like yfinance, no
+# intraday bars are served from before its history window.
+class FakeFetcher:
+    history = INTRADAY_HISTORY
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, tickers, start, end, interval='1d'):
+        self.calls.append((start, end))
+        dates = pd.bdate_range(start, end - pd.Timedelta(days=1))
+        if earliest_start(interval) is not None:
+            dates = dates[dates >= earliest_start(interval)]
+        bars = pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1.0}, index=dates)
+        return {ticker: bars for ticker in tickers}
+
+
+def test_request_past_covered_range_fills_the_hole(tmp_path):
+    fetcher = FakeFetcher()
+    store = PriceStore(str(tmp_path), fetcher)
+    store.get_bars('AAA', '2024-01-01', '2024-03-01')
+    store.get_bars('AAA', '2024-06-01', '2024-08-01')
+    assert fetcher.calls[-1] == (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-08-01'))
+
+    bars = store.get_bars('AAA', '2024-01-01', '2024-08-01')
+    assert bars.index.equals(pd.bdate_range('2024-01-01', '2024-07-31'))
+    assert len(fetcher.calls) == 2
+
+
+def test_request_before_covered_range_fills_the_hole(tmp_path):
+    fetcher = FakeFetcher()
+    store = PriceStore(str(tmp_path), fetcher)
+    store.get_bars('AAA', '2024-06-01', '2024-08-01')
+    store.get_bars('AAA', '2024-01-01', '2024-03-01')
+    assert fetcher.calls[-1] == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-06-01'))
+    assert len(store.get_bars('AAA', '2024-01-01', '2024-08-01')) == len(pd.bdate_range('2024-01-01', '2024-07-31'))
+
+
+def test_intraday_request_past_covered_range_fills_the_hole(tmp_path):
+    fetcher = FakeFetcher()
+    store = PriceStore(str(tmp_path), fetcher)
+    today = pd.Timestamp.today().normalize()
+    store.get_bars('AAA', today - pd.Timedelta(days=30), today - pd.Timedelta(days=20), '1h')
+    store.get_bars('AAA', today - pd.Timedelta(days=10), today - pd.Timedelta(days=5), '1h')
+    assert fetcher.calls[-1] == (today - pd.Timedelta(days=20), today - pd.Timedelta(days=5))
+
+
+def test_intraday_requests_are_clipped_to_yfinance_history(tmp_path):
+    fetcher = FakeFetcher()
+    store = PriceStore(str(tmp_path), fetcher)
+    today = pd.Timestamp.today().normalize()
+    store.get_bars('AAA', '2024-01-01', today, '1m')
+    assert fetcher.calls == [(earliest_start('1m'), today)]
+    assert store.get_bars('AAA', '2024-01-01', '2024-02-01', '1m').empty
+    assert len(fetcher.calls) == 1
+
+
+def test_hourly_bars_before_the_five_minute_history_are_fetched(tmp_path):
+    today = pd.Timestamp.today().normalize()
+    start, end = today - pd.Timedelta(days=300), today - pd.Timedelta(days=200)
+    store = PriceStore(str(tmp_path / 'sequence'), FakeFetcher())
+    store.get_bars('AAA', today - pd.Timedelta(days=400), today, '5m')
+    bars = store.get_bars('AAA', start, end, '1h')
+
+    fresh = PriceStore(str(tmp_path / 'fresh'), FakeFetcher()).get_bars('AAA', start, end, '1h')
+    assert len(bars) == len(fresh) > 0
+
+
+# Holds every fetch until released, counting calls
+class BlockingFetcher(FakeFetcher):
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def fetch(self, tickers, start, end, interval='1d'):
+        self.started.set()
+        assert self.release.wait(10)
+        return super().fetch(tickers, start, end, interval)
+
+
+def test_reads_do_not_wait_on_another_download(tmp_path):
+    fetcher = BlockingFetcher()
+    store = PriceStore(str(tmp_path), fetcher)
+    fetcher.release.set()
+    store.get_bars('AAA', '2024-01-01', '2024-03-01')
+    fetcher.release.clear()
+    fetcher.started.clear()
+
+    slow = threading.Thread(target=store.get_bars, args=('BBB', '2024-01-01', '2024-03-01'))
+    slow.start()
+    assert fetcher.started.wait(10)
+    try:
+        read = []
+        reader = threading.Thread(target=lambda: read.append(store.get_bars('AAA', '2024-01-01', '2024-03-01')))
+        reader.start()
+        reader.join(5)
+        assert [len(bars) for bars in read] == [len(pd.bdate_range('2024-01-01', '2024-02-29'))]
+    finally:
+        fetcher.release.set()
+        slow.join()
+
+
+def test_concurrent_requests_for_a_range_fetch_it_once(tmp_path):
+    fetcher = BlockingFetcher()
+    store = PriceStore(str(tmp_path), fetcher)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_bars('AAA', '2024-01-01', '2024-03-01')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert fetcher.started.wait(10)
+    fetcher.release.set()
+    for thread in threads:
+        thread.join()
+    assert len(fetcher.calls) == 1
+    assert [len(bars) for bars in results] == [len(pd.bdate_range('2024-01-01', '2024-02-29'))] * 4
@@ -0,0 +1,15 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.profiling import span, stage, span_summary, clear_history
+
+
+def test_span_summary_keys_are_span_paths():
+    clear_history()
+    for _ in range(2):
+        with span('rerun'):
+            with span('Portfolio'):
+                stage('prices')
+    assert sorted(span_summary('rerun')) == ['rerun', 'rerun/Portfolio', 'rerun/Portfolio/prices']
+    assert span_summary('rerun')['rerun/Portfolio']['count'] == 2
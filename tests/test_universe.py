@@ -0,0 +1,17 @@
+import os
+import sys
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.universe import TickerUniverse, build_snapshot
+
+
+def test_name_comes_from_the_snapshot(tmp_path):
+    directory = str(tmp_path / 'universe')
+    build_snapshot(directory, pd.DataFrame({'symbol': ['AAPL', 'MSFT', 'XYZ'],
+                                            'name': ['Apple Inc.', 'Microsoft - Corp', None]}))
+    universe = TickerUniverse(directory)
+    assert universe.name('AAPL') == 'Apple Inc.'
+    assert universe.name('MSFT') == 'Microsoft - Corp'
+    assert universe.name('XYZ') == ''
+    assert universe.name('NOPE') == ''
@@ -0,0 +1,190 @@
+import sys
+import numpy as np
+import pandas as pd
+from utils.bars import TRADING_DAYS
+from utils.optimizer import min_variance_weights_batch
+
+# Trading days of history used to estimate the covariance at each rebalance
+LOOKBACK = TRADING_DAYS
+# Rebalance schedules: the last trading day of each pandas period is a rebalance day
+FREQUENCIES = {'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q', 'yearly': 'Y'}
+# Transaction cost charged on the value traded at each rebalance, in basis points
+COST_BPS = 10
+# Rebalances whose covariances are built and solved together; memory grows with BATCH * assets^2
+BATCH = 16
+# Variance given to tickers without enough history, relative to the largest real variance, so the
+# solver leaves them out without changing the problem size
+EXCLUDED_VARIANCE = 1e6
+
+
+# Positions of the rebalance days: the last trading day of every period that has `lookback` returns
+# before it, except the final day (nothing is held after it)
+def rebalance_days(dates, frequency='monthly', lookback=LOOKBACK):
+    periods = pd.DatetimeIndex(dates).to_period(FREQUENCIES[frequency])
+    last = np.flatnonzero(np.r_[periods[1:] != periods[:-1], True])
+    return last[(last >= lookback) & (last < len(dates) - 1)]
+
+
+# Ledoit-Wolf shrinkage of one window's covariance towards mu * I (same target as CovarianceEngine),
+# with the intensity from the zero-filled centred returns and their cross products
+def _shrink(cov, centred, cross):
+    rows = len(centred)
+    biased = cross / rows
+    mu = np.trace(biased) / len(biased)
+    delta = ((biased - mu * np.eye(len(biased))) ** 2).sum()
+    if delta == 0:
+        return cov
+    beta = ((centred * centred).sum(axis=1) ** 2).sum() / rows - (biased ** 2).sum()
+    intensity = np.clip(min(beta / rows, delta) / delta, 0, 1)
+    return (1 - intensity) * cov + intensity * np.mean(np.diag(cov)) * np.eye(len(cov))
+
+
+# Covariance of the `lookback` returns up to and including each end row, pairwise-complete and
+# Ledoit-Wolf shrunk. Tickers with fewer than min_periods returns in a window are not eligible:
+# they get no covariance and a prohibitive variance. Returns covariances (k, n, n) and eligibility (k, n).
+def trailing_covariances(returns, ends, lookback=LOOKBACK, min_periods=None):
+    returns = np.asarray(returns, dtype=np.float64)
+    min_periods = min_periods or lookback // 2
+    n = returns.shape[1]
+    covs = np.zeros((len(ends), n, n))
+    eligible = np.zeros((len(ends), n), dtype=bool)
+    for i, end in enumerate(ends):
+        window = returns[max(end - lookback + 1, 0):end + 1]
+        present = ~np.isnan(window)
+        count = present.sum(axis=0)
+        ok = count >= max(min_periods, 2)
+        eligible[i] = ok
+        if not ok.any():
+            continue
+        idx = np.flatnonzero(ok)
+        present = present[:, idx]
+        mean = np.where(present, window[:, idx], 0).sum(axis=0) / count[idx]
+        centred = np.where(present, window[:, idx] - mean, 0)
+        if present.all():
+            pairs = len(window)
+        else:
+            mask = present.astype(np.float32)
+            pairs = (mask.T @ mask).astype(np.float64)
+        cross = centred.T @ centred
+        cov = cross / np.maximum(pairs - 1, 1)
+        covs[i][np.ix_(idx, idx)] = _shrink(cov, centred, cross)
+        excluded = np.flatnonzero(~ok)
+        covs[i][excluded, excluded] = EXCLUDED_VARIANCE * np.diag(cov).max()
+    return covs, eligible
+
+
+# Minimum variance target weights at every rebalance, solved BATCH rebalances at a time,
+# each batch warm-started from the previous one
+def target_weights(returns, ends, lookback=LOOKBACK, min_periods=None, batch=BATCH):
+    returns = np.asarray(returns, dtype=np.float64)
+    weights = np.zeros((len(ends), returns.shape[1]))
+    previous = None
+    for start in range(0, len(ends), batch):
+        chunk = ends[start:start + batch]
+        covs, eligible = trailing_covariances(returns, chunk, lookback, min_periods)
+        solved = min_variance_weights_batch(covs, w0=previous) * eligible
+        totals = solved.sum(axis=1, keepdims=True)
+        weights[start:start + len(chunk)] = np.where(totals > 0, solved / np.where(totals > 0, totals, 1), 0)
+        previous = weights[start + len(chunk) - 1]
+    return weights
+
+
+# Hold each target from the day after its rebalance to the next rebalance, letting the holdings drift
+# with prices. Trading from the drifted holdings to the new target costs `cost` per unit traded,
+# taken from the first day's return. Missing returns count as flat days; weights that do not sum
+# to one are held in cash. Returns the daily returns from the first holding day, and the turnover.
+def _simulate(returns, ends, weights, cost):
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+    daily = np.zeros(len(returns))
+    turnover = np.zeros(len(ends))
+    holdings = np.zeros(returns.shape[1])
+    for p, end in enumerate(ends):
+        stop = ends[p + 1] if p + 1 < len(ends) else len(returns) - 1
+        w = weights[p]
+        turnover[p] = np.abs(w - holdings).sum()
+        growth = np.cumprod(1 + returns[end + 1:stop + 1], axis=0)
+        value = growth @ w + (1 - w.sum())
+        path = np.r_[1.0, (1 - turnover[p] * cost) * value]
+        daily[end + 1:stop + 1] = path[1:] / path[:-1] - 1
+        holdings = growth[-1] * w / value[-1] if value[-1] > 0 else np.zeros_like(w)
+    return daily[ends[0] + 1:], turnover
+
+
+# Annualized return and volatility, Sharpe ratio (no risk-free rate) and maximum drawdown of each column
+def performance_summary(returns, periods_per_year=TRADING_DAYS):
+    value = (1 + returns.fillna(0)).cumprod()
+    years = len(returns) / periods_per_year
+    volatility = returns.std() * np.sqrt(periods_per_year)
+    return pd.DataFrame({
+        'annual_return': value.iloc[-1] ** (1 / years) - 1,
+        'volatility': volatility,
+        'sharpe': returns.mean() * periods_per_year / volatility.where(volatility > 0),
+        'max_drawdown': (value / value.cummax() - 1).min(),
+    })
+
+
+# Walk-forward backtest of the long-only minimum variance portfolio.
+#
+# returns: wide daily returns (Date index, one column per ticker), e.g. PriceMatrix.returns.
+# On the last trading day of every period (see FREQUENCIES) the weights are re-solved from the
+# `lookback` days up to that close only, so no future data is used, and held from the next day.
+# cost_bps is charged on the value traded, including the initial purchase. benchmark_returns
+# (daily returns of e.g. ^GSPC) is compared over the same days.
+# Returns a dict with 'returns' and 'value' (daily, 'Portfolio' and 'Benchmark' columns),
+# 'weights' (target weights per rebalance day), 'turnover', 'costs' and 'summary'
+# (performance_summary of both columns).
+def backtest(returns, benchmark_returns=None, lookback=LOOKBACK, frequency='monthly', cost_bps=COST_BPS,
+             min_periods=None, batch=BATCH, periods_per_year=TRADING_DAYS):
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown rebalance frequency: {frequency}")
+    returns = returns.sort_index()
+    ends = rebalance_days(returns.index, frequency, lookback)
+    if len(ends) == 0:
+        raise ValueError(f"Not enough history to backtest: {lookback} trading days are needed before the first rebalance")
+
+    values = returns.to_numpy(dtype=np.float64)
+    weights = target_weights(values, ends, lookback, min_periods, batch)
+    daily, turnover = _simulate(values, ends, weights, cost_bps / 10000)
+
+    held = returns.index[ends[0] + 1:]
+    result_returns = pd.DataFrame({'Portfolio': daily}, index=held)
+    if benchmark_returns is not None:
+        result_returns['Benchmark'] = benchmark_returns.reindex(held)
+    result_returns.index.name = 'Date'
+    rebalanced = returns.index[ends]
+    return {
+        'returns': result_returns,
+        'value': (1 + result_returns.fillna(0)).cumprod(),
+        'weights': pd.DataFrame(weights, index=rebalanced, columns=returns.columns),
+        'turnover': pd.Series(turnover, index=rebalanced),
+        'costs': pd.Series(turnover * cost_bps / 10000, index=rebalanced),
+        'summary': performance_summary(result_returns, periods_per_year),
+    }
+
+
+if __name__ == '__main__':
+    # python -m utils.backtest TICKER [TICKER ...] --start YYYY-MM-DD --end YYYY-MM-DD
+    #     [--frequency monthly] [--lookback 252] [--cost-bps 10] [--output returns.csv]
+    from utils.price_matrix import load_price_matrix
+    from utils.price_store import get_prices
+
+    args = sys.argv[1:]
+    options = {'--start': None, '--end': None, '--frequency': 'monthly', '--lookback': LOOKBACK,
+               '--cost-bps': COST_BPS, '--output': None}
+    for name in options:
+        if name in args:
+            index = args.index(name)
+            options[name] = args[index + 1]
+            args = args[:index] + args[index + 2:]
+    end = options['--end'] or pd.Timestamp.today().normalize()
+    start = options['--start'] or pd.Timestamp(end) - pd.DateOffset(years=10)
+    matrix = load_price_matrix(args, start, end)
+    benchmark = get_prices(['^GSPC'], start, end)['^GSPC'].pct_change()
+    result = backtest(matrix.returns, benchmark, lookback=int(options['--lookback']),
+                      frequency=options['--frequency'], cost_bps=float(options['--cost-bps']))
+    print(result['summary'].round(4).to_string())
+    turnover = np.nan_to_num(result['turnover'].iloc[1:].mean())
+    print(f"Rebalances: {len(result['turnover'])}, average turnover {turnover:.1%}, "
+          f"total costs {result['costs'].sum():.2%}")
+    if options['--output']:
+        result['returns'].join(result['value'], rsuffix='_value').to_csv(options['--output'])
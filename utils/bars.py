@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Bar intervals supported by the price store (yfinance names), from finest to coarsest, with the
+# length of one bar
+INTERVALS = {
+    '1m': pd.Timedelta(minutes=1),
+    '5m': pd.Timedelta(minutes=5),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1),
+    '1wk': pd.Timedelta(weeks=1),
+}
+INTRADAY = ('1m', '5m', '1h')
+# Trading days per year and the regular session (exchange time) used to annualize and to align
+# intraday bars: hourly bars start at the open (9:30, 10:30, ...) as yfinance's do
+TRADING_DAYS = 252
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_LENGTH = pd.Timedelta(hours=6, minutes=30)
+WEEKS_PER_YEAR = 52
+
+_DAY = pd.Timedelta(days=1).value
+
+
+def check_interval(interval):
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval: {interval} (expected one of {', '.join(INTERVALS)})")
+    return interval
+
+
+# Bars per year at an interval, to annualize per-bar returns and volatilities: 252 trading days of
+# a 6.5 hour session (the last hourly bar of a day is a half hour)
+def periods_per_year(interval='1d'):
+    check_interval(interval)
+    if interval == '1wk':
+        return WEEKS_PER_YEAR
+    if interval == '1d':
+        return TRADING_DAYS
+    return TRADING_DAYS * -(-SESSION_LENGTH // INTERVALS[interval])
+
+
+# Intervals a bar interval can be resampled from, finest first. Daily bars are adjusted for
+# splits and dividends and intraday bars are not, so daily and weekly bars never come from
+# intraday ones.
+def source_intervals(interval):
+    check_interval(interval)
+    family = INTRADAY if interval in INTRADAY else ('1d', '1wk')
+    return [source for source in family if INTERVALS[source] < INTERVALS[interval]]
+
+
+# Start of the bar each timestamp falls in (int64 nanoseconds): intraday bars are aligned to the
+# session open, daily bars to midnight and weekly bars to Monday
+def bar_starts(index, interval):
+    check_interval(interval)
+    ns = pd.DatetimeIndex(index).as_unit('ns').asi8
+    days = ns // _DAY
+    if interval == '1wk':
+        # 1970-01-01 was a Thursday
+        return ((days + 3) // 7 * 7 - 3) * _DAY
+    if interval == '1d':
+        return days * _DAY
+    step, opening = INTERVALS[interval].value, SESSION_OPEN.value
+    return days * _DAY + opening + (ns - days * _DAY - opening) // step * step
+
+
+# OHLCV bars (sorted DatetimeIndex, Open/High/Low/Close/Volume columns) aggregated to a coarser
+# interval in one pass: first open, highest high, lowest low, last close and total volume of each
+# bar, labelled with the bar's start. Bars with no values are dropped first.
+def resample_bars(bars, interval):
+    bars = bars.dropna(how='all')
+    if bars.empty:
+        return bars.copy()
+    starts = bar_starts(bars.index, interval)
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:], len(starts)] - 1
+    columns = {}
+    with np.errstate(invalid='ignore'):
+        for field in bars.columns:
+            values = bars[field].to_numpy(dtype=np.float64)
+            if field == 'Open':
+                columns[field] = values[first]
+            elif field == 'High':
+                columns[field] = np.fmax.reduceat(values, first)
+            elif field == 'Low':
+                columns[field] = np.fmin.reduceat(values, first)
+            elif field == 'Volume':
+                columns[field] = np.add.reduceat(np.nan_to_num(values), first)
+            else:
+                columns[field] = values[last]
+    index = pd.DatetimeIndex(starts[first].astype('datetime64[ns]'), name=bars.index.name)
+    return pd.DataFrame(columns, index=index, columns=bars.columns)
@@ -0,0 +1,65 @@
+import math
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+from utils.downsample import downsample_long, MAX_POINTS
+
+# Markers are drawn only when every series has at most this many points
+MARKER_THRESHOLD = 250
+# Above this many points in a chart, lines are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 5000
+# Points kept per series in the small per-ticker charts
+SMALL_CHART_POINTS = 400
+# Rows shown per page of a large table
+PAGE_ROWS = 100
+
+
+# Downsample a long frame to at most max_points per series (unless it is already small enough)
+def _reduce(frame, x, y, color, max_points, method):
+    longest = frame.groupby(color).size().max() if color is not None and len(frame) else len(frame)
+    if longest > max_points:
+        frame = downsample_long(frame, x, y, color, max_points, method)
+        longest = frame.groupby(color).size().max() if color is not None and len(frame) else len(frame)
+    return frame, longest
+
+
+# px.line over a long frame with every series downsampled to max_points by LTTB ('lttb') or min/max
+# bucketing ('minmax'), markers dropped above MARKER_THRESHOLD points per series and WebGL lines
+# above WEBGL_THRESHOLD points in total.
+def line_chart(frame, x, y, color=None, max_points=MAX_POINTS, method='lttb', markers=False, **kwargs):
+    frame, longest = _reduce(frame, x, y, color, max_points, method)
+    return px.line(frame, x=x, y=y, color=color, markers=markers and longest <= MARKER_THRESHOLD,
+                   render_mode='webgl' if len(frame) > WEBGL_THRESHOLD else 'svg', **kwargs)
+
+
+# Single-series line chart for pages that draw one per ticker, built from one go.Scatter trace:
+# px.line's setup costs far more than the points themselves at this size. Downsampled and with
+# markers as in line_chart().
+def small_line_chart(frame, x, y, max_points=SMALL_CHART_POINTS, method='lttb', markers=False):
+    frame, longest = _reduce(frame, x, y, None, max_points, method)
+    trace = go.Scattergl if len(frame) > WEBGL_THRESHOLD else go.Scatter
+    mode = 'lines+markers' if markers and longest <= MARKER_THRESHOLD else 'lines'
+    return go.Figure(trace(x=frame[x].to_numpy(), y=frame[y].to_numpy(), mode=mode, showlegend=False),
+                     layout={'margin': {'t': 30}})
+
+
+# Same for px.area (Plotly has no WebGL area traces, so only the downsampling applies)
+def area_chart(frame, x, y, color=None, max_points=MAX_POINTS, method='lttb', **kwargs):
+    frame, _ = _reduce(frame, x, y, color, max_points, method)
+    return px.area(frame, x=x, y=y, color=color, **kwargs)
+
+
+# One page of a frame's rows (pages count from 1)
+def table_page(frame, page, page_rows=PAGE_ROWS):
+    return frame.iloc[(page - 1) * page_rows:page * page_rows]
+
+
+# st.dataframe that sends one page of rows at a time, with a page selector when there is more than one
+def paginated_table(frame, key, page_rows=PAGE_ROWS, container=None):
+    container = container or st
+    pages = max(math.ceil(len(frame) / page_rows), 1)
+    page = 1
+    if pages > 1:
+        page = container.number_input(f"Page (of {pages}, {page_rows} rows each)", min_value=1, max_value=pages,
+                                      value=1, step=1, key=key)
+    container.dataframe(table_page(frame, page, page_rows))
@@ -0,0 +1,185 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+
+# Memory budget for cached results, in bytes
+MAX_BYTES = int(os.environ.get('COMPUTE_CACHE_BYTES', 512 * 1024 * 1024))
+# Optional disk tier: results are also pickled here and survive restarts. Off unless set.
+DISK_DIR = os.environ.get('COMPUTE_CACHE_DIR')
+DISK_MAX_BYTES = int(os.environ.get('COMPUTE_CACHE_DISK_BYTES', 2 * 1024 * 1024 * 1024))
+
+
+# Content hash of a computation's name and version and everything its result depends on.
+# Bump the version when a computation changes, so results of the old code are not reused.
+def cache_key(name, version, tickers, start_date, end_date, *extra):
+    raw = repr((name, version, tuple(tickers), str(start_date), str(end_date)) + extra)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# Approximate memory held by a cached value
+def sizeof(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + sizeof(vars(value))
+    return sys.getsizeof(value)
+
+
+# Process-wide LRU cache of computed results with a byte budget, shared by every session.
+# Concurrent requests for a key that is being computed wait for that computation instead of
+# starting their own. Cached values are shared, so callers must not modify them.
+class ComputeCache:
+    def __init__(self, max_bytes=MAX_BYTES, disk_dir=DISK_DIR, disk_max_bytes=DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'disk_hits': 0, 'evictions': 0, 'errors': 0}
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.pkl')
+
+    def _read_disk(self, key, ttl):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if ttl is not None and time.time() - os.path.getmtime(path) >= ttl:
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp = self._disk_path(key) + f".{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._disk_path(key))
+            self._prune_disk()
+        except (OSError, pickle.PickleError, TypeError, AttributeError):
+            pass
+
+    # Remove the least recently written files once the disk tier is over budget
+    def _prune_disk(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pkl'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            os.remove(os.path.join(self.disk_dir, name))
+            total -= size
+
+    def _store(self, key, value, size, expires):
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size, expires)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._stats['evictions'] += 1
+
+    # Cached value for key, or compute() it. ttl (seconds) limits how long a result is reused;
+    # refresh=True recomputes and replaces it.
+    def get_or_compute(self, key, compute, ttl=None, refresh=False):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh and (entry[2] is None or entry[2] > time.time()):
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0]
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+                self._stats['misses'] += 1
+            else:
+                self._stats['waits'] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = None if refresh else self._read_disk(key, ttl)
+            if value is not None:
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+            else:
+                value = compute()
+                self._write_disk(key, value)
+        except BaseException as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+        size = sizeof(value)
+        with self._lock:
+            self._store(key, value, size, None if ttl is None else time.time() + ttl)
+            del self._pending[key]
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+        # Lookups answered without computing: memory hits, waits on another caller and disk hits
+        lookups = stats['hits'] + stats['misses'] + stats['waits']
+        served = stats['hits'] + stats['waits'] + stats['disk_hits']
+        stats['hit_rate'] = served / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_compute_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ComputeCache()
+        return _cache
+
+
+def set_compute_cache(cache):
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def cached(key, compute, ttl=None, refresh=False):
+    return get_compute_cache().get_or_compute(key, compute, ttl=ttl, refresh=refresh)
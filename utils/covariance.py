@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+# Streaming covariance over daily returns with pairwise-complete handling: a pair (i, j) uses
+# every row where both tickers have a return, instead of dropping rows where any ticker is missing.
+#
+# Per pair it keeps the observation count, the means and the co-moment, updated Welford-style
+# (blocks of rows are merged with Chan's parallel update), so appending new days costs
+# O(days * n^2) rather than a full recompute. Raw power sums are kept alongside for the
+# Ledoit-Wolf shrinkage intensity.
+class CovarianceEngine:
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        n = len(self.tickers)
+        self.count = np.zeros((n, n))
+        # mean[i, j] is the mean of ticker i over the rows where i and j are both present
+        self.mean = np.zeros((n, n))
+        self.comoment = np.zeros((n, n))
+        self._power_sums = {key: np.zeros((n, n)) for key in ('20', '11', '21', '22')}
+        self.first_date = None
+        self.last_date = None
+
+    # Add the rows of a returns frame (Date index) dated after the last row already seen
+    def update(self, returns):
+        returns = returns.reindex(columns=self.tickers)
+        if self.last_date is not None:
+            returns = returns[returns.index > self.last_date]
+        returns = returns.dropna(how='all')
+        if returns.empty:
+            return self
+        self._merge(returns.to_numpy(dtype=np.float64))
+        if self.first_date is None:
+            self.first_date = returns.index[0]
+        self.last_date = returns.index[-1]
+        return self
+
+    def _merge(self, block):
+        present = ~np.isnan(block)
+        mask = present.astype(np.float64)
+        # Shift by the column means so the block co-moment is computed on small numbers
+        shift = np.nansum(block, axis=0) / np.maximum(present.sum(axis=0), 1)
+        centered = np.where(present, block - shift, 0)
+
+        count_b = mask.T @ mask
+        sums_b = centered.T @ mask
+        safe_count = np.where(count_b > 0, count_b, 1)
+        mean_b = sums_b / safe_count + shift[:, None]
+        comoment_b = centered.T @ centered - sums_b * sums_b.T / safe_count
+
+        count_a = self.count
+        total = count_a + count_b
+        safe_total = np.where(total > 0, total, 1)
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * count_b / safe_total
+        self.comoment = self.comoment + comoment_b + delta * delta.T * count_a * count_b / safe_total
+        self.count = total
+
+        raw = np.where(present, block, 0)
+        squared = raw * raw
+        self._power_sums['20'] += squared.T @ mask
+        self._power_sums['11'] += raw.T @ raw
+        self._power_sums['21'] += squared.T @ raw
+        self._power_sums['22'] += squared.T @ squared
+
+    def _sample(self, ddof=1):
+        denominator = self.count - ddof
+        cov = np.where(denominator > 0, self.comoment / np.where(denominator > 0, denominator, 1), 0.0)
+        # Tickers with fewer than two returns have no variance; pairs that never overlap count as uncorrelated
+        np.fill_diagonal(cov, np.where(np.diag(denominator) > 0, np.diag(cov), np.nan))
+        return cov
+
+    # Ledoit-Wolf shrinkage intensity towards mu * I (as in Ledoit & Wolf 2004 / sklearn),
+    # with per-pair observation counts
+    def shrinkage(self):
+        cov = self._sample(ddof=0)
+        diag = np.diag(cov)
+        if np.isnan(diag).any():
+            return 0.0
+        mu = diag.mean()
+        delta = ((cov - mu * np.eye(len(cov))) ** 2).sum()
+        if delta == 0:
+            return 0.0
+
+        s = self._power_sums
+        n = self.count
+        a, b = self.mean, self.mean.T
+        # sum over rows of (x_i - a)^2 (x_j - b)^2, expanded into raw power sums
+        fourth = (s['22'] - 2 * b * s['21'] + b * b * s['20'] - 2 * a * s['21'].T + 4 * a * b * s['11']
+                  + a * a * s['20'].T - 3 * n * a * a * b * b)
+        safe_n = np.where(n > 0, n, 1)
+        pi = np.where(n > 0, fourth / safe_n - cov ** 2, 0)
+        beta = (pi / safe_n).sum()
+        return float(np.clip(min(beta, delta) / delta, 0, 1))
+
+    # Covariance matrix as a DataFrame: 'sample' (pairwise-complete) or 'ledoit_wolf'
+    def covariance(self, method='sample'):
+        cov = self._sample()
+        if method == 'ledoit_wolf':
+            intensity = self.shrinkage()
+            mu = np.nanmean(np.diag(cov))
+            cov = (1 - intensity) * cov + intensity * mu * np.eye(len(cov))
+        elif method != 'sample':
+            raise ValueError(f"Unknown covariance method: {method}")
+        return pd.DataFrame(cov, index=self.tickers, columns=self.tickers)
+
+
+# Bring an engine up to date with a returns frame: new trailing days are appended incrementally;
+# a different ticker set, start date or a shorter history starts a new engine.
+def sync_engine(engine, returns):
+    returns = returns.dropna(how='all')
+    if (engine is None or engine.tickers != list(returns.columns) or returns.empty
+            or (engine.first_date is not None and engine.first_date != returns.index[0])
+            or (engine.last_date is not None and engine.last_date > returns.index[-1])):
+        engine = CovarianceEngine(returns.columns)
+    return engine.update(returns)
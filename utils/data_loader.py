@@ -1,16 +1,18 @@
-import pandas as pd
 import streamlit as st
-import financedatabase as fd
 from urllib.parse import urlencode
+from utils.universe import load_universe
 
-# Load ticker list data
-@st.cache_data
+# Load ticker universe (memory-mapped snapshot, built from financedatabase on first use)
+@st.cache_resource
 def load_data():
-    ticker_list = pd.concat([fd.ETFs().select().reset_index()[['symbol', 'name']],
-                            fd.Equities().select().reset_index()[['symbol', 'name']]])
-    ticker_list = ticker_list[ticker_list.symbol.notna()]
-    ticker_list['symbol_name'] = ticker_list['symbol'] + ' - ' + ticker_list['name']
-    return ticker_list
+    return load_universe()
+
+# Number of search matches offered by the ticker pickers
+SEARCH_LIMIT = 50
+
+# Ticker picker options: current selection plus the top matches for the search text
+def ticker_options(ticker_list, query, selected):
+    return list(dict.fromkeys(list(selected) + ticker_list.search(query, limit=SEARCH_LIMIT)))
 
 # Function to create query parameters for navigation
 def create_query_params(ticker, start_date, end_date):
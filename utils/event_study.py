@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+from utils.price_store import get_price_store
+from utils.news import UNCHECKED
+
+# Forward return horizons in trading days; horizon 1 is the return of the check day itself
+HORIZONS = (1, 5, 21)
+SENTIMENT_COLUMNS = ['sentiment_summary_avg', 'sentiment_summary_med', 'sentiment_title_avg', 'sentiment_title_med']
+# Summary rows processed at a time
+CHUNK_ROWS = 200_000
+# VADER's usual cut-offs for negative / neutral / positive
+SENTIMENT_BUCKETS = [-np.inf, -0.05, 0.05, np.inf]
+SENTIMENT_LABELS = ['negative', 'neutral', 'positive']
+
+
+def _bars(tickers, start, end, store):
+    frames = []
+    for ticker in tickers:
+        bars = store.get_bars(ticker, start, end)
+        if not bars.empty:
+            frames.append(bars.reset_index().assign(stock=ticker))
+    if not frames:
+        return None
+    # Bars laid out ticker by ticker, so the next trading days of a ticker are the next rows
+    bars = pd.concat(frames, ignore_index=True)
+    bars['row'] = np.arange(len(bars))
+    bars['first'] = bars.groupby('stock')['row'].transform('min')
+    bars['last'] = bars.groupby('stock')['row'].transform('max')
+    return bars
+
+
+# Join events (stock, check_day) to the first trading day on or after check_day and add that
+# day's OHLCV plus forward returns, 'return_<h>d' = close h-1 days after the trading day over the
+# close before it
+def join_prices(events, horizons=HORIZONS, store=None):
+    store = store or get_price_store()
+    events = events.reset_index(drop=True)
+    check_day = pd.to_datetime(events['check_day'])
+    joined = events.assign(trade_day=pd.NaT, **{f"return_{h}d": np.nan for h in horizons})
+    for column in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        joined[column] = np.nan
+    if events.empty:
+        return joined
+
+    # Enough calendar days for the longest horizon, plus the close before the first event
+    start = check_day.min() - pd.Timedelta(days=10)
+    end = check_day.max() + pd.Timedelta(days=int(max(horizons) * 1.6) + 10)
+    bars = _bars(events['stock'].unique(), start, end, store)
+    if bars is None:
+        return joined
+
+    left = pd.DataFrame({'stock': events['stock'].to_numpy(), 'check_day': check_day.to_numpy(),
+                         'position': np.arange(len(events))}).sort_values('check_day')
+    matched = pd.merge_asof(left, bars.sort_values('Date'), left_on='check_day', right_on='Date', by='stock',
+                            direction='forward').sort_values('position')
+    found = matched['row'].notna().to_numpy()
+    row = matched['row'].fillna(0).to_numpy(dtype=np.int64)
+    first = matched['first'].fillna(0).to_numpy(dtype=np.int64)
+    last = matched['last'].fillna(-1).to_numpy(dtype=np.int64)
+
+    joined['trade_day'] = matched['Date'].to_numpy()
+    for column in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        joined[column] = matched[column].to_numpy()
+    close = bars['Close'].to_numpy()
+    previous = np.where(found & (row > first), close[np.maximum(row - 1, 0)], np.nan)
+    for h in horizons:
+        ahead = row + h - 1
+        valid = found & (ahead <= last)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            joined[f"return_{h}d"] = np.where(valid, close[np.minimum(ahead, len(close) - 1)] / previous - 1, np.nan)
+    return joined
+
+
+# Pearson correlation between every x column and every y column, accumulated chunk by chunk
+# over the rows where both values are present
+class CorrelationAccumulator:
+    def __init__(self, x_columns, y_columns):
+        self.x_columns = list(x_columns)
+        self.y_columns = list(y_columns)
+        shape = (len(self.x_columns), len(self.y_columns))
+        self.n, self.sx, self.sy = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        self.sxx, self.syy, self.sxy = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+
+    def update(self, frame):
+        x = frame[self.x_columns].to_numpy(dtype=np.float64)
+        y = frame[self.y_columns].to_numpy(dtype=np.float64)
+        mx, my = (~np.isnan(x)).astype(np.float64), (~np.isnan(y)).astype(np.float64)
+        x, y = np.nan_to_num(x), np.nan_to_num(y)
+        # Each sum only counts rows where the pair's other value is present too
+        self.n += mx.T @ my
+        self.sx += x.T @ my
+        self.sy += mx.T @ y
+        self.sxx += (x * x).T @ my
+        self.syy += mx.T @ (y * y)
+        self.sxy += x.T @ y
+
+    def correlation(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self.sxy - self.sx * self.sy / self.n
+            var_x = self.sxx - self.sx * self.sx / self.n
+            var_y = self.syy - self.sy * self.sy / self.n
+            corr = np.where((self.n > 2) & (var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.x_columns, columns=self.y_columns)
+
+    def counts(self):
+        return pd.DataFrame(self.n.astype(np.int64), index=self.x_columns, columns=self.y_columns)
+
+
+# Sentiment/return event study over summary chunks (frames in the data.csv schema).
+# Only running sums are kept between chunks, so memory depends on chunk size, not on the number
+# of news rows. Returns the correlation and observation count of every sentiment column with
+# every horizon, the number of news days with a forward return (events), the mean forward return
+# per sentiment bucket of bucket_column, and up to sample_rows joined events for plotting.
+def event_study(chunks, horizons=HORIZONS, sentiment_columns=SENTIMENT_COLUMNS, bucket_column='sentiment_summary_avg',
+                tickers=None, store=None, sample_rows=5000):
+    return_columns = [f"return_{h}d" for h in horizons]
+    correlations = CorrelationAccumulator(sentiment_columns, return_columns)
+    bucket_sums = pd.DataFrame(0.0, index=SENTIMENT_LABELS, columns=return_columns)
+    bucket_counts = pd.DataFrame(0, index=SENTIMENT_LABELS, columns=return_columns)
+    samples, sampled, events = [], 0, 0
+
+    for chunk in chunks:
+        if tickers is not None:
+            chunk = chunk[chunk['stock'].isin(tickers)]
+        if chunk.empty:
+            continue
+        joined = join_prices(chunk, horizons, store)
+        # News days with no trading day (or not enough bars) after them are not events
+        joined = joined[joined[return_columns].notna().any(axis=1)]
+        if joined.empty:
+            continue
+        events += len(joined)
+        correlations.update(joined)
+        buckets = pd.cut(joined[bucket_column], SENTIMENT_BUCKETS, labels=SENTIMENT_LABELS)
+        grouped = joined.groupby(buckets, observed=False)[return_columns]
+        bucket_sums += grouped.sum().reindex(SENTIMENT_LABELS).fillna(0).to_numpy()
+        bucket_counts += grouped.count().reindex(SENTIMENT_LABELS).fillna(0).to_numpy()
+        if sampled < sample_rows:
+            samples.append(joined.head(sample_rows - sampled))
+            sampled += len(samples[-1])
+
+    return {
+        'events': events,
+        'correlations': correlations.correlation(),
+        'counts': correlations.counts(),
+        'bucket_returns': bucket_sums / bucket_counts.replace(0, np.nan),
+        'bucket_counts': bucket_counts,
+        'sample': pd.concat(samples, ignore_index=True) if samples else pd.DataFrame(),
+    }
+
+
+# Fill open/close/high/low/volume/change of UNCHECKED summary rows whose check day has passed.
+# change is 'win' when the day closed above its open and 'loss' otherwise, as in stocknews.
+def fill_check_days(news_store, store=None, chunk_rows=CHUNK_ROWS):
+    today = pd.Timestamp.today().normalize()
+    filled = 0
+    # Rewriting the CSV is the expensive part, so skip it when no row is due
+    due = any(((chunk['change'] == UNCHECKED) & (pd.to_datetime(chunk['check_day']) < today)).any()
+              for chunk in news_store.iter_summary(chunk_rows, usecols=['check_day', 'change']))
+    if not due:
+        return 0
+
+    def fill(chunk):
+        nonlocal filled
+        pending = (chunk['change'] == UNCHECKED) & (pd.to_datetime(chunk['check_day']) < today)
+        if not pending.any():
+            return chunk
+        joined = join_prices(chunk[pending], horizons=(1,), store=store)
+        # A check day that was a holiday takes the next trading day's bar
+        traded = joined['trade_day'].notna().to_numpy()
+        rows = chunk.index[pending][traded]
+        joined = joined[traded]
+        for column in ['open', 'close', 'high', 'low', 'volume']:
+            chunk[column] = chunk[column].astype(np.float64)
+            chunk.loc[rows, column] = joined[column.capitalize()].to_numpy()
+        chunk.loc[rows, 'change'] = np.where(joined['Open'] >= joined['Close'], 'loss', 'win')
+        filled += len(rows)
+        return chunk
+
+    news_store.rewrite_summary(fill, chunk_rows)
+    return filled
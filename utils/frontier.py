@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import scipy.optimize as sco
+from utils.compute_cache import cache_key, cached
+from utils.optimizer import min_variance_weights
+
+# Bump when the frontier computation changes, so cached frontiers of the old code are not reused
+FRONTIER_VERSION = 2
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Long-only, fully invested minimum variance portfolio for one target return. The problem is
+# rescaled so SLSQP's default tolerances are meaningful for daily-return sized numbers.
+# Returns None when the solver did not converge.
+def min_variance_for_target(cov_matrix, mean_returns, target, w0):
+    n = len(mean_returns)
+    cov_scale = np.mean(np.diag(cov_matrix)) or 1.0
+    ret_scale = np.max(np.abs(mean_returns)) or 1.0
+    cov = cov_matrix / cov_scale
+    mu = mean_returns / ret_scale
+    constraints = (
+        {'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': lambda w: np.ones(n)},
+        {'type': 'eq', 'fun': lambda w: mu @ w - target / ret_scale, 'jac': lambda w: mu},
+    )
+    result = sco.minimize(lambda w: w @ cov @ w, w0, jac=lambda w: 2 * cov @ w, method='SLSQP',
+                          bounds=[(0, 1)] * n, constraints=constraints, options={'maxiter': 500})
+    if not result.success:
+        return None
+    return np.clip(result.x, 0, None) / np.clip(result.x, 0, None).sum()
+
+
+# Sweep a contiguous run of targets, warm-starting every solve from its neighbour.
+# Targets that fail to converge get a row of NaN and do not become the next warm start.
+def _solve_chunk(cov_matrix, mean_returns, targets, w0):
+    weights = []
+    for target in targets:
+        w = min_variance_for_target(cov_matrix, mean_returns, target, w0)
+        if w is None:
+            weights.append(np.full(len(mean_returns), np.nan))
+        else:
+            w0 = w
+            weights.append(w)
+    return np.array(weights)
+
+
+# Processes are spawned rather than forked: forking the multithreaded Streamlit server can copy
+# locks held by other threads into the child and deadlock it
+
+
+def _pool(executor, workers):
+    with _pools_lock:
+        if (executor, workers) not in _pools:
+            if executor == 'process':
+                _pools[(executor, workers)] = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            else:
+                _pools[(executor, workers)] = ThreadPoolExecutor(max_workers=workers)
+        return _pools[(executor, workers)]
+
+
+# Efficient frontier from the minimum variance portfolio up to the highest mean return.
+# The target grid is split into one contiguous chunk per worker; each chunk is swept in order
+# with warm starts. executor is 'process', 'thread' or 'serial'.
+# Returns a frame with one row per converged point: 'return', 'volatility' (per period) and one weight
+# column per asset. Points where the solver did not converge are dropped.
+def efficient_frontier(mean_returns, cov_matrix, n_points=100, workers=None, executor='process'):
+    mean_returns = pd.Series(mean_returns)
+    tickers = list(mean_returns.index)
+    mu = mean_returns.to_numpy(dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+
+    w_min = min_variance_weights(cov)
+    targets = np.linspace(mu @ w_min, mu.max(), n_points)
+    workers = max(1, min(workers or os.cpu_count() or 1, n_points))
+    chunks = [chunk for chunk in np.array_split(targets, workers) if len(chunk)]
+
+    # Start each chunk between the minimum variance portfolio and the best single asset
+    best = np.zeros(len(mu))
+    best[mu.argmax()] = 1
+    span = targets[-1] - targets[0]
+    starts = [w_min + (best - w_min) * ((chunk[0] - targets[0]) / span if span > 0 else 0) for chunk in chunks]
+
+    if executor == 'serial' or len(chunks) == 1:
+        results = [_solve_chunk(cov, mu, chunk, w0) for chunk, w0 in zip(chunks, starts)]
+    else:
+        pool = _pool(executor, workers)
+        results = list(pool.map(_solve_chunk, [cov] * len(chunks), [mu] * len(chunks), chunks, starts))
+
+    weights = np.vstack(results)
+    weights = weights[~np.isnan(weights).any(axis=1)]
+    frontier = pd.DataFrame(weights, columns=tickers)
+    frontier.insert(0, 'volatility', np.sqrt(np.einsum('ij,jk,ik->i', weights, cov, weights)))
+    frontier.insert(0, 'return', weights @ mu)
+    return frontier
+
+
+# Cache key: content hash of the tickers, date range and anything else that changes the inputs
+def frontier_key(tickers, start_date, end_date, *extra):
+    return cache_key('efficient_frontier', FRONTIER_VERSION, tickers, start_date, end_date, *extra)
+
+
+# Frontiers are kept in the shared compute cache, so sessions with the same inputs solve it once
+def cached_efficient_frontier(key, mean_returns, cov_matrix, **kwargs):
+    return cached(key, lambda: efficient_frontier(mean_returns, cov_matrix, **kwargs))
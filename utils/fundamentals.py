@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+import pandas as pd
+
+DEFAULT_ROOT = os.environ.get('FUNDAMENTALS_DIR', os.path.join('data', 'cache', 'fundamentals'))
+# Statement name -> yf.Ticker attribute
+STATEMENTS = {
+    'balance_sheet': 'balance_sheet',
+    'income_statement': 'financials',
+    'cash_flow': 'cashflow',
+}
+# yfinance statements are annual; a new fiscal period is expected a year after the latest one,
+# plus the time companies take to file it
+PERIOD_MONTHS = 12
+FILING_LAG_DAYS = 90
+# Once a new period is due (or nothing was found), check again at most this often
+RECHECK_SECONDS = 24 * 3600
+PREFETCH_WORKERS = 4
+
+
+# Fetch the three statements of one ticker in parallel
+def fetch_yfinance_statements(ticker):
+    import yfinance as yf
+
+    def fetch(attribute):
+        frame = getattr(yf.Ticker(ticker), attribute)
+        return frame if frame is not None else pd.DataFrame()
+
+    with ThreadPoolExecutor(max_workers=len(STATEMENTS)) as pool:
+        futures = {name: pool.submit(fetch, attribute) for name, attribute in STATEMENTS.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _latest_period(frame):
+    periods = pd.to_datetime(pd.Index(frame.columns), errors='coerce').dropna()
+    return periods.max() if len(periods) else None
+
+
+# Financial statements cached on disk as Parquet, one file per statement and fiscal period:
+# <root>/<ticker>/<statement>/<period>.parquet, plus <root>/<ticker>/meta.json with the latest
+# period and fetch time. Cached copies are served until a new period is expected.
+class FundamentalsStore:
+    def __init__(self, root=DEFAULT_ROOT, fetcher=fetch_yfinance_statements):
+        self.root = root
+        self.fetcher = fetcher
+        self._lock = threading.Lock()
+        self._ticker_locks = {}
+
+    def _dir(self, ticker):
+        return os.path.join(self.root, quote(ticker.upper(), safe=''))
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._ticker_locks.setdefault(ticker.upper(), threading.Lock())
+
+    def _read_meta(self, ticker):
+        try:
+            with open(os.path.join(self._dir(ticker), 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, meta, now=None):
+        if meta is None:
+            return False
+        now = now or time.time()
+        if now - meta['fetched_at'] < RECHECK_SECONDS:
+            return True
+        if meta.get('latest_period') is None:
+            return False
+        expected = (pd.Timestamp(meta['latest_period']) + pd.DateOffset(months=PERIOD_MONTHS)
+                    + pd.Timedelta(days=FILING_LAG_DAYS))
+        return pd.Timestamp.fromtimestamp(now) < expected
+
+    def _read(self, ticker, meta):
+        statements = {}
+        for name in STATEMENTS:
+            period = meta['periods'].get(name)
+            if period is None:
+                statements[name] = pd.DataFrame()
+                continue
+            frame = pd.read_parquet(os.path.join(self._dir(ticker), name, period + '.parquet'))
+            frame.columns = pd.to_datetime(frame.columns)
+            statements[name] = frame
+        return statements
+
+    # Store the fetched statements; a statement that came back empty keeps its previous period
+    def _write(self, ticker, statements, now, previous=None):
+        directory = self._dir(ticker)
+        old = previous['periods'] if previous else {}
+        periods = {}
+        for name in STATEMENTS:
+            frame = statements.get(name)
+            latest = _latest_period(frame) if frame is not None and not frame.empty else None
+            if latest is None:
+                periods[name] = old.get(name)
+                continue
+            periods[name] = latest.strftime('%Y-%m-%d')
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+            stored = frame.copy()
+            stored.columns = [str(c.date()) if isinstance(c, pd.Timestamp) else str(c) for c in stored.columns]
+            stored.index = stored.index.astype(str)
+            stored.to_parquet(os.path.join(directory, name, periods[name] + '.parquet'))
+        known = [p for p in periods.values() if p]
+        meta = {'fetched_at': now, 'latest_period': max(known) if known else None, 'periods': periods}
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, 'meta.json'))
+        return meta
+
+    # Refresh a ticker if its cache is stale. Returns 'cached', 'fetched' or 'failed'.
+    def refresh(self, ticker, force=False):
+        with self._ticker_lock(ticker):
+            meta = self._read_meta(ticker)
+            if not force and self.is_fresh(meta):
+                return 'cached'
+            try:
+                statements = self.fetcher(ticker)
+            except Exception:
+                # Keep serving the previous version (a ticker with no version gets an empty one) and
+                # restamp it so the failure is not retried on every render
+                self._write(ticker, {}, time.time(), meta)
+                return 'failed'
+            self._write(ticker, statements, time.time(), meta)
+            return 'fetched'
+
+    # {statement name: DataFrame}; no network call while the cached period is current
+    def get(self, ticker, force=False):
+        self.refresh(ticker, force)
+        meta = self._read_meta(ticker)
+        if meta is None:
+            return {name: pd.DataFrame() for name in STATEMENTS}
+        return self._read(ticker, meta)
+
+    # Bulk refresh for a list of tickers, e.g. from a nightly job
+    def prefetch(self, tickers, max_workers=PREFETCH_WORKERS, force=False):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = pool.map(lambda t: self.refresh(t, force), tickers)
+            return dict(zip(tickers, results))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_fundamentals_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FundamentalsStore()
+        return _store
+
+
+def set_fundamentals_store(store):
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def get_fundamentals(ticker):
+    return get_fundamentals_store().get(ticker)
+
+
+if __name__ == '__main__':
+    # python -m utils.fundamentals TICKER [TICKER ...] or python -m utils.fundamentals --file tickers.txt
+    args = sys.argv[1:]
+    if args[:1] == ['--file']:
+        with open(args[1]) as f:
+            args = [line.strip() for line in f if line.strip()]
+    for ticker, status in get_fundamentals_store().prefetch(args).items():
+        print(f"{ticker}: {status}")
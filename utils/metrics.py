@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+# Trading rows used for the Individual Stocks metrics
+AVERAGE_WINDOW = 50
+YEAR_WINDOW = 365
+
+
+# Keep only the last `window` non-missing prices of every column
+def _last_valid(prices, window):
+    valid = prices.notna().to_numpy()
+    from_end = np.cumsum(valid[::-1], axis=0)[::-1]
+    return prices.where(valid & (from_end <= window))
+
+
+# 50-day average and 1-year low/high for every ticker of a wide price frame, in one pass
+def ticker_summary(prices):
+    average = _last_valid(prices, AVERAGE_WINDOW)
+    year = _last_valid(prices, YEAR_WINDOW)
+    return pd.DataFrame({
+        'avg_50d': average.mean(),
+        'low_1y': year.min(),
+        'high_1y': year.max(),
+    }).round(2)
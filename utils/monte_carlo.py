@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from utils.bars import TRADING_DAYS
+
+# Percentile bands reported for the projected portfolio value
+PERCENTILES = (5, 25, 50, 75, 95)
+# Size of the largest array one chunk of paths may allocate (paths x steps, times the holdings
+# when they are simulated one by one)
+CHUNK_BYTES = 32 * 2 ** 20
+
+
+# Return generators: each yields (paths, steps[, assets]) log-growth draws for one chunk of paths
+def _bootstrap(log_growth, rng, paths, steps):
+    return log_growth[rng.integers(0, len(log_growth), size=(paths, steps))]
+
+
+def _normal(mean, cov, rng, paths, steps):
+    if np.ndim(mean) == 0:
+        draws = mean + np.sqrt(cov) * rng.standard_normal((paths, steps))
+    else:
+        # Correlated draws through the Cholesky factor; float32 keeps the per-asset arrays small
+        factor = np.linalg.cholesky(cov + np.eye(len(mean)) * 1e-12).astype(np.float32)
+        draws = rng.standard_normal((paths, steps, len(mean)), dtype=np.float32) @ factor.T + mean.astype(np.float32)
+    return np.log1p(np.clip(draws, -0.99, None))
+
+
+# Forward Monte Carlo of a portfolio towards a goal.
+#
+# returns: wide daily returns (one column per ticker); amounts: {ticker: amount invested today}.
+# method: 'bootstrap' resamples historical days (all tickers from the same day) or 'normal' draws
+# multivariate normal returns with the tickers' mean and covariance. With rebalance=True the
+# portfolio is held at its initial weights, which reduces every path to one series; otherwise
+# each holding is simulated and left to drift (buy and hold).
+# Paths are generated in chunks of at most CHUNK_BYTES (or chunk_paths at a time) so memory grows
+# with neither n_paths nor the number of holdings; only the band steps are kept for percentiles.
+# Pass seed for reproducible results.
+def simulate_goal(returns, amounts, goal, years=5, n_paths=10000, method='bootstrap', rebalance=True,
+                  periods_per_year=TRADING_DAYS, percentiles=PERCENTILES, band_points=100, chunk_paths=None, seed=None):
+    if method not in ('bootstrap', 'normal'):
+        raise ValueError(f"Unknown simulation method: {method}")
+    amounts = pd.Series(amounts, dtype=float)
+    amounts = amounts[[t for t in returns.columns if amounts.get(t, 0) > 0]]
+    if amounts.empty:
+        raise ValueError("At least one holding needs a positive amount")
+    history = returns[amounts.index].dropna()
+    if len(history) < 2:
+        raise ValueError("Not enough overlapping return history to simulate")
+
+    total = amounts.sum()
+    weights = (amounts / total).to_numpy()
+    steps = int(round(years * periods_per_year))
+    band_steps = np.unique(np.linspace(0, steps - 1, min(band_points, steps)).astype(int))
+    log_goal = np.log(goal / total) if goal > 0 else -np.inf
+    rng = np.random.default_rng(seed)
+    if chunk_paths is None:
+        width = 1 if rebalance else len(weights)
+        chunk_paths = max(1, CHUNK_BYTES // (steps * width * 8))
+
+    values = history.to_numpy(dtype=np.float64)
+    if rebalance:
+        portfolio = values @ weights
+        if method == 'bootstrap':
+            log_growth = np.log1p(portfolio)
+            draw = lambda paths: _bootstrap(log_growth, rng, paths, steps)
+        else:
+            draw = lambda paths: _normal(portfolio.mean(), portfolio.var(ddof=1), rng, paths, steps)
+    else:
+        if method == 'bootstrap':
+            log_growth = np.log1p(values).astype(np.float32)
+            draw = lambda paths: _bootstrap(log_growth, rng, paths, steps)
+        else:
+            draw = lambda paths: _normal(values.mean(axis=0), np.cov(values, rowvar=False).reshape(len(weights), -1),
+                                         rng, paths, steps)
+
+    band_values, hit_steps, final_values = [], [], []
+    for start in range(0, n_paths, chunk_paths):
+        paths = min(chunk_paths, n_paths - start)
+        log_value = np.cumsum(draw(paths), axis=1)
+        if rebalance:
+            # Log of value relative to the amount invested
+            reached = log_value >= log_goal
+            band = np.exp(log_value[:, band_steps]) * total
+            final = np.exp(log_value[:, -1]) * total
+        else:
+            value = np.exp(log_value) @ amounts.to_numpy()
+            reached = value >= goal
+            band = value[:, band_steps]
+            final = value[:, -1]
+        hit = reached.any(axis=1)
+        hit_steps.append(np.where(hit, reached.argmax(axis=1), -1))
+        band_values.append(band)
+        final_values.append(final)
+
+    band_values = np.vstack(band_values)
+    hit_steps = np.concatenate(hit_steps)
+    bands = pd.DataFrame(np.percentile(band_values, percentiles, axis=0).T, index=pd.Index(band_steps + 1, name='step'),
+                         columns=[f"p{p}" for p in percentiles])
+    reached = hit_steps >= 0
+    return {
+        'probability': reached.mean(),
+        'median_hit_step': int(np.median(hit_steps[reached])) + 1 if reached.any() else None,
+        'bands': bands,
+        'final_values': np.concatenate(final_values),
+        'hit_steps': hit_steps,
+    }
@@ -0,0 +1,383 @@
+import os
+import sys
+import glob
+import time
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = os.environ.get('NEWS_STORE_DIR', os.path.join('data', 'news'))
+# Daily aggregates, one CSV per ticker: <summary_path>/stock=<TICKER>.csv
+SUMMARY_PATH = os.environ.get('NEWS_SUMMARY_PATH', os.path.join('data', 'summary'))
+# Single CSV the aggregates were kept in before; split into the partitions on first use
+LEGACY_SUMMARY_PATH = os.path.join('data', 'data.csv')
+# Summary columns, the header of the original data/data.csv: one row per stock and news day
+SUMMARY_COLUMNS = ['id', 'stock', 'news_dt', 'check_day', 'open', 'close', 'high', 'low', 'volume', 'change',
+                   'sentiment_summary_avg', 'sentiment_summary_med', 'sentiment_title_avg', 'sentiment_title_med']
+NEWS_COLUMNS = ['id', 'stock', 'guid', 'title', 'summary', 'published', 'sentiment_summary', 'sentiment_title']
+# News published after the close (UTC hour, as in stocknews) counts for the next trading day
+CLOSING_HOUR = 20
+# Price columns are filled in later by the event study; until then the row is marked like stocknews does
+UNCHECKED = 'UNCHECKED'
+PRICE_COLUMNS = ['open', 'close', 'high', 'low', 'volume', 'change']
+# A ticker's feed is not pulled again within this many seconds
+REFRESH_SECONDS = 15 * 60
+FETCH_WORKERS = 8
+# Partitions with more part files than this are compacted into one
+COMPACT_PARTS = 20
+
+
+# Feeds return a list of {'guid', 'title', 'summary', 'published' (UTC datetime)} for one ticker
+class YahooRSSFeed:
+    def fetch(self, ticker):
+        import feedparser
+        from stocknews import StockNews
+        feed = feedparser.parse(StockNews.YAHOO_URL % ticker)
+        return [{
+            'guid': entry.get('guid') or entry.get('link'),
+            'title': entry.get('title', ''),
+            'summary': entry.get('summary', ''),
+            'published': datetime(*entry.published_parsed[:6]),
+        } for entry in feed.entries if entry.get('published_parsed')]
+
+
+# Fixed items per ticker, for offline runs
+class StaticFeed:
+    def __init__(self, items):
+        self.items = items
+
+    def fetch(self, ticker):
+        return list(self.items.get(ticker, []))
+
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+# VADER compound score for a batch of texts, with a single analyzer shared across batches
+def vader_scorer(texts):
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            import nltk
+            from nltk.sentiment.vader import SentimentIntensityAnalyzer
+            try:
+                nltk.data.find('sentiment/vader_lexicon.zip')
+            except LookupError:
+                nltk.download('vader_lexicon', quiet=True)
+            _analyzer = SentimentIntensityAnalyzer()
+    return np.array([_analyzer.polarity_scores(text or '')['compound'] for text in texts])
+
+
+def news_id(ticker, guid):
+    return hashlib.sha1(f"{ticker}|{guid}".encode()).hexdigest()[:16]
+
+
+# Trading day a news item is checked against: the same day before the close, otherwise the next
+# day, moved past weekends
+def check_days(published):
+    published = pd.DatetimeIndex(published)
+    day = published.normalize()
+    day = day + pd.to_timedelta((published >= day + pd.Timedelta(hours=CLOSING_HOUR)).astype(int), unit='D')
+    weekday = day.weekday
+    return day + pd.to_timedelta(np.select([weekday == 5, weekday == 6], [2, 1], 0), unit='D')
+
+
+# Daily aggregates in the data.csv schema for a frame of scored news
+def summarize_news(news):
+    if news.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    news = news.assign(day=news['published'].dt.strftime('%Y-%m-%d'))
+    grouped = news.groupby(['stock', 'day'], sort=True)
+    summary = grouped.agg(
+        news_dt=('published', 'min'),
+        sentiment_summary_avg=('sentiment_summary', 'mean'),
+        sentiment_summary_med=('sentiment_summary', 'median'),
+        sentiment_title_avg=('sentiment_title', 'mean'),
+        sentiment_title_med=('sentiment_title', 'median'),
+    ).reset_index()
+    summary['id'] = summary['stock'] + '_' + summary['day']
+    summary['check_day'] = check_days(summary['news_dt']).strftime('%Y-%m-%d')
+    summary['news_dt'] = summary['news_dt'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    for column in PRICE_COLUMNS[:-1]:
+        summary[column] = np.nan
+    summary['change'] = UNCHECKED
+    return summary[SUMMARY_COLUMNS]
+
+
+# Scored news on disk, partitioned by ticker: <root>/stock=<TICKER>/part-*.parquet.
+# Items are deduplicated by id, and the daily aggregates in summary_path are updated for the
+# stock/days that received new items only, rewriting only those stocks' partitions.
+class NewsStore:
+    def __init__(self, root=DEFAULT_ROOT, summary_path=SUMMARY_PATH, legacy_summary_path=LEGACY_SUMMARY_PATH):
+        self.root = root
+        self.summary_path = summary_path
+        self._lock = threading.Lock()
+        self._ids = {}
+        if legacy_summary_path and os.path.isfile(legacy_summary_path) and not os.path.isdir(summary_path):
+            self._split_summary(legacy_summary_path)
+
+    def _partition(self, ticker):
+        return os.path.join(self.root, f"stock={ticker}")
+
+    def read(self, ticker):
+        files = sorted(glob.glob(os.path.join(self._partition(ticker), 'part-*.parquet')))
+        if not files:
+            return pd.DataFrame(columns=NEWS_COLUMNS)
+        return pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+
+    def known_ids(self, ticker):
+        with self._lock:
+            if ticker not in self._ids:
+                self._ids[ticker] = set(self.read(ticker)['id'])
+            return set(self._ids[ticker])
+
+    # Latest items first
+    def query(self, ticker, limit=None):
+        news = self.read(ticker).sort_values('published', ascending=False, ignore_index=True)
+        return news.head(limit) if limit else news
+
+    def tickers(self):
+        return sorted(os.path.basename(p)[len('stock='):] for p in glob.glob(os.path.join(self.root, 'stock=*')))
+
+    def _write_part(self, directory, news):
+        name = f"part-{time.time_ns()}.parquet"
+        news.to_parquet(os.path.join(directory, name + '.tmp'), index=False)
+        os.replace(os.path.join(directory, name + '.tmp'), os.path.join(directory, name))
+
+    def _add_part(self, ticker, news):
+        directory = self._partition(ticker)
+        os.makedirs(directory, exist_ok=True)
+        self._write_part(directory, news)
+        files = sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+        if len(files) > COMPACT_PARTS:
+            self._write_part(directory, pd.concat([pd.read_parquet(f) for f in files], ignore_index=True))
+            for f in files:
+                os.remove(f)
+
+    # Append scored news (NEWS_COLUMNS) for many tickers; returns the rows that were new
+    def append(self, news):
+        if news.empty:
+            return news
+        added = []
+        for ticker, rows in news.groupby('stock', sort=False):
+            known = self.known_ids(ticker)
+            rows = rows[~rows['id'].isin(known)].drop_duplicates('id')
+            if rows.empty:
+                continue
+            with self._lock:
+                self._add_part(ticker, rows[NEWS_COLUMNS])
+                self._ids[ticker].update(rows['id'])
+            added.append(rows)
+        added = pd.concat(added, ignore_index=True) if added else news.iloc[:0]
+        if not added.empty:
+            self.update_summary(added)
+        return added
+
+    def _summary_file(self, ticker):
+        return os.path.join(self.summary_path, f"stock={ticker}.csv")
+
+    def _summary_files(self):
+        return sorted(glob.glob(os.path.join(self.summary_path, 'stock=*.csv')))
+
+    def _read_summary_file(self, path, **kwargs):
+        return pd.read_csv(path, sep=';', dtype={'id': str, 'stock': str, 'change': str}, **kwargs)
+
+    def _split_summary(self, path):
+        self.write_summary(self._read_summary_file(path))
+
+    # Aggregates of the given tickers (all by default)
+    def read_summary(self, tickers=None):
+        if tickers is None:
+            files = self._summary_files()
+        else:
+            files = [f for f in map(self._summary_file, tickers) if os.path.isfile(f)]
+        if not files:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        return pd.concat([self._read_summary_file(f) for f in files], ignore_index=True)
+
+    # Replace the partitions of the stocks in `summary`; other stocks are left as they are
+    def write_summary(self, summary):
+        os.makedirs(self.summary_path, exist_ok=True)
+        for ticker, rows in summary.groupby('stock', sort=False):
+            path = self._summary_file(ticker)
+            rows[SUMMARY_COLUMNS].to_csv(path + '.tmp', sep=';', index=False)
+            os.replace(path + '.tmp', path)
+
+    # Last time any partition changed, or None when there is no summary yet
+    def summary_mtime(self):
+        files = self._summary_files()
+        return max(os.path.getmtime(f) for f in files) if files else None
+
+    # The summary in frames of at most chunk_rows rows; small partitions are combined so a chunk
+    # is not limited to one stock
+    def iter_summary(self, chunk_rows, usecols=None):
+        pending, rows = [], 0
+        for path in self._summary_files():
+            for frame in self._read_summary_file(path, chunksize=chunk_rows, usecols=usecols):
+                pending.append(frame)
+                rows += len(frame)
+                if rows >= chunk_rows:
+                    combined = pd.concat(pending, ignore_index=True)
+                    yield combined.iloc[:chunk_rows]
+                    pending, rows = [combined.iloc[chunk_rows:]] if rows > chunk_rows else [], rows - chunk_rows
+        if rows:
+            yield pd.concat(pending, ignore_index=True)
+
+    # Rewrite the summary partition by partition, chunk by chunk, through transform(frame) -> frame,
+    # without holding it all in memory
+    def rewrite_summary(self, transform, chunk_rows):
+        with self._lock:
+            for path in self._summary_files():
+                tmp = path + '.tmp'
+                header = True
+                for chunk in self._read_summary_file(path, chunksize=chunk_rows):
+                    transform(chunk)[SUMMARY_COLUMNS].to_csv(tmp, sep=';', index=False, header=header,
+                                                             mode='w' if header else 'a')
+                    header = False
+                if not header:
+                    os.replace(tmp, path)
+
+    # Recompute the aggregates of the stock/days touched by `added`; other rows (and any prices
+    # already filled in) are kept as they are, and only the touched stocks' partitions are rewritten
+    def update_summary(self, added):
+        # Midnight of each item's day, so days compare as datetimes rather than strings
+        touched_days = added.assign(day=added['published'].dt.normalize()).groupby('stock')['day'].unique()
+        news = []
+        for ticker, days in touched_days.items():
+            ticker_news = self.read(ticker)
+            news.append(ticker_news[ticker_news['published'].dt.normalize().isin(days)])
+        fresh = summarize_news(pd.concat(news, ignore_index=True))
+        touched = pd.Index(fresh['id'])
+        with self._lock:
+            summary = self.read_summary(touched_days.index)
+            kept = summary[~summary['id'].isin(touched)]
+            previous = summary[summary['id'].isin(touched)].set_index('id')
+            # Keep prices already filled in for a day whose check day did not change
+            if not previous.empty:
+                fresh = fresh.set_index('id')
+                checked = previous.index[previous['check_day'] == fresh['check_day'].reindex(previous.index)]
+                fresh.loc[checked, PRICE_COLUMNS] = previous.loc[checked, PRICE_COLUMNS]
+                fresh = fresh.reset_index()
+            summary = pd.concat([kept, fresh], ignore_index=True).sort_values(['stock', 'news_dt'], ignore_index=True)
+            self.write_summary(summary)
+
+
+# Pulls feeds for many tickers concurrently, scores all new items in one batch and appends them
+# to the store. Ingestion runs on a background thread; request() never blocks the caller.
+class NewsPipeline:
+    def __init__(self, store=None, feed=None, scorer=vader_scorer, max_workers=FETCH_WORKERS,
+                 refresh_seconds=REFRESH_SECONDS):
+        self.store = store or NewsStore()
+        self.feed = feed or YahooRSSFeed()
+        self.scorer = scorer
+        self.refresh_seconds = refresh_seconds
+        self._fetch_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='news-fetch')
+        self._ingest_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='news-ingest')
+        self._lock = threading.Lock()
+        self._last_ingest = {}
+        self._pending = {}
+
+    def _fetch(self, ticker):
+        try:
+            return ticker, self.feed.fetch(ticker)
+        except Exception:
+            return ticker, []
+
+    # Fetch, score and store news for the tickers now; returns {ticker: number of new items}
+    def ingest(self, tickers):
+        tickers = list(dict.fromkeys(tickers))
+        rows = []
+        for ticker, items in self._fetch_pool.map(self._fetch, tickers):
+            known = self.store.known_ids(ticker)
+            for item in items:
+                item_id = news_id(ticker, item['guid'])
+                if item_id not in known:
+                    known.add(item_id)
+                    rows.append(dict(item, id=item_id, stock=ticker))
+        with self._lock:
+            now = time.time()
+            for ticker in tickers:
+                self._last_ingest[ticker] = now
+        if not rows:
+            return {ticker: 0 for ticker in tickers}
+
+        news = pd.DataFrame(rows)
+        news['published'] = pd.to_datetime(news['published'])
+        # One scoring call for every title and summary in the batch
+        scores = self.scorer(list(news['summary']) + list(news['title']))
+        news['sentiment_summary'] = scores[:len(news)]
+        news['sentiment_title'] = scores[len(news):]
+        added = self.store.append(news[NEWS_COLUMNS])
+        counts = added['stock'].value_counts()
+        return {ticker: int(counts.get(ticker, 0)) for ticker in tickers}
+
+    # Queue a background ingest for tickers not refreshed recently; returns its future, or None
+    # when there is nothing to do
+    def request(self, tickers):
+        with self._lock:
+            now = time.time()
+            due = [t for t in dict.fromkeys(tickers)
+                   if now - self._last_ingest.get(t, 0) >= self.refresh_seconds and t not in self._pending]
+            if not due:
+                futures = [self._pending[t] for t in tickers if t in self._pending]
+                return futures[0] if futures else None
+            future = self._ingest_pool.submit(self.ingest, due)
+            for ticker in due:
+                self._pending[ticker] = future
+        future.add_done_callback(lambda f: self._clear_pending(due, f))
+        return future
+
+    def _clear_pending(self, tickers, future):
+        with self._lock:
+            for ticker in tickers:
+                if self._pending.get(ticker) is future:
+                    del self._pending[ticker]
+
+    # Keep ingesting the tickers every `interval` seconds until stop() is called
+    def run_forever(self, tickers, interval=REFRESH_SECONDS):
+        self._stopped = threading.Event()
+        while not self._stopped.is_set():
+            self.ingest(tickers)
+            self._stopped.wait(interval)
+
+    def stop(self):
+        if getattr(self, '_stopped', None) is not None:
+            self._stopped.set()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_news_pipeline():
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = NewsPipeline()
+        return _pipeline
+
+
+def set_news_pipeline(pipeline):
+    global _pipeline
+    with _pipeline_lock:
+        _pipeline = pipeline
+
+
+if __name__ == '__main__':
+    # python -m utils.news TICKER [TICKER ...] [--every SECONDS]
+    args = sys.argv[1:]
+    interval = None
+    if '--every' in args:
+        index = args.index('--every')
+        interval = float(args[index + 1])
+        args = args[:index] + args[index + 2:]
+    pipeline = get_news_pipeline()
+    if interval:
+        pipeline.run_forever(args, interval)
+    else:
+        for ticker, count in pipeline.ingest(args).items():
+            print(f"{ticker}: {count} new")
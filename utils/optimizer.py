@@ -0,0 +1,157 @@
+import numpy as np
+import scipy.optimize as sco
+
+# Weights below this are treated as zero when checking the long-only constraint
+WEIGHT_TOL = 1e-10
+
+
+# Objective and its analytic derivatives
+def portfolio_variance(w, cov_matrix):
+    return w @ cov_matrix @ w
+
+
+def variance_gradient(w, cov_matrix):
+    return 2 * cov_matrix @ w
+
+
+def sum_to_one_jacobian(w):
+    return np.ones_like(w)
+
+
+def _start(n, w0):
+    if w0 is None:
+        return np.repeat(1 / n, n)
+    w0 = np.clip(np.asarray(w0, dtype=float), 0, None)
+    return w0 / w0.sum() if w0.sum() > 0 else np.repeat(1 / n, n)
+
+
+# Long-only, fully invested minimum variance with SLSQP, using the analytic gradient
+def min_variance_slsqp(cov_matrix, w0=None):
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    n = cov_matrix.shape[0]
+    constraints = ({'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': sum_to_one_jacobian})
+    bounds = tuple((0, 1) for _ in range(n))
+    result = sco.minimize(portfolio_variance, _start(n, w0), args=(cov_matrix,), jac=variance_gradient,
+                          method='SLSQP', bounds=bounds, constraints=constraints)
+    return result.x
+
+
+# Sum-to-one minimum variance without the long-only bound: w = inv(C) 1 / (1' inv(C) 1)
+def min_variance_closed_form(cov_matrix):
+    x = np.linalg.solve(cov_matrix, np.ones(cov_matrix.shape[-1]))
+    return x / x.sum()
+
+
+# Active-set solver: solve the closed form on the assets held, drop the negative weights,
+# and re-admit any excluded asset whose marginal variance is below the Lagrange multiplier.
+# Returns None if it does not settle, so callers can fall back to projected gradient.
+def min_variance_active_set(cov_matrix, w0=None, max_iter=None):
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    n = cov_matrix.shape[0]
+    active = np.ones(n, dtype=bool) if w0 is None else np.asarray(w0) > WEIGHT_TOL
+    if not active.any():
+        active[:] = True
+    for _ in range(max_iter or 4 * n):
+        idx = np.flatnonzero(active)
+        try:
+            x = np.linalg.solve(cov_matrix[np.ix_(idx, idx)], np.ones(len(idx)))
+        except np.linalg.LinAlgError:
+            return None
+        if x.sum() <= 0:
+            return None
+        weights = x / x.sum()
+        if weights.min() < -WEIGHT_TOL:
+            active[idx[weights < -WEIGHT_TOL]] = False
+            continue
+        w = np.zeros(n)
+        w[idx] = np.clip(weights, 0, None)
+        gradient = variance_gradient(w, cov_matrix)
+        multiplier = 2 / x.sum()
+        violation = ~active & (gradient < multiplier * (1 - 1e-9))
+        if not violation.any():
+            return w / w.sum()
+        active[np.flatnonzero(violation)[gradient[violation].argmin()]] = True
+    return None
+
+
+# Euclidean projection of every row onto the probability simplex (sort-based)
+def project_simplex(v):
+    v = np.asarray(v, dtype=float)
+    n = v.shape[-1]
+    u = -np.sort(-v, axis=-1)
+    css = np.cumsum(u, axis=-1) - 1
+    ind = np.arange(1, n + 1)
+    rho = np.count_nonzero(u - css / ind > 0, axis=-1)
+    theta = np.take_along_axis(css, (rho - 1)[..., None], axis=-1) / rho[..., None]
+    return np.clip(v - theta, 0, None)
+
+
+def _largest_eigenvalue(covs, iterations=50):
+    x = np.ones(covs.shape[:-1])
+    for _ in range(iterations):
+        x = np.einsum('...ij,...j->...i', covs, x)
+        x /= np.linalg.norm(x, axis=-1, keepdims=True)
+    return np.einsum('...i,...ij,...j->...', x, covs, x)
+
+
+# Accelerated projected gradient (FISTA) on the simplex. Works on a single (n, n) matrix
+# or a stack (k, n, n), solving every problem of the stack at once.
+def min_variance_projected_gradient(cov_matrix, w0=None, tol=1e-10, max_iter=10000):
+    covs = np.asarray(cov_matrix, dtype=float)
+    n = covs.shape[-1]
+    w = project_simplex(np.broadcast_to(_start(n, None) if w0 is None else w0, covs.shape[:-1]))
+    step = 1 / (2 * 1.01 * _largest_eigenvalue(covs))[..., None]
+    y, t = w.copy(), 1.0
+    for _ in range(max_iter):
+        gradient = 2 * np.einsum('...ij,...j->...i', covs, y)
+        w_next = project_simplex(y - step * gradient)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + (t - 1) / t_next * (w_next - w)
+        done = np.abs(w_next - w).max() < tol
+        w, t = w_next, t_next
+        if done:
+            break
+    return w
+
+
+# Long-only, fully invested minimum variance weights. `w0` (e.g. the previous solution) warm-starts the solver.
+def min_variance_weights(cov_matrix, w0=None, method='auto'):
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    if method == 'slsqp':
+        return min_variance_slsqp(cov_matrix, w0)
+    if method == 'auto':
+        w = min_variance_active_set(cov_matrix, w0)
+        if w is not None:
+            return w
+    return min_variance_projected_gradient(cov_matrix, w0)
+
+
+# Solve a stack of covariance matrices (k, n, n), e.g. one per rolling window. The closed form is
+# solved for the whole stack at once; problems where it goes short are re-solved with the active-set
+# method, each warm-started from the previous problem's weights (or `w0` for the first one), and any
+# that still fail are solved together by projected gradient.
+def min_variance_weights_batch(cov_matrices, w0=None):
+    covs = np.asarray(cov_matrices, dtype=float)
+    k, n = covs.shape[0], covs.shape[-1]
+    try:
+        x = np.linalg.solve(covs, np.ones((k, n, 1)))[..., 0]
+        totals = x.sum(axis=-1, keepdims=True)
+        weights = np.where(totals > 0, x / np.where(totals == 0, 1, totals), 1 / n)
+        solved = (totals[:, 0] > 0) & (weights.min(axis=-1) >= -WEIGHT_TOL)
+    except np.linalg.LinAlgError:
+        weights = np.full((k, n), 1 / n)
+        solved = np.zeros(k, dtype=bool)
+
+    previous = w0
+    for i in range(k):
+        if not solved[i]:
+            w = min_variance_active_set(covs[i], previous)
+            if w is not None:
+                weights[i], solved[i] = w, True
+        if solved[i]:
+            previous = weights[i]
+
+    pending = ~solved
+    if pending.any():
+        weights[pending] = min_variance_projected_gradient(covs[pending], project_simplex(weights[pending]))
+    return np.clip(weights, 0, None)
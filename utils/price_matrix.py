@@ -0,0 +1,101 @@
+import hashlib
+from functools import cached_property
+import numpy as np
+import pandas as pd
+from utils.bars import periods_per_year
+from utils.compute_cache import cache_key, cached
+from utils.metrics import ticker_summary
+from utils.price_store import get_prices
+
+# Bump when PriceMatrix or its derived series change, so cached results of the old code are not reused
+PRICE_MATRIX_VERSION = 2
+# Seconds a shared price matrix is reused before it is rebuilt from the price store
+PRICES_TTL = 900
+
+
+# Aligned close prices shared by every page: a Date index, ticker columns and one contiguous
+# float64 matrix of bars at one interval. Derived series are computed on first access and memoized
+# on the instance.
+class PriceMatrix:
+    def __init__(self, dates, tickers, values, interval='1d'):
+        self.dates = pd.DatetimeIndex(dates, name='Date')
+        self.tickers = list(tickers)
+        self.values = np.ascontiguousarray(values, dtype=np.float64).reshape(len(self.dates), len(self.tickers))
+        self.interval = interval
+
+    @classmethod
+    def from_frame(cls, prices, interval='1d'):
+        return cls(prices.index, prices.columns, prices.to_numpy(dtype=np.float64), interval)
+
+    # Bars per year, to annualize returns and volatilities of this matrix
+    @property
+    def periods_per_year(self):
+        return periods_per_year(self.interval)
+
+    @property
+    def empty(self):
+        return self.values.size == 0
+
+    def _frame(self, values):
+        frame = pd.DataFrame(values, index=self.dates, columns=self.tickers, copy=False)
+        frame.columns.name = 'ticker'
+        return frame
+
+    # Content hash of the dates, tickers and prices, for keying results computed from them
+    @cached_property
+    def fingerprint(self):
+        digest = hashlib.sha256(repr(self.tickers).encode())
+        digest.update(self.dates.asi8.tobytes())
+        digest.update(self.values.tobytes())
+        return digest.hexdigest()
+
+    @cached_property
+    def prices(self):
+        return self._frame(self.values)
+
+    # Simple returns per bar; the first row and rows next to a missing price are NaN
+    @cached_property
+    def returns(self):
+        returns = np.full_like(self.values, np.nan)
+        returns[1:] = self.values[1:] / self.values[:-1] - 1
+        return self._frame(returns)
+
+    # First available price of every ticker
+    @cached_property
+    def price_start(self):
+        valid = ~np.isnan(self.values)
+        first = np.where(valid.any(axis=0), valid.argmax(axis=0), 0)
+        return self.values[first, np.arange(len(self.tickers))]
+
+    # Return since the first available price
+    @cached_property
+    def cumulative(self):
+        return self._frame(self.values / self.price_start - 1)
+
+    @cached_property
+    def summary(self):
+        return ticker_summary(self.prices)
+
+    # Compute every memoized series now, so the instance no longer changes once it is shared (and
+    # the compute cache's size estimate includes them)
+    def materialize(self):
+        for name in ('fingerprint', 'prices', 'returns', 'price_start', 'cumulative', 'summary'):
+            getattr(self, name)
+        return self
+
+    # Long format (Date, ticker, value) for Plotly; only call this right before plotting
+    def to_long(self, series='cumulative', value_name='price_pct'):
+        return getattr(self, series).reset_index().melt(id_vars='Date', var_name='ticker', value_name=value_name)
+
+
+def load_price_matrix(tickers, start, end, interval='1d'):
+    return PriceMatrix.from_frame(get_prices(tickers, start, end, interval=interval), interval)
+
+
+# Price matrix shared by every session that selects the same tickers, dates and interval. The
+# instance is shared, so it must not be modified; its series are computed before it is cached.
+def cached_price_matrix(tickers, start, end, refresh=False, interval='1d'):
+    tickers = list(tickers)
+    return cached(cache_key('price_matrix', PRICE_MATRIX_VERSION, tickers, start, end, interval),
+                  lambda: load_price_matrix(tickers, start, end, interval).materialize(), ttl=PRICES_TTL,
+                  refresh=refresh)
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import quote
+import pandas as pd
+from utils.bars import INTRADAY, check_interval, source_intervals, resample_bars
+from utils.profiling import span
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_ROOT = os.environ.get('PRICE_STORE_DIR', os.path.join('data', 'prices'))
+# Seconds before a gap that returned no data (holiday, today's bar, delisted ticker) is asked for again
+RETRY_SECONDS = 15 * 60
+# Intervals that are never downloaded, only resampled from a finer one
+DERIVED = {'1wk': '1d'}
+# Longest range yfinance serves per intraday request
+FETCH_SPANS = {'1m': pd.Timedelta(days=7), '5m': pd.Timedelta(days=60), '1h': pd.Timedelta(days=730)}
+# How far back yfinance keeps intraday bars
+INTRADAY_HISTORY = {'1m': pd.Timedelta(days=30), '5m': pd.Timedelta(days=60), '1h': pd.Timedelta(days=730)}
+
+
+# First day intraday bars can still be fetched for (None for daily and weekly bars), a day inside
+# the source's window so the first request is not refused at the boundary
+def earliest_start(interval, history=INTRADAY_HISTORY):
+    window = history.get(interval)
+    if window is None:
+        return None
+    return pd.Timestamp.today().normalize() - window + pd.Timedelta(days=1)
+
+
+# Default fetcher. Any object with fetch(tickers, start, end) -> {ticker: OHLCV frame indexed by Date}
+# can be passed to PriceStore instead, e.g. a local fake in tests. Intraday bars are asked for with
+# fetch(tickers, start, end, interval=...), never from before the fetcher's `history` window (how
+# far back each interval is kept; a fetcher without one has no limit).
+class YFinanceFetcher:
+    history = INTRADAY_HISTORY
+
+    def fetch(self, tickers, start, end, interval='1d'):
+        step = FETCH_SPANS.get(interval)
+        if step is None:
+            return self._download(tickers, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), interval)
+        parts = {}
+        while start < end:
+            stop = min(start + step, end)
+            for ticker, frame in self._download(tickers, start.to_pydatetime(), stop.to_pydatetime(), interval).items():
+                parts.setdefault(ticker, []).append(frame)
+            start = stop
+        return {ticker: pd.concat(frames) for ticker, frames in parts.items()}
+
+    def _download(self, tickers, start, end, interval):
+        import yfinance as yf
+
+        with span('yf.download', tickers=len(tickers), interval=interval):
+            data = yf.download(list(tickers), start=start, end=end, interval=interval, group_by='ticker',
+                               progress=False)
+        frames = {}
+        if data is None or data.empty:
+            return frames
+        available = set(data.columns.get_level_values(0))
+        for ticker in tickers:
+            if ticker not in available:
+                continue
+            frame = data[ticker].reindex(columns=PRICE_FIELDS).dropna(how='all')
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+
+# OHLCV bars per ticker and interval. Daily bars are persisted as one Parquet file per ticker and
+# intraday bars as one file per ticker and month (<interval>/<ticker>/<YYYY-MM>.parquet), read
+# month by month with memory mapping. Only the ranges before or after what is already on disk are
+# fetched; weekly bars, and intraday bars whose range a finer interval already covers, are
+# resampled instead of downloaded.
+class PriceStore:
+    def __init__(self, root=DEFAULT_ROOT, fetcher=None):
+        self.root = root
+        self.fetcher = fetcher or YFinanceFetcher()
+        self._lock = threading.RLock()
+        self._frames = {}
+        self._coverage = {}
+        self._attempts = {}
+        # (interval, ticker, gap start, gap end) being fetched -> Event set when it is done
+        self._fetching = {}
+
+    def _path(self, ticker, interval='1d', month=None):
+        if interval == '1d':
+            return os.path.join(self.root, quote(ticker, safe='') + '.parquet')
+        return os.path.join(self.root, interval, quote(ticker, safe=''), f"{month}.parquet")
+
+    def _coverage_path(self, interval='1d'):
+        if interval == '1d':
+            return os.path.join(self.root, 'coverage.json')
+        return os.path.join(self.root, interval, 'coverage.json')
+
+    def _load_coverage(self, interval='1d'):
+        if interval not in self._coverage:
+            try:
+                with open(self._coverage_path(interval)) as f:
+                    raw = json.load(f)
+                self._coverage[interval] = {t: (pd.Timestamp(s), pd.Timestamp(e)) for t, (s, e) in raw.items()}
+            except (OSError, ValueError):
+                self._coverage[interval] = {}
+        return self._coverage[interval]
+
+    def _save_coverage(self, interval='1d'):
+        fmt = '%Y-%m-%d' if interval == '1d' else '%Y-%m-%dT%H:%M:%S'
+        raw = {t: [s.strftime(fmt), e.strftime(fmt)] for t, (s, e) in self._coverage[interval].items()}
+        path = self._coverage_path(interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(raw, f)
+        os.replace(tmp, path)
+
+    def _read(self, ticker):
+        if ticker not in self._frames:
+            try:
+                frame = pd.read_parquet(self._path(ticker))
+            except (OSError, ValueError):
+                frame = pd.DataFrame(columns=PRICE_FIELDS, dtype='float64', index=pd.DatetimeIndex([], name='Date'))
+            self._frames[ticker] = frame
+        return self._frames[ticker]
+
+    def _write(self, ticker, frame):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._path(ticker) + '.tmp'
+        frame.to_parquet(tmp)
+        os.replace(tmp, self._path(ticker))
+        self._frames[ticker] = frame
+
+    # Months (YYYY-MM) holding the intraday bars of [start, end)
+    @staticmethod
+    def _months(start, end):
+        return list(pd.period_range(start, end - pd.Timedelta(1), freq='M').strftime('%Y-%m'))
+
+    def _read_month(self, ticker, interval, month, fields=None):
+        try:
+            return pd.read_parquet(self._path(ticker, interval, month), columns=fields, memory_map=True)
+        except (OSError, ValueError):
+            return pd.DataFrame(columns=fields or PRICE_FIELDS, dtype='float64',
+                                index=pd.DatetimeIndex([], name='Date'))
+
+    def _write_month(self, ticker, interval, month, frame):
+        path = self._path(ticker, interval, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        frame.to_parquet(tmp)
+        os.replace(tmp, path)
+
+    # Merge newly fetched bars into what is on disk
+    def _merge(self, ticker, interval, new):
+        parts = [(None, new)] if interval == '1d' else new.groupby(new.index.strftime('%Y-%m'))
+        for month, part in parts:
+            old = self._read(ticker) if interval == '1d' else self._read_month(ticker, interval, month)
+            merged = pd.concat([old, part])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            if interval == '1d':
+                self._write(ticker, merged)
+            else:
+                self._write_month(ticker, interval, month, merged)
+
+    # Date ranges [start, end) missing on disk for a ticker. Coverage is a single range, so a request
+    # entirely before or after it is fetched from / up to the covered range, never leaving a hole.
+    def _gaps(self, ticker, start, end, interval='1d'):
+        covered = self._load_coverage(interval).get(ticker)
+        if covered is None:
+            return [(start, end)]
+        gaps = []
+        if start < covered[0]:
+            gaps.append((start, covered[0]))
+        if end > covered[1]:
+            gaps.append((covered[1], end))
+        return gaps
+
+    # Fetch the missing ranges of tickers at an interval. The lock only guards coverage and files:
+    # downloads run outside it, so reads of other tickers never wait on the network, and a range
+    # another caller is already fetching is waited for rather than fetched again.
+    def _fill(self, tickers, start, end, interval='1d'):
+        # Nothing older than yfinance's intraday window can be fetched, so it is neither asked for
+        # nor recorded as covered
+        earliest = earliest_start(interval, getattr(self.fetcher, 'history', {}))
+        if earliest is not None:
+            start = max(start, earliest)
+            if start >= end:
+                return
+        now = time.time()
+        today = pd.Timestamp.today().normalize()
+        groups, waits = {}, set()
+        done = threading.Event()
+        with self._lock:
+            for ticker in tickers:
+                for gap in self._gaps(ticker, start, end, interval):
+                    key = (interval, ticker) + gap
+                    if key in self._fetching:
+                        waits.add(self._fetching[key])
+                    elif now - self._attempts.get(key, 0) >= RETRY_SECONDS:
+                        groups.setdefault(gap, []).append(ticker)
+                        self._fetching[key] = done
+        try:
+            for (gap_start, gap_end), group in groups.items():
+                if interval == '1d':
+                    frames = self.fetcher.fetch(group, gap_start, gap_end)
+                else:
+                    frames = self.fetcher.fetch(group, gap_start, gap_end, interval=interval)
+                with self._lock:
+                    coverage = self._load_coverage(interval)
+                    for ticker in group:
+                        self._attempts[(interval, ticker, gap_start, gap_end)] = now
+                        new = frames.get(ticker)
+                        if new is None or new.empty:
+                            continue
+                        new = new.reindex(columns=PRICE_FIELDS).astype('float64')
+                        # Intraday bars keep their exchange wall-clock time
+                        new.index = pd.DatetimeIndex(new.index).tz_localize(None)
+                        if interval == '1d':
+                            new.index = new.index.normalize()
+                        new.index.name = 'Date'
+                        self._merge(ticker, interval, new)
+                        # Today's bars are still forming, so coverage never extends past today
+                        covered = coverage.get(ticker, (gap_start, gap_end))
+                        coverage[ticker] = (min(covered[0], gap_start), min(max(covered[1], gap_end), today))
+                    self._save_coverage(interval)
+        finally:
+            with self._lock:
+                for gap, group in groups.items():
+                    for ticker in group:
+                        self._fetching.pop((interval, ticker) + gap, None)
+            done.set()
+        for event in waits:
+            event.wait()
+
+    @staticmethod
+    def _bounds(start, end, interval):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if interval in INTRADAY:
+            return start, end
+        return start.normalize(), end.normalize()
+
+    # Interval each ticker's bars are read at, fetching what is missing: a finer stored interval whose
+    # coverage already holds the whole range, else the interval itself (or the one it is derived from)
+    def _prepare(self, tickers, start, end, interval):
+        sources = {}
+        with self._lock:
+            for ticker in tickers:
+                sources[ticker] = DERIVED.get(interval, interval)
+                for source in source_intervals(interval):
+                    covered = self._load_coverage(source).get(ticker)
+                    if covered is not None and covered[0] <= start and end <= covered[1]:
+                        sources[ticker] = source
+                        break
+        for source in set(sources.values()):
+            self._fill([t for t in tickers if sources[t] == source], start, end, source)
+        return sources
+
+    def _chunks(self, ticker, start, end, interval, source, fields=None):
+        if source == '1d':
+            with self._lock:
+                frame = self._read(ticker)
+            chunks = [frame if fields is None else frame[fields]]
+        else:
+            chunks = (self._read_month(ticker, source, month, fields) for month in self._months(start, end))
+        for chunk in chunks:
+            chunk = chunk[(chunk.index >= start) & (chunk.index < end)]
+            if source != interval:
+                chunk = resample_bars(chunk, interval)
+            if not chunk.empty:
+                yield chunk
+
+    # OHLCV bars for one ticker between start (inclusive) and end (exclusive), one month of intraday
+    # bars at a time, so millions of rows never have to be in memory together
+    def iter_bars(self, ticker, start, end, interval='1d', fields=None):
+        check_interval(interval)
+        start, end = self._bounds(start, end, interval)
+        source = self._prepare([ticker], start, end, interval)[ticker]
+        yield from self._chunks(ticker, start, end, interval, source, fields)
+
+    # OHLCV bars for one ticker between start (inclusive) and end (exclusive)
+    def get_bars(self, ticker, start, end, interval='1d'):
+        chunks = list(self.iter_bars(ticker, start, end, interval))
+        if not chunks:
+            return pd.DataFrame(columns=PRICE_FIELDS, dtype='float64', index=pd.DatetimeIndex([], name='Date'))
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0].copy()
+
+    # One field for many tickers in wide format: Date index, one column per ticker
+    def get_prices(self, tickers, start, end, field='Close', interval='1d'):
+        check_interval(interval)
+        tickers = list(dict.fromkeys(tickers))
+        start, end = self._bounds(start, end, interval)
+        sources = self._prepare(tickers, start, end, interval)
+        columns = {}
+        for ticker in tickers:
+            chunks = [chunk[field] for chunk in self._chunks(ticker, start, end, interval, sources[ticker], [field])]
+            columns[ticker] = pd.concat(chunks) if chunks else \
+                pd.Series(dtype='float64', index=pd.DatetimeIndex([], name='Date'))
+        prices = pd.DataFrame(columns, columns=tickers)
+        prices.index.name = 'Date'
+        prices.columns.name = 'Ticker'
+        return prices
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Process-wide store shared by every page and session
+def get_price_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
+
+
+def set_price_store(store):
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def get_prices(tickers, start, end, field='Close', interval='1d'):
+    return get_price_store().get_prices(tickers, start, end, field, interval)
+
+
+def get_bars(ticker, start, end, interval='1d'):
+    return get_price_store().get_bars(ticker, start, end, interval)
+
+
+def iter_bars(ticker, start, end, interval='1d', fields=None):
+    return get_price_store().iter_bars(ticker, start, end, interval, fields)
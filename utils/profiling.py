@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# JSON line per rerun: unset or '0' for none, '1' or '-' for stderr, anything else is a file path
+LOG_TARGET = os.environ.get('PROFILE_LOG', '')
+# Timing panel at the bottom of the sidebar
+PANEL_ENABLED = os.environ.get('PROFILE_PANEL', '') not in ('', '0')
+# Finished reruns kept for the panel's per-stage summary
+HISTORY = 200
+
+logger = logging.getLogger('profiling')
+
+_current = contextvars.ContextVar('profiling_span', default=None)
+_history = deque(maxlen=HISTORY)
+_history_lock = threading.Lock()
+_log_lock = threading.Lock()
+_log_ready = False
+
+
+# One timed section. Spans nest (a page inside a rerun, a stage inside a page); `stage()` splits
+# the innermost open span into consecutive named stages without indenting the code they cover.
+class Span:
+    def __init__(self, name, parent=None, **fields):
+        self.name = name
+        self.parent = parent
+        self.fields = fields
+        self.children = []
+        self.stage = None
+        self.start = time.perf_counter()
+        self.ms = None
+        self.record = None
+
+    @property
+    def path(self):
+        return self.name if self.parent is None else f"{self.parent.path}/{self.name}"
+
+    def close(self):
+        if self.stage is not None:
+            self.stage.close()
+            self.stage = None
+        if self.ms is None:
+            self.ms = (time.perf_counter() - self.start) * 1000
+
+    # Flat list of (path, depth, ms, fields) in start order, this span first
+    def flatten(self, depth=0):
+        rows = [{'path': self.path, 'depth': depth, 'ms': round(self.ms, 3), **self.fields}]
+        for child in self.children:
+            rows.extend(child.flatten(depth + 1))
+        return rows
+
+
+# Time the enclosed block as a child of the current span (or as a new root, e.g. a rerun). A
+# finished root is kept for the panel and written to the JSON log.
+@contextmanager
+def span(name, **fields):
+    parent = _current.get()
+    target = (parent.stage or parent) if parent is not None else None
+    current = Span(name, target, **fields)
+    if target is not None:
+        target.children.append(current)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        current.close()
+        _current.reset(token)
+        if target is None:
+            _finish(current)
+
+
+# End the current stage of the innermost span, if any, and start the next one
+def stage(name, **fields):
+    current = _current.get()
+    if current is None:
+        return
+    if current.stage is not None:
+        current.stage.close()
+    current.stage = Span(name, current, **fields)
+    current.children.append(current.stage)
+
+
+# Decorator form of span()
+def timed(name=None):
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name or function.__qualname__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _finish(root):
+    record = {'ts': round(time.time(), 3), 'name': root.name, 'ms': round(root.ms, 3), **root.fields,
+              'spans': root.flatten()[1:]}
+    root.record = record
+    with _history_lock:
+        _history.append(record)
+    if LOG_TARGET not in ('', '0'):
+        _log(record)
+
+
+def _log(record):
+    global _log_ready
+    with _log_lock:
+        if not _log_ready:
+            handler = logging.StreamHandler(sys.stderr) if LOG_TARGET in ('1', '-') else logging.FileHandler(LOG_TARGET)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            _log_ready = True
+    logger.info(json.dumps(record, default=str))
+
+
+# Finished root spans, oldest first: {'ts', 'name', 'ms', fields..., 'spans': [{'path', 'depth', 'ms', ...}]}
+def recent_traces(name=None):
+    with _history_lock:
+        return [record for record in _history if name is None or record['name'] == name]
+
+
+def clear_history():
+    with _history_lock:
+        _history.clear()
+
+
+# Count, mean, 95th percentile and max milliseconds of every span path over the recent traces
+def span_summary(name=None):
+    import numpy as np
+
+    timings = {}
+    for record in recent_traces(name):
+        timings.setdefault(record['name'], []).append(record['ms'])
+        # Span paths already start with the root's name
+        for row in record['spans']:
+            timings.setdefault(row['path'], []).append(row['ms'])
+    summary = {}
+    for path, values in timings.items():
+        values = np.asarray(values)
+        summary[path] = {'count': len(values), 'mean_ms': values.mean(), 'p95_ms': np.percentile(values, 95),
+                         'max_ms': values.max()}
+    return summary
+
+
+# Sidebar panel with a finished trace's spans (the span's record), the per-span summary of recent
+# traces with the same name and the compute cache counters. Streamlit is imported here so the batch
+# CLI and benchmarks can time spans without it.
+def show_profiling_panel(record, container=None):
+    import pandas as pd
+    import streamlit as st
+    from utils.compute_cache import get_compute_cache
+
+    container = container or st.sidebar
+    with container.expander("Profiling", expanded=False):
+        st.caption(f"This {record['name']}: {record['ms']:.0f} ms")
+        st.dataframe(pd.DataFrame([{'span': '  ' * row['depth'] + row['path'].rsplit('/', 1)[-1],
+                                    'ms': round(row['ms'], 1)} for row in record['spans']],
+                                  columns=['span', 'ms']), hide_index=True)
+        summary = pd.DataFrame(span_summary(record['name'])).T
+        st.caption(f"Last {len(recent_traces(record['name']))} {record['name']}s of every session")
+        st.dataframe(summary.sort_values('mean_ms', ascending=False).round(1))
+        stats = get_compute_cache().stats()
+        st.caption(f"Compute cache: {stats['entries']} entries, {stats['bytes'] / 1e6:.1f} MB, "
+                   f"hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses, "
+                   f"{stats['evictions']} evictions)")
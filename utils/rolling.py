@@ -0,0 +1,162 @@
+import warnings
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from utils.bars import TRADING_DAYS
+
+# Rolling-window risk analytics over a wide returns frame (Date index, one column per ticker).
+# Window statistics come from cumulative sums, so every window costs O(1) regardless of its
+# length; missing returns are skipped and windows with fewer than `min_periods` returns are NaN.
+
+
+def _column_means(values, present):
+    return np.where(present, values, 0).sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+
+
+def _window_sum(values, window):
+    cumulative = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    lagged = np.zeros_like(cumulative)
+    lagged[window:] = cumulative[:-window]
+    return (cumulative - lagged)[1:]
+
+
+# Rolling count, mean and (sample) variance of every column
+def _moments(values, window, min_periods):
+    present = ~np.isnan(values)
+    # Centre on the column means so the running sums of squares do not lose precision
+    centre = _column_means(values, present)
+    centred = np.where(present, values - centre, 0)
+    count = _window_sum(present.astype(np.float64), window)
+    total = _window_sum(centred, window)
+    squares = _window_sum(centred * centred, window)
+    valid = count >= max(min_periods, 2)
+    safe = np.where(valid, count, 2)
+    mean = np.where(valid, total / safe, np.nan)
+    variance = np.where(valid, np.clip(squares - total * total / safe, 0, None) / (safe - 1), np.nan)
+    return count, mean + centre, variance
+
+
+def rolling_mean_std(returns, window=21, min_periods=None):
+    values = np.asarray(returns, dtype=np.float64)
+    _, mean, variance = _moments(values, window, min_periods or window)
+    return (pd.DataFrame(mean, index=returns.index, columns=returns.columns),
+            pd.DataFrame(np.sqrt(variance), index=returns.index, columns=returns.columns))
+
+
+# Annualized rolling standard deviation
+def rolling_volatility(returns, window=21, periods_per_year=TRADING_DAYS, min_periods=None):
+    _, std = rolling_mean_std(returns, window, min_periods)
+    return std * np.sqrt(periods_per_year)
+
+
+# Rolling covariance between each column of x and the matching column of y, using the rows where both are present
+def _rolling_covariance(x, y, window, min_periods):
+    present = ~np.isnan(x) & ~np.isnan(y)
+    xc = np.where(present, x - _column_means(x, present), 0)
+    yc = np.where(present, y - _column_means(y, present), 0)
+    count = _window_sum(present.astype(np.float64), window)
+    sx, sy = _window_sum(xc, window), _window_sum(yc, window)
+    sxy, sxx, syy = _window_sum(xc * yc, window), _window_sum(xc * xc, window), _window_sum(yc * yc, window)
+    valid = count >= max(min_periods, 2)
+    safe = np.where(valid, count, 2)
+    cov = np.where(valid, (sxy - sx * sy / safe) / (safe - 1), np.nan)
+    var_x = np.where(valid, np.clip(sxx - sx * sx / safe, 0, None) / (safe - 1), np.nan)
+    var_y = np.where(valid, np.clip(syy - sy * sy / safe, 0, None) / (safe - 1), np.nan)
+    return cov, var_x, var_y
+
+
+# Rolling beta of every column against a benchmark return series
+def rolling_beta(returns, benchmark, window=63, min_periods=None):
+    x = returns.to_numpy(dtype=np.float64)
+    b = benchmark.reindex(returns.index).to_numpy(dtype=np.float64)
+    b = np.broadcast_to(b[:, None], x.shape)
+    cov, _, var_b = _rolling_covariance(x, b, window, min_periods or window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = np.where(var_b > 0, cov / var_b, np.nan)
+    return pd.DataFrame(beta, index=returns.index, columns=returns.columns)
+
+
+# Rolling correlation for pairs of columns; all pairs by default. Columns are named "A / B".
+def rolling_correlation(returns, window=63, pairs=None, min_periods=None):
+    columns = list(returns.columns)
+    if pairs is None:
+        pairs = [(a, b) for i, a in enumerate(columns) for b in columns[i + 1:]]
+    if not pairs:
+        return pd.DataFrame(index=returns.index)
+    left = returns[[a for a, _ in pairs]].to_numpy(dtype=np.float64)
+    right = returns[[b for _, b in pairs]].to_numpy(dtype=np.float64)
+    cov, var_a, var_b = _rolling_covariance(left, right, window, min_periods or window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.where((var_a > 0) & (var_b > 0), cov / np.sqrt(var_a * var_b), np.nan)
+    return pd.DataFrame(np.clip(corr, -1, 1), index=returns.index, columns=[f"{a} / {b}" for a, b in pairs])
+
+
+# Value at risk and expected shortfall (CVaR) at a confidence level, as positive loss fractions.
+# 'historical' uses the empirical quantile, 'parametric' a normal fitted to the mean and std.
+def value_at_risk(returns, level=0.95, method='historical'):
+    return _var_cvar(returns, level, method)[0]
+
+
+def conditional_value_at_risk(returns, level=0.95, method='historical'):
+    return _var_cvar(returns, level, method)[1]
+
+
+def _var_cvar(returns, level, method):
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    if method == 'parametric':
+        mean, std = frame.mean(), frame.std()
+        z = norm.ppf(1 - level)
+        var = -(mean + z * std)
+        cvar = -(mean - std * norm.pdf(z) / (1 - level))
+    elif method == 'historical':
+        values = frame.to_numpy(dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            quantile = np.nanquantile(values, 1 - level, axis=0) if len(values) else np.full(frame.shape[1], np.nan)
+        tail = np.where(values <= quantile, values, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            tail_mean = np.nanmean(tail, axis=0) if len(values) else quantile
+        var = pd.Series(-quantile, index=frame.columns)
+        cvar = pd.Series(-tail_mean, index=frame.columns)
+    else:
+        raise ValueError(f"Unknown VaR method: {method}")
+    if isinstance(returns, pd.Series):
+        return var.iloc[0], cvar.iloc[0]
+    return var, cvar
+
+
+# Rolling VaR. The parametric version reuses the cumulative-sum moments; the historical one
+# takes quantiles over strided window views, processed in chunks of rows to bound memory.
+def rolling_value_at_risk(returns, window=TRADING_DAYS, level=0.95, method='parametric', min_periods=None, chunk_rows=256):
+    min_periods = min_periods or window
+    if method == 'parametric':
+        mean, std = rolling_mean_std(returns, window, min_periods)
+        return -(mean + norm.ppf(1 - level) * std)
+    if method != 'historical':
+        raise ValueError(f"Unknown VaR method: {method}")
+
+    values = returns.to_numpy(dtype=np.float64)
+    padded = np.vstack([np.full((window - 1, values.shape[1]), np.nan), values])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+    result = np.full(values.shape, np.nan)
+    counts = _window_sum((~np.isnan(values)).astype(np.float64), window)
+    # Complete windows use a partial sort around the two order statistics of the quantile
+    position = (window - 1) * (1 - level)
+    lo, hi = int(np.floor(position)), int(np.ceil(position))
+    for start in range(0, len(values), chunk_rows):
+        block = windows[start:start + chunk_rows]
+        block_counts = counts[start:start + chunk_rows]
+        full = block_counts == window
+        if full.any():
+            ordered = np.partition(block[full], [lo, hi], axis=-1)
+            chunk = result[start:start + chunk_rows]
+            chunk[full] = -(ordered[:, lo] + (ordered[:, hi] - ordered[:, lo]) * (position - lo))
+        partial = ~full & (block_counts >= min_periods)
+        if partial.any():
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                chunk = result[start:start + chunk_rows]
+                chunk[partial] = -np.nanquantile(block[partial], 1 - level, axis=-1)
+    return pd.DataFrame(result, index=returns.index, columns=returns.columns)
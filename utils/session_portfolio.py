@@ -0,0 +1,40 @@
+import datetime as dt
+import streamlit as st
+from auth.db import save_portfolio, load_portfolio
+from utils.price_matrix import cached_price_matrix
+
+# Name of the portfolio restored at login and written by the Save button
+DEFAULT_PORTFOLIO = 'default'
+
+
+# Restore the user's saved tickers, dates and Calculator amounts once per login. Only metadata
+# is read here; prices are loaded by session_prices() when a page first needs them.
+def hydrate_session(username, ticker_list):
+    if st.session_state.get('hydrated_user') == username:
+        return
+    st.session_state.hydrated_user = username
+    saved = load_portfolio(username, DEFAULT_PORTFOLIO)
+    if saved is None:
+        return
+    rows = [ticker_list.find(symbol) for symbol in saved['holdings']]
+    st.session_state.selected_tickers = [ticker_list.label(row) for row in rows if row >= 0]
+    if saved['start_date']:
+        st.session_state.sel_dtl = dt.date.fromisoformat(saved['start_date'])
+    if saved['end_date']:
+        st.session_state.sel_dt2 = dt.date.fromisoformat(saved['end_date'])
+    st.session_state.amounts = saved['amounts']
+    if saved['goal'] is not None:
+        st.session_state.goal_amount = saved['goal']
+
+
+def save_session(username, ticker_list):
+    save_portfolio(username, DEFAULT_PORTFOLIO, ticker_list.symbols(st.session_state.selected_tickers),
+                   st.session_state.sel_dtl, st.session_state.sel_dt2, st.session_state.get('amounts', {}),
+                   st.session_state.get('goal_amount'))
+
+
+# Price matrix for the selection, kept in session state. Sessions with the same tickers and dates
+# share one matrix from the compute cache; refresh rebuilds it from the price store.
+def session_prices(tickers, start_date, end_date, refresh=False):
+    st.session_state.yfdata = cached_price_matrix(tickers, start_date, end_date, refresh=refresh)
+    return st.session_state.yfdata
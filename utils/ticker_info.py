@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_PATH = os.environ.get('TICKER_INFO_CACHE', os.path.join('data', 'cache', 'ticker_info.json'))
+TTL_SECONDS = 7 * 24 * 3600
+# Failed lookups are remembered too, for a shorter time, so bad tickers are not retried on every rerun
+NEGATIVE_TTL_SECONDS = 24 * 3600
+MAX_WORKERS = 8
+# Subset of yf.Ticker(...).info kept in the cache
+INFO_FIELDS = ['shortName', 'longName', 'website', 'sector', 'industry', 'quoteType', 'currency', 'exchange']
+
+
+def fetch_yfinance_info(ticker):
+    import yfinance as yf
+
+    info = yf.Ticker(ticker).info or {}
+    return {field: info[field] for field in INFO_FIELDS if info.get(field) is not None}
+
+
+def logo_url(info):
+    if not info or not info.get('website'):
+        return None
+    return 'https://logo.clearbit.com/' + info['website'].replace('https://.', '')
+
+
+# Ticker metadata with a TTL cache in memory and on disk. Missing entries are fetched concurrently
+# on a bounded thread pool, and a ticker already being fetched for another session is not fetched twice.
+class TickerInfoService:
+    def __init__(self, cache_path=CACHE_PATH, fetcher=fetch_yfinance_info, ttl=TTL_SECONDS,
+                 negative_ttl=NEGATIVE_TTL_SECONDS, max_workers=MAX_WORKERS):
+        self.cache_path = cache_path
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ticker-info')
+        self._lock = threading.Lock()
+        self._entries = None
+        self._pending = {}
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.cache_path) as f:
+                    self._entries = {ticker: tuple(entry) for ticker, entry in json.load(f).items()}
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        if os.path.dirname(self.cache_path):
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.cache_path)
+
+    def _fresh(self, entry, now):
+        fetched_at, info = entry
+        return now - fetched_at < (self.ttl if info is not None else self.negative_ttl)
+
+    def _fetch(self, ticker):
+        try:
+            info = self.fetcher(ticker)
+        except Exception:
+            info = None
+        return info or None
+
+    # {ticker: info dict, or None if the lookup failed}
+    def get_many(self, tickers):
+        tickers = list(dict.fromkeys(tickers))
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            futures = {}
+            for ticker in tickers:
+                if ticker in entries and self._fresh(entries[ticker], now):
+                    continue
+                if ticker not in self._pending:
+                    self._pending[ticker] = self._pool.submit(self._fetch, ticker)
+                futures[ticker] = self._pending[ticker]
+
+        if futures:
+            results = {ticker: future.result() for ticker, future in futures.items()}
+            with self._lock:
+                for ticker, info in results.items():
+                    self._entries[ticker] = (now, info)
+                    if self._pending.get(ticker) is futures[ticker]:
+                        del self._pending[ticker]
+                self._save()
+        with self._lock:
+            return {ticker: self._entries[ticker][1] for ticker in tickers}
+
+    def get_info(self, ticker):
+        return self.get_many([ticker])[ticker]
+
+    # {ticker: logo URL, or None when there is no website to derive it from}
+    def logo_urls(self, tickers):
+        return {ticker: logo_url(info) for ticker, info in self.get_many(tickers).items()}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+# Process-wide service shared by every page and session
+def get_ticker_info_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TickerInfoService()
+        return _service
+
+
+def set_ticker_info_service(service):
+    global _service
+    with _service_lock:
+        _service = service
+
+
+def get_logo_urls(tickers):
+    return get_ticker_info_service().logo_urls(tickers)
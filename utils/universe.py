@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+DEFAULT_DIR = os.environ.get('UNIVERSE_DIR', os.path.join('data', 'universe'))
+SNAPSHOT_VERSION = 1
+LABEL_SEPARATOR = ' - '
+
+
+# Raw ETF + equity universe from financedatabase (slow, only needed to build a snapshot)
+def fetch_universe():
+    import financedatabase as fd
+    ticker_list = pd.concat([fd.ETFs().select().reset_index()[['symbol', 'name']],
+                             fd.Equities().select().reset_index()[['symbol', 'name']]])
+    ticker_list = ticker_list[ticker_list.symbol.notna()]
+    ticker_list['name'] = ticker_list['name'].fillna('')
+    return ticker_list.drop_duplicates('symbol')
+
+
+def _blob(texts):
+    encoded = [t.encode('utf-8') for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _trigram_codes(data):
+    data = data.astype(np.int32)
+    return (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+
+
+# Trigram -> sorted row ids, stored CSR-style (keys, offsets, rows)
+def _trigram_index(blob, offsets):
+    n_rows = len(offsets) - 1
+    if len(blob) < 3:
+        return np.zeros(0, np.int32), np.zeros(1, np.int64), np.zeros(0, np.int32)
+    codes = _trigram_codes(blob)
+    rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(offsets))[:-2]
+    # A trigram is valid only if it does not run past the end of its row
+    valid = np.arange(len(codes)) + 2 < offsets[rows + 1]
+    pairs = np.sort((codes[valid].astype(np.int64) << 32) | rows[valid])
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+    pair_codes = (pairs >> 32).astype(np.int32)
+    keys, starts = np.unique(pair_codes, return_index=True)
+    trigram_offsets = np.append(starts, len(pairs)).astype(np.int64)
+    return keys, trigram_offsets, (pairs & 0xFFFFFFFF).astype(np.int32)
+
+
+# Write the universe as memory-mappable .npy arrays sorted by symbol
+def build_snapshot(directory=DEFAULT_DIR, ticker_list=None):
+    if ticker_list is None:
+        ticker_list = fetch_universe()
+    ticker_list = ticker_list.drop_duplicates('symbol').sort_values('symbol', kind='stable')
+    symbols = ticker_list['symbol'].astype(str).tolist()
+    labels = [s + LABEL_SEPARATOR + n for s, n in zip(symbols, ticker_list['name'].fillna('').astype(str))]
+
+    label_blob, label_offsets = _blob(labels)
+    search_blob, search_offsets = _blob([label.lower() for label in labels])
+    keys, trigram_offsets, trigram_rows = _trigram_index(search_blob, search_offsets)
+
+    arrays = {
+        'symbols': np.array([s.encode('utf-8') for s in symbols], dtype=bytes),
+        'label_blob': label_blob,
+        'label_offsets': label_offsets,
+        'search_blob': search_blob,
+        'search_offsets': search_offsets,
+        'trigram_keys': keys,
+        'trigram_offsets': trigram_offsets,
+        'trigram_rows': trigram_rows,
+    }
+    tmp = directory.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, name + '.npy'), array)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'count': len(symbols),
+                   'built': pd.Timestamp.now().isoformat(timespec='seconds')}, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+
+# Read-only view over a snapshot. Arrays are memory-mapped so only the pages touched by a lookup are read.
+class TickerUniverse:
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported universe snapshot version: {self.meta.get('version')}")
+        for name in ['symbols', 'label_blob', 'label_offsets', 'search_blob', 'search_offsets',
+                     'trigram_keys', 'trigram_offsets', 'trigram_rows']:
+            setattr(self, '_' + name, np.load(os.path.join(directory, name + '.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self._symbols)
+
+    # Row of a symbol, or -1 if it is not in the universe
+    def find(self, symbol):
+        key = symbol.encode('utf-8')
+        row = int(np.searchsorted(self._symbols, key))
+        if row < len(self._symbols) and self._symbols[row] == key:
+            return row
+        return -1
+
+    def symbol(self, row):
+        return self._symbols[row].decode('utf-8')
+
+    # "SYMBOL - Name" label as shown in the ticker pickers
+    def label(self, row):
+        start, end = self._label_offsets[row], self._label_offsets[row + 1]
+        return bytes(self._label_blob[start:end]).decode('utf-8')
+
+    # Company or fund name of a symbol from its label, or '' if it is not in the universe
+    def name(self, symbol):
+        row = self.find(symbol)
+        if row < 0:
+            return ''
+        return self.label(row).split(LABEL_SEPARATOR, 1)[1]
+
+    def _search_text(self, row):
+        start, end = self._search_offsets[row], self._search_offsets[row + 1]
+        return bytes(self._search_blob[start:end]).decode('utf-8')
+
+    def _prefix_rows(self, prefix):
+        key = prefix.encode('utf-8')
+        lo = int(np.searchsorted(self._symbols, key, side='left'))
+        hi = int(np.searchsorted(self._symbols, key + b'\xff', side='left'))
+        return np.arange(lo, hi)
+
+    def _candidate_rows(self, text):
+        codes = np.unique(_trigram_codes(np.frombuffer(text.encode('utf-8'), dtype=np.uint8)))
+        positions = np.searchsorted(self._trigram_keys, codes)
+        postings = []
+        for code, pos in zip(codes, positions):
+            if pos >= len(self._trigram_keys) or self._trigram_keys[pos] != code:
+                return np.zeros(0, dtype=np.int64)
+            postings.append(self._trigram_rows[self._trigram_offsets[pos]:self._trigram_offsets[pos + 1]])
+        postings.sort(key=len)
+        rows = np.asarray(postings[0])
+        for other in postings[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
+
+    # Top matches for a query: exact symbol, then symbol prefix, then substring of "symbol - name"
+    def search(self, query, limit=50, max_candidates=5000):
+        query = query.strip()
+        if not query:
+            return []
+        prefix_rows = self._prefix_rows(query.upper())
+        prefix_rows = sorted(prefix_rows, key=lambda r: len(self._symbols[r]))[:limit]
+        rows = list(prefix_rows)
+
+        needle = query.lower()
+        if len(rows) < limit and len(needle) >= 3:
+            seen = set(rows)
+            starts, contains = [], []
+            for row in self._candidate_rows(needle)[:max_candidates]:
+                row = int(row)
+                if row in seen:
+                    continue
+                text = self._search_text(row)
+                position = text.find(needle)
+                if position < 0:
+                    continue
+                name_start = text.find(LABEL_SEPARATOR) + len(LABEL_SEPARATOR)
+                (starts if position == name_start else contains).append(row)
+            rows += (starts + contains)[:limit - len(rows)]
+        return [self.label(row) for row in rows]
+
+    # Symbols for picker labels, skipping anything not in the universe
+    def symbols(self, labels):
+        symbols = []
+        for label in labels:
+            symbol = label.split(LABEL_SEPARATOR, 1)[0]
+            if self.find(symbol) >= 0:
+                symbols.append(symbol)
+        return symbols
+
+
+def load_universe(directory=DEFAULT_DIR):
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        build_snapshot(directory)
+    return TickerUniverse(directory)
+
+
+if __name__ == '__main__':
+    # python -m utils.universe [directory]: rebuild the snapshot, e.g. from a nightly job
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIR
+    build_snapshot(target)
+    print(f"Universe snapshot written to {target} ({len(TickerUniverse(target))} symbols)")